@@ -1,42 +1,3 @@
-# main.py - 主程序入口
-if __name__ == "__main__":
-    import sys
-    
-    # 测试模式：快速调试选择器
-    if len(sys.argv) > 1 and sys.argv[1] == "test":
-        print("🔍 测试模式：只抓取第一页，开启详细日志")
-        config = SpiderConfig(
-            keywords=["Python"],
-            max_pages=1,
-            items_per_page=5,  # 只抓5条
-            headless=False,
-            save_html=True,    # 保存HTML用于分析
-            save_csv=True,
-            save_json=False,
-            min_delay=2.0,
-            max_delay=3.0
-        )
-    else:
-        # 正常模式
-        config = SpiderConfig(
-            keywords=["Python"],  # 可以搜索多个关键词: ["Python", "数据分析", "Java"]
-            max_pages=3,          # 每个关键词抓取 3 页
-            items_per_page=30,
-            headless=False,       # 显示浏览器窗口
-            min_delay=3.0,
-            max_delay=6.0,
-            save_csv=True,
-            save_json=True,
-            save_html=False       # 不保存页面源码（文件太大）
-        )
-    
-    # 创建爬虫实例
-    spider = BossSpider(config)
-    
-    # 运行
-    spider.run()
-
-
 # ============ 独立的选择器调试工具 ============
 """
 使用方法：
@@ -74,31 +35,154 @@ class SpiderConfig:
     headless: bool = False
     viewport: Dict = None
     
+    # 会话复用与浏览器连接
+    reuse_session: bool = True  # 保存/加载 cookie 和 localStorage，会话有效时跳过首页预热
+    storage_state: str = None  # 默认: output_dir/storage_state.json
+    session_max_age_hours: float = 12.0  # 超过该时间的会话文件不再使用
+    cdp_endpoint: str = None  # 例如 http://127.0.0.1:9222，连接已运行的浏览器而不是重新启动
+    own_context: bool = False  # 连接已运行的浏览器时仍新建独立上下文（不复用其中的登录状态，结束时关闭）
+    interactive: bool = False  # 结束后等待回车再关闭浏览器（调试时使用）
+    
+    # 站点地址（可指向本地模拟站点）
+    base_url: str = "https://www.zhipin.com"
+    
     # 搜索配置
     keywords: List[str] = None
-    city: str = "全国"
-    salary_range: str = ""  # 例如: "20-50"
-    experience: str = ""  # 经验要求
+    city: str = "全国"  # 城市名或城市代码
+    salary_range: str = ""  # 例如: "20-50"（单位 K）
+    experience: str = ""  # 例如: "1-3年"、"应届生"
     max_pages: int = 3
     items_per_page: int = 30
+    direct_url: bool = True  # 按关键词/筛选条件/页码直接打开结果页，而不是输入搜索框和点击下一页
+    
+    # 查询拆分（单个查询的结果超过站点翻页上限时，按薪资/城市/经验/学历逐级细分，只翻叶子切片）
+    split_queries: bool = False  # 开启后忽略 max_pages，每个切片最多翻 page_cap 页（需要 direct_url）
+    page_cap: int = 10  # 站点对单个查询最多返回的页数
+    page_size: int = 30  # 站点每页返回的职位数（items_per_page 只限制每页抓取的条数，不代表站点分页大小）
+    # 拆分顺序，默认只用取值覆盖全部职位的 salary；city（仅主要城市）、experience（不含经验不限）、
+    # degree（不含学历不限）拆分后会漏掉不在取值内的职位，需要时显式加入，缺口会写入日志
+    split_facets: List[str] = None
     
     # 反爬虫配置
     min_delay: float = 2.0
     max_delay: float = 5.0
     mouse_move_enabled: bool = True
-    max_retries: int = 3
+    
+    # 重试与熔断
+    max_retries: int = 3  # 导航/搜索失败或遇到拦截页时的最多重试次数
+    retry_base_delay: float = 2.0  # 指数退避的基础延迟（秒），每次翻倍并加随机抖动
+    retry_max_delay: float = 60.0
+    breaker_threshold: int = 3  # 连续失败多少次后熔断
+    breaker_cooldown: float = 120.0  # 熔断后暂停的秒数，连续熔断时翻倍（最多 8 倍）
+    breaker_action: str = "pause"  # pause: 暂停等待; rotate: 换一个新的浏览器上下文后继续
+    
+    # 节奏控制（关闭时恢复固定随机等待）
+    adaptive_pacing: bool = True  # 等待页面就绪信号，并根据响应快慢/拦截调整页间延迟
+    pacing_min_factor: float = 0.5  # 页间延迟最低缩放到 min_delay~max_delay 的倍数
+    pacing_max_factor: float = 8.0  # 退避上限
+    slow_response_seconds: float = 6.0  # 超过该耗时视为响应缓慢
+    
+    # 并行配置（workers > 1 时启用上下文池）
+    workers: int = 1
+    requests_per_minute: float = 12.0  # 所有 worker 共享的全局请求预算
+    debug_port: int = 9222  # worker 通过 CDP 连接同一个浏览器
+    
+    # 解析配置
+    selector_cache: bool = True  # 记录选择器命中情况，优先尝试最近命中的选择器
+    selector_stats: str = None  # 默认: output_dir/selector_stats.json
+    batch_extract: bool = True  # 整页一次 evaluate 提取，失败时回退逐卡解析
+    capture_api: bool = True  # 优先使用搜索接口返回的 JSON，没有捕获到时才解析 DOM
+    
+    # 资源拦截（按资源类型 / URL 子串，允许规则优先）
+    block_resources: bool = True
+    block_resource_types: List[str] = None  # 默认: image, media, font
+    block_url_patterns: List[str] = None  # 默认: 常见统计和广告域名
+    allow_url_patterns: List[str] = None  # 命中时总是放行
+    
+    # 增量抓取
+    incremental: bool = False  # 跳过已抓取过的职位（按职位链接中的 ID）
+    seen_db: str = None  # 默认: output_dir/seen_jobs.db
+    early_stop_ratio: float = 0.9  # 一页中已知职位占比达到该值时停止翻页
+    
+    # 职位详情补充（访问职位链接，补充职位描述、工作地址和招聘者）
+    fetch_details: bool = False
+    detail_workers: int = 4  # 详情页并发数
+    detail_requests_per_second: float = 1.0  # 每个域名的请求速率上限
+    detail_timeout: float = 15.0
+    detail_cache: str = None  # 默认: output_dir/job_details.db
+    detail_cache_ttl_hours: float = 72.0  # 缓存有效期，过期后重新抓取
+    
+    # 录制/回放（每个浏览器上下文一个 .har.zip 文件）
+    har_record: str = None  # 把爬取过程的全部网络流量录制到该目录
+    har_replay: str = None  # 所有请求都从该目录的录制文件返回，不访问网络，并跳过所有等待
+    
+    # 运行指标（OpenMetrics 文本格式）
+    metrics: bool = True
+    metrics_file: str = None  # 默认: output_dir/metrics.prom，定期覆盖写入
+    metrics_interval: float = 15.0  # 写文件间隔（秒）
+    metrics_port: int = 0  # 非 0 时在 127.0.0.1:<port>/metrics 提供实时指标
+    
+    # 近似重复检测（同一职位换链接、改标题后重发，或出现在多个关键词下）
+    near_dedup: bool = False  # 给每条职位标注"重复组"（MinHash + 分段 LSH 索引，跨运行保存）
+    near_dup_db: str = None  # 默认: output_dir/near_dups.db
+    near_dup_threshold: float = 0.6  # 同一公司、城市下，标题与薪资/地点/福利的综合相似度达到该值视为重复
+    drop_near_duplicates: bool = False  # 本次运行已输出过同组职位时丢弃后来的记录
     
     # 数据存储
     output_dir: str = "data"
     save_html: bool = True
+    snapshot_store: bool = True  # 页面源码写入压缩、按内容去重的快照存储，而不是每页一个 .html 文件
+    snapshot_dir: str = None  # 默认: output_dir/snapshots（同一目录同时只能有一个进程写入）
     save_csv: bool = True
     save_json: bool = True
+    streaming: bool = True  # 每页解析完立即追加写入，不在内存中累积全部结果
+    stream_formats: List[str] = None  # jsonl / csv / parquet，默认由 save_csv / save_json 决定
+    stream_json_array: bool = True  # 流式写入 .jsonl 时，结束后另存一份 .json 数组（与非流式输出的格式相同）
+    fsync_every_pages: int = 1  # 每写入多少页强制落盘一次
+    checkpoint: bool = True  # 记录爬取进度到 output_dir/checkpoint.json，可用 --resume 续爬
+    
+    # 分布式任务队列（多进程/多机共享同一个 SQLite 文件，例如放在共享磁盘上）
+    queue_db: str = None  # 默认: output_dir/tasks.db
+    queue_cities: List[str] = None  # 协调者展开任务时使用的城市列表，默认只有 city
+    queue_lease_seconds: float = 180.0  # 租约到期仍未完成的任务会被其他 worker 重新领取
+    queue_poll_seconds: float = 5.0  # 队列暂时没有可领取任务时的轮询间隔
     
     def __post_init__(self):
         if self.viewport is None:
             self.viewport = {'width': 1920, 'height': 1080}
         if self.keywords is None:
             self.keywords = ["Python"]
+        if self.block_resource_types is None:
+            self.block_resource_types = ["image", "media", "font"]
+        if self.block_url_patterns is None:
+            self.block_url_patterns = [
+                "hm.baidu.com", "google-analytics.com", "googletagmanager.com",
+                "doubleclick.net", "cnzz.com", "umeng.com", "/wapi/zpCommon/actionLog",
+            ]
+        if self.allow_url_patterns is None:
+            self.allow_url_patterns = []
+        if self.seen_db is None:
+            self.seen_db = os.path.join(self.output_dir, "seen_jobs.db")
+        if self.metrics_file is None:
+            self.metrics_file = os.path.join(self.output_dir, "metrics.prom")
+        if self.snapshot_dir is None:
+            self.snapshot_dir = os.path.join(self.output_dir, "snapshots")
+        if self.selector_stats is None:
+            self.selector_stats = os.path.join(self.output_dir, "selector_stats.json")
+        if self.near_dup_db is None:
+            self.near_dup_db = os.path.join(self.output_dir, "near_dups.db")
+        if self.detail_cache is None:
+            self.detail_cache = os.path.join(self.output_dir, "job_details.db")
+        if self.split_facets is None:
+            self.split_facets = ["salary"]
+        if self.storage_state is None:
+            self.storage_state = os.path.join(self.output_dir, "storage_state.json")
+        if self.queue_db is None:
+            self.queue_db = os.path.join(self.output_dir, "tasks.db")
+        if self.queue_cities is None:
+            self.queue_cities = [self.city]
+        if self.stream_formats is None:
+            self.stream_formats = (["csv"] if self.save_csv else []) + (["jsonl"] if self.save_json else [])
         os.makedirs(self.output_dir, exist_ok=True)
 
 
@@ -138,6 +222,15 @@ class Selectors:
     # 分页
     NEXT_PAGE = [".next", ".page-next", "[class*='next']"]
     PAGE_NUMBER = [".page-number", ".cur", ".active"]
+    
+    # 验证/拦截页
+    BLOCK_PAGE = [".geetest_panel", ".verify-wrap", "#captcha", "[class*='captcha']"]
+    
+    # 职位详情页
+    DETAIL_DESCRIPTION = [".job-sec-text", ".job-detail-section .text", ".job-sec .text"]
+    DETAIL_ADDRESS = [".location-address", ".job-location .location-address", "[class*='location-address']"]
+    DETAIL_RECRUITER = [".job-boss-info .name", ".detail-figure .name", ".boss-info-attr .name"]
+    DETAIL_RECRUITER_TITLE = [".job-boss-info .boss-info-attr", ".boss-info-attr", ".detail-figure .title"]
 
 
 # utils.py - 工具函数
@@ -153,7 +246,7 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('spider.log', encoding='utf-8'),
+        logging.FileHandler('spider.log', encoding='utf-8', delay=True),
         logging.StreamHandler()
     ]
 )
@@ -162,10 +255,15 @@ logger = logging.getLogger(__name__)
 class Utils:
     """工具类"""
     
+    # 所有人为等待的缩放比例（回放模式下为 0）
+    sleep_scale = 1.0
+    
     @staticmethod
     def random_sleep(min_sec: float = 1, max_sec: float = 3):
         """随机延迟"""
-        time.sleep(random.uniform(min_sec, max_sec))
+        delay = random.uniform(min_sec, max_sec) * Utils.sleep_scale
+        Metrics.observe("sleep", delay, kind="random")
+        time.sleep(delay)
     
     @staticmethod
     def human_mouse_move(page):
@@ -174,7 +272,7 @@ class Utils:
             x = random.randint(100, 1200)
             y = random.randint(100, 800)
             page.mouse.move(x, y, steps=random.randint(5, 15))
-            time.sleep(random.uniform(0.1, 0.3))
+            time.sleep(random.uniform(0.1, 0.3) * Utils.sleep_scale)
     
     @staticmethod
     def validate_salary(salary: str) -> bool:
@@ -196,159 +294,790 @@ class Utils:
     
     @staticmethod
     def parse_salary(salary: str) -> Dict:
-        """解析薪资范围"""
-        if not salary or salary == "面议":
-            return {"min": 0, "max": 0, "unit": "面议"}
-        
-        # 提取数字
-        numbers = re.findall(r'\d+', salary)
-        
-        if len(numbers) >= 2:
-            min_val = int(numbers[0])
-            max_val = int(numbers[1])
-            
-            # 判断单位
-            if 'K' in salary.upper():
-                unit = "K"
-            elif '万' in salary:
-                unit = "万"
-                min_val *= 10
-                max_val *= 10
-            else:
-                unit = "K"
-            
-            return {"min": min_val, "max": max_val, "unit": unit, "avg": (min_val + max_val) / 2}
-        elif len(numbers) == 1:
-            # 只有一个数字的情况，比如 "15K"
-            val = int(numbers[0])
-            if 'K' in salary.upper():
-                unit = "K"
-            elif '万' in salary:
-                unit = "万"
-                val *= 10
-            else:
-                unit = "K"
-            return {"min": val, "max": val, "unit": unit, "avg": val}
-        
-        # 无法解析，但保留原始字符串
-        return {"min": 0, "max": 0, "unit": "未知", "raw": salary}
+        """解析单个薪资字符串，返回 {"min", "max", "avg", "unit", ...}（批量处理请用 SalaryNormalizer.normalize）"""
+        return SalaryNormalizer.parse(salary)
     
     @staticmethod
     def save_to_json(data: List[Dict], filename: str):
         """保存为 JSON"""
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            json.dump([JobRecord.as_dict(item) for item in data], f, ensure_ascii=False, indent=2)
         logger.info(f"已保存 JSON: {filename}")
     
     @staticmethod
     def save_to_csv(data: List[Dict], filename: str):
         """保存为 CSV"""
         import pandas as pd
-        df = pd.DataFrame(data)
+        df = JobRecord.to_frame(data) if data and isinstance(data[0], JobRecord) else pd.DataFrame(data)
         df.to_csv(filename, index=False, encoding='utf-8-sig')
         logger.info(f"已保存 CSV: {filename}")
 
 
+# salary.py - 薪资标准化
+class SalaryNormalizer:
+    """
+    对整列薪资字符串做向量化解析，统一成月薪（单位 K）
+    支持 K / 千 / 万 / 元，/天、/时、/年 等计薪周期，以及 ·N薪 的年终月数
+    只解析去重后的取值再按编码展开，百万行的归档数据也只需处理几千种写法
+    """
+    
+    PATTERN = (
+        r"(?P<low>\d+(?:\.\d+)?)(?!\d|\.\d|\s*薪)\s*(?P<low_unit>[Kk千万])?"
+        r"\s*(?:[-~～至]\s*(?P<high>\d+(?:\.\d+)?)\s*(?P<unit>[Kk千万]|元)?)?"
+        r"(?:\s*(?P<yuan>元))?\s*(?:/\s*(?P<period>小时|时|天|日|月|年))?"
+        r"(?:.*?(?P<months>\d+)\s*薪)?"
+    )
+    REGEX = re.compile(PATTERN)
+    UNIT_YUAN = {"K": 1000, "千": 1000, "万": 10000, "元": 1}
+    # 换算成月薪的倍数（按每月 21.75 个工作日、每天 8 小时）
+    PERIOD_MONTHLY = {"月": 1, "天": 21.75, "日": 21.75, "时": 174, "小时": 174, "年": 1 / 12}
+    COLUMNS = ["薪资最低", "薪资最高", "薪资平均", "年薪", "薪资单位", "计薪周期", "薪资月数"]
+    
+    @classmethod
+    def normalize(cls, salaries) -> "pd.DataFrame":
+        """salaries 为一列薪资字符串，返回与之等长的标准化结果（月薪、年薪单位 K）"""
+        import pandas as pd
+        series = pd.Series(salaries, dtype="object")
+        codes, uniques = pd.factorize(series.fillna("").astype(str))
+        raw = pd.Series(uniques, dtype="object")
+        parts = raw.str.extract(cls.PATTERN)
+        parsed = parts["low"].notna()
+        
+        # 两端各自的单位（"8千-1.2万"），一端没写时沿用另一端
+        unit = parts["unit"].fillna(parts["yuan"]).fillna(parts["low_unit"]).fillna("K").str.upper()
+        low_unit = parts["low_unit"].fillna(parts["unit"]).fillna(parts["yuan"]).fillna("K").str.upper()
+        period = parts["period"].fillna("月")
+        scale = period.map(cls.PERIOD_MONTHLY) / 1000
+        low = parts["low"].astype(float) * low_unit.map(cls.UNIT_YUAN) * scale
+        high = parts["high"].astype(float).mul(unit.map(cls.UNIT_YUAN) * scale).fillna(low)
+        avg = (low + high) / 2
+        months = parts["months"].astype(float).fillna(12)
+        
+        negotiable = raw.str.contains("面议", regex=False) | (raw == "")
+        unparsed_label = negotiable.map({True: "面议", False: "未知"})
+        result = pd.DataFrame({
+            "薪资最低": low.round(2).fillna(0),
+            "薪资最高": high.round(2).fillna(0),
+            "薪资平均": avg.round(2).fillna(0),
+            "年薪": (avg * months.where(period == "月", 12)).round(2).fillna(0),
+            "薪资单位": unit.where(parsed, unparsed_label),
+            "计薪周期": period.where(parsed, ""),
+            "薪资月数": months.where(parsed, 0).astype(int),
+        })
+        result = result.iloc[codes].reset_index(drop=True)
+        result.index = series.index
+        return result
+    
+    @classmethod
+    def parse(cls, salary: str) -> Dict:
+        """
+        单个字符串的快速路径（不经过 pandas，规则与 normalize 相同）
+        面议返回 {"min": 0, "max": 0, "unit": "面议"}，无法解析时 unit 为 "未知" 并带上 "raw" 原始字符串
+        """
+        salary = salary or ""
+        match = cls.REGEX.search(salary)
+        if not match:
+            if not salary or "面议" in salary:
+                return {"min": 0, "max": 0, "unit": "面议"}
+            return {"min": 0, "max": 0, "unit": "未知", "raw": salary}
+        parts = match.groupdict()
+        unit = (parts["unit"] or parts["yuan"] or parts["low_unit"] or "K").upper()
+        low_unit = (parts["low_unit"] or parts["unit"] or parts["yuan"] or "K").upper()
+        period = parts["period"] or "月"
+        scale = cls.PERIOD_MONTHLY[period] / 1000
+        low = float(parts["low"]) * cls.UNIT_YUAN[low_unit] * scale
+        high = float(parts["high"]) * cls.UNIT_YUAN[unit] * scale if parts["high"] else low
+        avg = (low + high) / 2
+        months = int(parts["months"]) if parts["months"] else 12
+        return {
+            "min": round(low, 2), "max": round(high, 2), "avg": round(avg, 2), "unit": unit,
+            "annual": round(avg * (months if period == "月" else 12), 2), "period": period, "months": months,
+        }
+    
+    @classmethod
+    def apply(cls, jobs: List[Dict]) -> List[Dict]:
+        """为一批职位数据填充薪资列（原地修改并返回）"""
+        if not jobs:
+            return jobs
+        frame = cls.normalize([job.get("薪资", "") for job in jobs])
+        for job, row in zip(jobs, frame.to_dict("records")):
+            job.update(row)
+        return jobs
+    
+    @classmethod
+    def normalize_file(cls, path: str) -> str:
+        """重新标准化已保存结果中的薪资列（csv / jsonl / json / parquet），写到 <原文件名>_normalized"""
+        import pandas as pd
+        readers = {
+            ".csv": lambda p: pd.read_csv(p, encoding="utf-8-sig", dtype={"薪资": str}),
+            ".jsonl": lambda p: pd.read_json(p, lines=True, dtype={"薪资": str}),
+            ".json": lambda p: pd.read_json(p, dtype={"薪资": str}),
+            ".parquet": pd.read_parquet,
+        }
+        stem, ext = os.path.splitext(path)
+        if ext not in readers:
+            raise ValueError(f"不支持的文件格式: {path}")
+        
+        start = time.perf_counter()
+        df = readers[ext](path)
+        df[cls.COLUMNS] = cls.normalize(df["薪资"])
+        output = f"{stem}_normalized{ext}"
+        if ext == ".csv":
+            df.to_csv(output, index=False, encoding="utf-8-sig")
+        elif ext == ".jsonl":
+            df.to_json(output, orient="records", lines=True, force_ascii=False)
+        elif ext == ".json":
+            df.to_json(output, orient="records", force_ascii=False, indent=2)
+        else:
+            df.to_parquet(output, index=False)
+        logger.info(f"已标准化 {len(df)} 行薪资，用时 {time.perf_counter() - start:.2f} 秒: {output}")
+        return output
+
+
+# search_url.py - 搜索地址构造
+from urllib.parse import urlencode, urlsplit, urlunsplit, parse_qsl
+
+
+class SearchUrl:
+    """把关键词、城市、薪资、经验和页码编码进结果页 URL，任意一页都可以直接打开"""
+    
+    CITY_CODES = {
+        "全国": "100010000", "北京": "101010100", "上海": "101020100", "天津": "101030100",
+        "重庆": "101040100", "广州": "101280100", "深圳": "101280600", "杭州": "101210100",
+        "南京": "101190100", "苏州": "101190400", "武汉": "101200100", "成都": "101270100",
+        "西安": "101110100", "长沙": "101250100", "郑州": "101180100", "厦门": "101230200",
+    }
+    
+    # 薪资档位（单位 K）: (下限, 上限, 代码)
+    SALARY_BANDS = [
+        (0, 3, "402"), (3, 5, "403"), (5, 10, "404"),
+        (10, 20, "405"), (20, 50, "406"), (50, float("inf"), "407"),
+    ]
+    
+    EXPERIENCE_CODES = {
+        "不限": "101", "经验不限": "101", "在校生": "108", "应届生": "102",
+        "1年以内": "103", "1-3年": "104", "3-5年": "105", "5-10年": "106", "10年以上": "107",
+    }
+    
+    DEGREE_CODES = {
+        "初中及以下": "209", "中专/中技": "208", "高中": "206", "大专": "202",
+        "本科": "203", "硕士": "204", "博士": "205",
+    }
+    
+    @classmethod
+    def filters(cls, config: "SpiderConfig", city: str = None) -> Dict[str, str]:
+        """配置中的筛选条件 -> {参数名: 代码}（没有设置的条件不出现）"""
+        codes = {
+            "city": cls.city_code(city or config.city),
+            "experience": cls.experience_code(config.experience),
+            "salary": cls.salary_code(config.salary_range),
+        }
+        return {name: code for name, code in codes.items() if code}
+    
+    @classmethod
+    def city_code(cls, city: str) -> Optional[str]:
+        if not city:
+            return None
+        if city.isdigit():
+            return city
+        code = cls.CITY_CODES.get(city.rstrip("市"))
+        if code is None:
+            logger.warning(f"未知城市 {city}，不按城市筛选")
+        return code
+    
+    @classmethod
+    def salary_code(cls, salary_range: str) -> Optional[str]:
+        """"20-50" -> 与该区间重叠的档位代码（多个时用逗号连接）"""
+        if not salary_range:
+            return None
+        if salary_range in {code for _, _, code in cls.SALARY_BANDS}:
+            return salary_range
+        match = re.match(r"^\s*(\d+)\s*[-~]?\s*(\d+)?\s*[kK]?\s*$", salary_range)
+        if not match:
+            logger.warning(f"无法识别的薪资范围 {salary_range}，不按薪资筛选")
+            return None
+        low = float(match.group(1))
+        high = float(match.group(2)) if match.group(2) else float("inf")
+        codes = [code for band_low, band_high, code in cls.SALARY_BANDS if band_low < high and low < band_high]
+        return ",".join(codes) or None
+    
+    @classmethod
+    def experience_code(cls, experience: str) -> Optional[str]:
+        if not experience:
+            return None
+        if experience.isdigit():
+            return experience
+        code = cls.EXPERIENCE_CODES.get(experience.replace(" ", ""))
+        if code is None:
+            logger.warning(f"未知经验要求 {experience}，不按经验筛选")
+        return code
+    
+    @classmethod
+    def build(cls, config: "SpiderConfig", keyword: str, page: int = 1, city: str = None,
+              filters: Dict[str, str] = None) -> str:
+        """city 为空时使用 config.city；filters 为 {参数名: 代码}，给出时代替配置中的筛选条件"""
+        params = {"query": keyword}
+        if filters is None:
+            filters = cls.filters(config, city)
+        params.update({name: code for name, code in filters.items() if code})
+        params["page"] = page
+        return f"{config.base_url.rstrip('/')}/web/geek/job?{urlencode(params)}"
+    
+    @staticmethod
+    def with_page(url: str, page: int) -> str:
+        """把已打开的结果页 URL 改成第 page 页，其余查询参数（站点实际使用的筛选条件）保持不变"""
+        parts = urlsplit(url)
+        params = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if name != "page"]
+        params.append(("page", str(page)))
+        return urlunsplit(parts._replace(query=urlencode(params)))
+
+
+# metrics.py - 运行指标
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class Metrics:
+    """
+    进程内的计数器和耗时直方图（线程安全），未激活时所有记录都是空操作
+    直方图: navigation / wait / sleep / selector_lookup / parse / write / detail_fetch（秒）
+    """
+    
+    PREFIX = "boss_"
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    
+    active: Optional["Metrics"] = None
+    
+    def __init__(self):
+        self.counters: Dict[tuple, float] = {}
+        self.histograms: Dict[tuple, list] = {}  # (名称, 标签) -> [各桶计数, 总和, 次数]
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def activate(cls) -> "Metrics":
+        """同一进程内的多个爬虫共用一份指标"""
+        if cls.active is None:
+            cls.active = cls()
+        return cls.active
+    
+    @classmethod
+    def inc(cls, name: str, value: float = 1, **labels):
+        if cls.active:
+            key = (name, tuple(sorted(labels.items())))
+            with cls.active._lock:
+                cls.active.counters[key] = cls.active.counters.get(key, 0) + value
+    
+    @classmethod
+    def observe(cls, name: str, seconds: float, **labels):
+        if cls.active:
+            key = (name, tuple(sorted(labels.items())))
+            with cls.active._lock:
+                hist = cls.active.histograms.setdefault(key, [[0] * len(cls.BUCKETS), 0.0, 0])
+                for i, bound in enumerate(cls.BUCKETS):
+                    if seconds <= bound:
+                        hist[0][i] += 1
+                hist[1] += seconds
+                hist[2] += 1
+    
+    @classmethod
+    @contextmanager
+    def timer(cls, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls.observe(name, time.perf_counter() - start, **labels)
+    
+    def totals(self, name: str) -> Dict[str, float]:
+        """某个直方图按标签汇总的耗时"""
+        with self._lock:
+            return {
+                ",".join(f"{k}={v}" for k, v in labels) or name: hist[1]
+                for (hist_name, labels), hist in self.histograms.items() if hist_name == name
+            }
+    
+    @staticmethod
+    def format_labels(labels: tuple) -> str:
+        if not labels:
+            return ""
+        escaped = [(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels]
+        return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+    
+    def render(self, gauges: Dict[str, float] = None) -> str:
+        """OpenMetrics 文本格式"""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            histograms = [(key, (list(hist[0]), hist[1], hist[2])) for key, hist in histograms]
+        
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                lines.append(f"# TYPE {self.PREFIX}{name} counter")
+                declared.add(name)
+            lines.append(f"{self.PREFIX}{name}_total{self.format_labels(labels)} {value}")
+        for (name, labels), (buckets, total, count) in histograms:
+            if name not in declared:
+                lines.append(f"# TYPE {self.PREFIX}{name}_seconds histogram")
+                lines.append(f"# UNIT {self.PREFIX}{name}_seconds seconds")
+                declared.add(name)
+            for bound, bucket_count in zip(self.BUCKETS, buckets):
+                lines.append(f"{self.PREFIX}{name}_seconds_bucket{self.format_labels(labels + (('le', bound),))} {bucket_count}")
+            lines.append(f"{self.PREFIX}{name}_seconds_bucket{self.format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.PREFIX}{name}_seconds_sum{self.format_labels(labels)} {round(total, 6)}")
+            lines.append(f"{self.PREFIX}{name}_seconds_count{self.format_labels(labels)} {count}")
+        for name, value in (gauges or {}).items():
+            lines.append(f"# TYPE {self.PREFIX}{name} gauge")
+            lines.append(f"{self.PREFIX}{name} {value}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """定期把指标写入文件（原子替换），可选通过 HTTP 提供实时指标"""
+    
+    CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+    GAUGE_KEYS = ("total_pages", "total_crawled", "total_valid", "total_failed", "total_new", "total_known")
+    
+    def __init__(self, config: SpiderConfig, metrics: Metrics, stats: Dict):
+        self.config = config
+        self.metrics = metrics
+        self.stats = stats
+        self.server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def render(self) -> str:
+        gauges = {f"spider_{key}": self.stats.get(key, 0) for key in self.GAUGE_KEYS}
+        return self.metrics.render(gauges)
+    
+    def write(self):
+        tmp_path = f"{self.config.metrics_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, self.config.metrics_file)
+    
+    def loop(self):
+        while not self._stop.wait(self.config.metrics_interval):
+            try:
+                self.write()
+            except Exception as e:
+                logger.warning(f"写入指标文件失败: {e}")
+    
+    def start(self):
+        self._thread = threading.Thread(target=self.loop, daemon=True, name="metrics")
+        self._thread.start()
+        if self.config.metrics_port:
+            exporter = self
+            
+            class Handler(BaseHTTPRequestHandler):
+                def log_message(self, format, *args):
+                    pass
+                
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    data = exporter.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", exporter.CONTENT_TYPE)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+            
+            self.server = ThreadingHTTPServer(("127.0.0.1", self.config.metrics_port), Handler)
+            threading.Thread(target=self.server.serve_forever, daemon=True, name="metrics-http").start()
+            logger.info(f"实时指标: http://127.0.0.1:{self.config.metrics_port}/metrics")
+        logger.info(f"指标文件: {self.config.metrics_file}（每 {self.config.metrics_interval:g} 秒更新）")
+    
+    def stop(self):
+        self._stop.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        self.write()
+
+
+# selector_cache.py - 选择器命中缓存
+import threading
+
+
+class SelectorCache:
+    """
+    记录每个字段各候选选择器的命中/未命中次数，跨运行持久化
+    候选顺序：最近命中的选择器优先，其余按命中率排序，命中率相同保持 Selectors 中的原顺序
+    """
+    
+    # 当前生效的缓存（未启用时所有查询按 Selectors 原顺序进行）
+    active: Optional["SelectorCache"] = None
+    
+    def __init__(self, path: str = None):
+        self.path = path
+        self.counts: Dict[str, Dict[str, List[int]]] = {}  # 字段 -> 选择器 -> [命中, 未命中]
+        self.last_hit: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.counts = data.get("counts", {})
+                self.last_hit = data.get("last_hit", {})
+                logger.info(f"已加载选择器统计: {path}")
+            except Exception as e:
+                logger.warning(f"读取选择器统计失败，重新统计: {e}")
+    
+    @classmethod
+    def activate(cls, path: str) -> "SelectorCache":
+        """启用缓存（同一路径复用同一实例，供多个 worker 共享）"""
+        if cls.active is None or cls.active.path != path:
+            cls.active = cls(path)
+        return cls.active
+    
+    @classmethod
+    def candidates(cls, field: str) -> List[str]:
+        """字段的候选选择器（按缓存排序）"""
+        selectors = getattr(Selectors, field)
+        return cls.active.order(field, selectors) if cls.active else selectors
+    
+    @classmethod
+    def report(cls, field: str, selector: str, hit: bool):
+        """记录一次选择器尝试"""
+        if cls.active:
+            cls.active.record(field, selector, hit)
+        if Metrics.active:
+            Metrics.inc("selector_lookups", field=field, result="hit" if hit else "miss")
+            if hit and selector != getattr(Selectors, field)[0]:
+                Metrics.inc("selector_fallbacks", field=field)
+    
+    def order(self, field: str, selectors: List[str]) -> List[str]:
+        counts = self.counts.get(field, {})
+        last = self.last_hit.get(field)
+        
+        def rank(item):
+            index, selector = item
+            hits, misses = counts.get(selector, (0, 0))
+            rate = hits / (hits + misses) if hits + misses else 0.0
+            return (selector != last, -rate, index)
+        
+        return [selector for _, selector in sorted(enumerate(selectors), key=rank)]
+    
+    def record(self, field: str, selector: str, hit: bool):
+        with self._lock:
+            counts = self.counts.setdefault(field, {}).setdefault(selector, [0, 0])
+            counts[0 if hit else 1] += 1
+            if hit:
+                self.last_hit[field] = selector
+    
+    def drift(self) -> Dict[str, str]:
+        """最近命中的不是首选选择器的字段（页面可能已改版）"""
+        return {
+            field: selector for field, selector in self.last_hit.items()
+            if hasattr(Selectors, field) and getattr(Selectors, field)[0] != selector
+        }
+    
+    def summary(self) -> Dict:
+        hits = sum(c[0] for field in self.counts.values() for c in field.values())
+        misses = sum(c[1] for field in self.counts.values() for c in field.values())
+        return {"hits": hits, "misses": misses, "drift": self.drift()}
+    
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {"counts": self.counts, "last_hit": self.last_hit}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+# record.py - 职位数据结构
+import sys
+
+
+class JobRecord:
+    """
+    一条职位数据：__slots__ 存储，重复度高的类别字段（公司、学历、地点等）驻留为同一个字符串对象
+    按中文列名像 dict 一样读写，写出时直接按列取值，不再为每条记录构造 dict
+    """
+    
+    # 列名 -> 属性名（列顺序即输出顺序）
+    COLUMNS = {
+        "职位名称": "title", "公司名称": "company", "薪资": "salary",
+        "薪资最低": "salary_min", "薪资最高": "salary_max", "薪资平均": "salary_avg", "年薪": "salary_annual",
+        "薪资单位": "salary_unit", "计薪周期": "salary_period", "薪资月数": "salary_months",
+        "经验要求": "experience", "学历要求": "education", "工作地点": "location",
+        "福利待遇": "welfare", "公司信息": "company_info", "职位链接": "link", "抓取时间": "crawl_time",
+    }
+    # 开启详情抓取后才有的列
+    DETAIL_COLUMNS = {"职位描述": "description", "工作地址": "address", "招聘者": "recruiter", "招聘者职位": "recruiter_title"}
+    # 开启近似重复检测后才有的列
+    DEDUP_COLUMNS = {"重复组": "cluster_id"}
+    ALL_COLUMNS = {**COLUMNS, **DETAIL_COLUMNS, **DEDUP_COLUMNS}
+    CATEGORICAL = {
+        "company", "salary", "salary_unit", "salary_period", "experience", "education",
+        "location", "welfare", "company_info", "crawl_time", "recruiter_title",
+    }
+    NUMERIC = {"salary_min": "float", "salary_max": "float", "salary_avg": "float", "salary_annual": "float", "salary_months": "int"}
+    
+    __slots__ = tuple(ALL_COLUMNS.values())
+    
+    def __init__(self, **fields):
+        for attr in self.__slots__:
+            object.__setattr__(self, attr, None)
+        for attr, value in fields.items():
+            setattr(self, attr, value)
+    
+    def __setattr__(self, attr: str, value):
+        if attr in self.CATEGORICAL and type(value) is str:
+            value = sys.intern(value)
+        object.__setattr__(self, attr, value)
+    
+    def __getstate__(self):
+        return tuple(getattr(self, attr) for attr in self.__slots__)
+    
+    def __setstate__(self, state):
+        # 反序列化（如离线解析的进程池返回）后重新驻留
+        for attr, value in zip(self.__slots__, state):
+            setattr(self, attr, value)
+    
+    # 按列名访问，兼容原来的 dict 用法
+    def __getitem__(self, column: str):
+        try:
+            return getattr(self, self.ALL_COLUMNS[column])
+        except KeyError:
+            raise KeyError(column) from None
+    
+    def __setitem__(self, column: str, value):
+        if column not in self.ALL_COLUMNS:
+            raise KeyError(column)
+        setattr(self, self.ALL_COLUMNS[column], value)
+    
+    def __contains__(self, column: str) -> bool:
+        return column in self.keys()
+    
+    def get(self, column: str, default=None):
+        attr = self.ALL_COLUMNS.get(column)
+        value = getattr(self, attr) if attr else None
+        return default if value is None else value
+    
+    def update(self, values: Dict):
+        for column, value in values.items():
+            self[column] = value
+    
+    def has_details(self) -> bool:
+        return self.description is not None
+    
+    def keys(self) -> List[str]:
+        columns = list(self.COLUMNS)
+        if self.has_details():
+            columns += list(self.DETAIL_COLUMNS)
+        if self.cluster_id is not None:
+            columns += list(self.DEDUP_COLUMNS)
+        return columns
+    
+    def row(self, columns: List[str] = None) -> tuple:
+        """按列取值；未知列（如续写旧文件时表头里的列）为 None"""
+        return tuple(
+            getattr(self, self.ALL_COLUMNS[column]) if column in self.ALL_COLUMNS else None
+            for column in (columns or self.keys())
+        )
+    
+    def values(self) -> tuple:
+        return self.row()
+    
+    def items(self):
+        return zip(self.keys(), self.row())
+    
+    def __iter__(self):
+        return iter(self.keys())
+    
+    def __len__(self) -> int:
+        return len(self.keys())
+    
+    def to_dict(self) -> Dict:
+        return dict(self.items())
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (JobRecord, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+    
+    # 和 dict 一样可变、按内容比较（与等值的 dict 相等），因此同样不可哈希；
+    # 需要做集合或字典键时用 SeenJobsIndex.record_id(record)
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return f"JobRecord({self.to_dict()!r})"
+    
+    @staticmethod
+    def as_dict(job) -> Dict:
+        return job.to_dict() if isinstance(job, JobRecord) else job
+    
+    @classmethod
+    def to_frame(cls, records: List["JobRecord"]):
+        """转成 DataFrame，类别字段用 category 类型"""
+        import pandas as pd
+        columns = records[0].keys() if records else list(cls.COLUMNS)
+        df = pd.DataFrame.from_records([record.row(columns) for record in records], columns=columns)
+        for column in columns:
+            if cls.ALL_COLUMNS[column] in cls.CATEGORICAL:
+                df[column] = df[column].astype("category")
+        return df
+    
+    @classmethod
+    def arrow_schema(cls, columns: List[str]):
+        import pyarrow as pa
+        types = {"float": pa.float64(), "int": pa.int64()}
+        fields = []
+        for column in columns:
+            attr = cls.ALL_COLUMNS[column]
+            if attr in cls.NUMERIC:
+                fields.append(pa.field(column, types[cls.NUMERIC[attr]]))
+            elif attr in cls.CATEGORICAL:
+                fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+            else:
+                fields.append(pa.field(column, pa.string()))
+        return pa.schema(fields)
+    
+    @classmethod
+    def to_arrow(cls, records: List["JobRecord"], schema=None):
+        """按列构造 Arrow 表（类别字段字典编码）"""
+        import pyarrow as pa
+        schema = schema or cls.arrow_schema(records[0].keys())
+        data = {
+            column: [getattr(record, cls.ALL_COLUMNS[column]) for record in records]
+            for column in schema.names
+        }
+        return pa.Table.from_pydict(data, schema=schema)
+
+
 # parser.py - 数据解析器
 class JobParser:
     """职位信息解析器"""
     
     @staticmethod
-    def safe_get_text(element, selectors: List[str], default: str = "") -> str:
-        """安全获取文本（尝试多个选择器）"""
-        for selector in selectors:
-            try:
-                elem = element.query_selector(selector)
-                if elem:
-                    text = elem.inner_text().strip()
-                    if text:
-                        return Utils.clean_text(text)
-            except Exception as e:
-                continue
-        return default
+    def safe_get_text(element, selectors: List[str], default: str = "", field: str = None) -> str:
+        """安全获取文本（尝试多个选择器，field 非空时记录命中情况和耗时）"""
+        with Metrics.timer("selector_lookup", field=field or "other"):
+            for selector in selectors:
+                try:
+                    elem = element.query_selector(selector)
+                    if elem:
+                        text = elem.inner_text().strip()
+                        if text:
+                            if field:
+                                SelectorCache.report(field, selector, True)
+                            return Utils.clean_text(text)
+                except Exception as e:
+                    pass
+                if field:
+                    SelectorCache.report(field, selector, False)
+            return default
     
     @staticmethod
-    def safe_get_attribute(element, selectors: List[str], attr: str, default: str = "") -> str:
+    def safe_get_attribute(element, selectors: List[str], attr: str, default: str = "", field: str = None) -> str:
         """安全获取属性"""
-        for selector in selectors:
-            try:
-                elem = element.query_selector(selector)
-                if elem:
-                    value = elem.get_attribute(attr)
-                    if value:
-                        return value
-            except:
-                continue
-        return default
+        with Metrics.timer("selector_lookup", field=field or "other"):
+            for selector in selectors:
+                try:
+                    elem = element.query_selector(selector)
+                    if elem:
+                        value = elem.get_attribute(attr)
+                        if value:
+                            if field:
+                                SelectorCache.report(field, selector, True)
+                            return value
+                except:
+                    pass
+                if field:
+                    SelectorCache.report(field, selector, False)
+            return default
     
     @classmethod
-    def parse_job_card(cls, card, debug=False) -> Optional[Dict]:
+    def get_field(cls, card, field: str, default: str = "") -> str:
+        """按缓存顺序获取字段文本"""
+        return cls.safe_get_text(card, SelectorCache.candidates(field), default, field=field)
+    
+    @classmethod
+    def parse_job_card(cls, card, debug=False, crawl_time: str = None, base_url: str = None) -> Optional[JobRecord]:
         """解析单个职位卡片"""
         try:
             # 调试模式：打印卡片HTML
             if debug:
                 logger.debug(f"Card HTML: {card.inner_html()[:500]}")
             
-            # 基础信息
-            title = cls.safe_get_text(card, Selectors.JOB_TITLE, "未知职位")
-            link = cls.safe_get_attribute(card, Selectors.JOB_LINK, "href", "")
-            if link and not link.startswith("http"):
-                link = f"https://www.zhipin.com{link}"
-            
-            company = cls.safe_get_text(card, Selectors.COMPANY_NAME, "未知公司")
-            salary = cls.safe_get_text(card, Selectors.SALARY, "面议")
-            
-            # 如果没抓到薪资，尝试从整个卡片文本中提取
-            if salary == "面议" or not salary:
-                card_text = card.inner_text()
-                # 尝试匹配薪资模式
-                salary_match = re.search(r'(\d+[-~]\d+K|\d+K[-~]\d+K|\d+[-~]\d+万)', card_text)
-                if salary_match:
-                    salary = salary_match.group(1)
-            
-            # 标签信息
-            experience = cls.safe_get_text(card, Selectors.EXPERIENCE)
-            education = cls.safe_get_text(card, Selectors.EDUCATION)
-            location = cls.safe_get_text(card, Selectors.LOCATION)
-            
-            # 福利待遇
-            welfare = cls.safe_get_text(card, Selectors.WELFARE)
-            
-            # 公司信息
-            company_info = cls.safe_get_text(card, Selectors.COMPANY_INFO)
-            
-            # 解析薪资
-            salary_parsed = Utils.parse_salary(salary)
-            
-            job_data = {
-                "职位名称": title,
-                "公司名称": company,
-                "薪资": salary,
-                "薪资最低": salary_parsed.get("min", 0),
-                "薪资最高": salary_parsed.get("max", 0),
-                "薪资平均": salary_parsed.get("avg", 0),
-                "经验要求": experience,
-                "学历要求": education,
-                "工作地点": location,
-                "福利待遇": welfare,
-                "公司信息": company_info,
-                "职位链接": link,
-                "抓取时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            raw = {
+                # 基础信息
+                "title": cls.get_field(card, "JOB_TITLE", "未知职位"),
+                "link": cls.safe_get_attribute(card, SelectorCache.candidates("JOB_LINK"), "href", "", field="JOB_LINK"),
+                "company": cls.get_field(card, "COMPANY_NAME", "未知公司"),
+                "salary": cls.get_field(card, "SALARY", "面议"),
+                # 标签信息
+                "experience": cls.get_field(card, "EXPERIENCE"),
+                "education": cls.get_field(card, "EDUCATION"),
+                "location": cls.get_field(card, "LOCATION"),
+                # 福利待遇
+                "welfare": cls.get_field(card, "WELFARE"),
+                # 公司信息
+                "company_info": cls.get_field(card, "COMPANY_INFO"),
             }
             
-            # 数据验证
-            if cls.validate_job_data(job_data):
-                return job_data
-            else:
-                logger.warning(f"数据验证失败: {title} | 薪资: {salary}")
-                if debug:
-                    logger.debug(f"Job data: {job_data}")
-                return None
+            # 如果没抓到薪资，需要整个卡片文本做兜底
+            if raw["salary"] == "面议" or not raw["salary"]:
+                raw["card_text"] = card.inner_text()
+            
+            return cls.build_job_data(raw, debug=debug, crawl_time=crawl_time, base_url=base_url)
                 
         except Exception as e:
             logger.error(f"解析职位卡片失败: {e}")
             return None
     
+    @classmethod
+    def build_job_data(cls, raw: Dict, debug=False, crawl_time: str = None,
+                       base_url: str = None) -> Optional[JobRecord]:
+        """由原始字段组装职位数据（逐卡解析、批量提取与离线解析共用）；相对链接拼接到 base_url（默认线上站点）"""
+        title = raw.get("title") or "未知职位"
+        company = raw.get("company") or "未知公司"
+        salary = raw.get("salary") or "面议"
+        
+        link = raw.get("link") or ""
+        if link and not link.startswith("http"):
+            link = f"{(base_url or SpiderConfig.base_url).rstrip('/')}/{link.lstrip('/')}"
+        
+        # 如果没抓到薪资，尝试从整个卡片文本中提取
+        if salary == "面议" and raw.get("card_text"):
+            # 尝试匹配薪资模式
+            salary_match = re.search(r'(\d+[-~]\d+K|\d+K[-~]\d+K|\d+[-~]\d+万)', raw["card_text"])
+            if salary_match:
+                salary = salary_match.group(1)
+        
+        # 薪资数值列在整页组装完成后由 SalaryNormalizer.apply 批量填充
+        job_data = JobRecord(
+            title=title,
+            company=company,
+            salary=salary,
+            experience=raw.get("experience", ""),
+            education=raw.get("education", ""),
+            location=raw.get("location", ""),
+            welfare=raw.get("welfare", ""),
+            company_info=raw.get("company_info", ""),
+            link=link,
+            # 调用方应传入整页共用的抓取时间
+            crawl_time=crawl_time or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        
+        # 数据验证
+        if cls.validate_job_data(job_data):
+            return job_data
+        else:
+            Metrics.inc("validation_failures")
+            logger.warning(f"数据验证失败: {title} | 薪资: {salary}")
+            if debug:
+                logger.debug(f"Job data: {job_data}")
+            return None
+    
     @staticmethod
     def validate_job_data(job: Dict) -> bool:
         """验证职位数据完整性"""
@@ -366,318 +1095,4579 @@ class JobParser:
         return True
 
 
-# spider.py - 主爬虫类
-from playwright.sync_api import sync_playwright, Page, Browser
-from typing import List, Dict
-
-class BossSpider:
-    """Boss 直聘爬虫主类"""
+# extractor.py - 批量提取器
+class BatchExtractor:
+    """在页面内一次性解析所有职位卡片（一次 evaluate 代替逐字段 query_selector）"""
     
-    def __init__(self, config: SpiderConfig = None):
-        self.config = config or SpiderConfig()
-        self.jobs: List[Dict] = []
-        self.browser: Optional[Browser] = None
-        self.page: Optional[Page] = None
-        self.stats = {
-            "total_crawled": 0,
-            "total_valid": 0,
-            "total_failed": 0,
-            "start_time": None,
-            "end_time": None
+    # 字段 -> (选择器列表名, 取值方式, 属性名)
+    CARD_FIELDS = {
+        "title": ("JOB_TITLE", "text", None),
+        "link": ("JOB_LINK", "attr", "href"),
+        "company": ("COMPANY_NAME", "text", None),
+        "salary": ("SALARY", "text", None),
+        "experience": ("EXPERIENCE", "text", None),
+        "education": ("EDUCATION", "text", None),
+        "location": ("LOCATION", "text", None),
+        "welfare": ("WELFARE", "text", None),
+        "company_info": ("COMPANY_INFO", "text", None),
+    }
+    
+    # 与 JobParser.safe_get_text / safe_get_attribute 的回退逻辑保持一致
+    EXTRACT_JS = """
+        ({cardSelectors, fields, limit}) => {
+            const pick = (root, selectors, attr) => {
+                for (const sel of selectors) {
+                    let el = null;
+                    try { el = root.querySelector(sel); } catch (e) { continue; }
+                    if (!el) continue;
+                    const value = attr ? el.getAttribute(attr) : (el.innerText || '').trim();
+                    if (value) return [value, sel];
+                }
+                return [null, null];
+            };
+            let cards = [], used = null;
+            for (const sel of cardSelectors) {
+                try { cards = Array.from(document.querySelectorAll(sel)); } catch (e) { continue; }
+                if (cards.length) { used = sel; break; }
+            }
+            const rows = cards.slice(0, limit).map(card => {
+                const row = {_hits: {}};
+                for (const [name, spec] of Object.entries(fields)) {
+                    [row[name], row._hits[name]] = pick(card, spec.selectors, spec.attr);
+                }
+                if (!row.salary || row.salary.replace(/\\s+/g, ' ').trim() === '面议') {
+                    row.card_text = card.innerText;
+                }
+                return row;
+            });
+            return {selector: used, total: cards.length, cards: rows};
         }
+    """
+    
+    # 与逐卡解析的默认值一致
+    DEFAULTS = {"title": "未知职位", "company": "未知公司", "salary": "面议"}
+    
+    @classmethod
+    def build_payload(cls, limit: int) -> Dict:
+        """把 Selectors 表打包成一次 evaluate 的参数"""
+        fields = {}
+        for name, (attr_name, mode, attr) in cls.CARD_FIELDS.items():
+            fields[name] = {
+                "selectors": SelectorCache.candidates(attr_name),
+                "attr": attr if mode == "attr" else None,
+            }
+        return {"cardSelectors": SelectorCache.candidates("JOB_CARD"), "fields": fields, "limit": limit}
+    
+    @classmethod
+    def report_hits(cls, payload: Dict, result: Dict):
+        """把页面内的命中结果记入选择器缓存和指标"""
+        if not SelectorCache.active and not Metrics.active:
+            return
+        cls.report_winner("JOB_CARD", payload["cardSelectors"], result["selector"])
+        for row in result["cards"]:
+            for name, winner in row.get("_hits", {}).items():
+                cls.report_winner(cls.CARD_FIELDS[name][0], payload["fields"][name]["selectors"], winner)
+    
+    @staticmethod
+    def report_winner(field: str, tried: List[str], winner: Optional[str]):
+        """命中选择器之前尝试过的都算未命中"""
+        for selector in tried:
+            SelectorCache.report(field, selector, selector == winner)
+            if selector == winner:
+                break
+    
+    @classmethod
+    def extract(cls, page, limit: int) -> Dict:
+        """
+        一次往返提取当前页所有卡片的原始字段
+        返回 {"selector": 命中的卡片选择器, "total": 卡片总数, "cards": [原始字段 dict]}
+        """
+        payload = cls.build_payload(limit)
+        result = page.evaluate(cls.EXTRACT_JS, payload)
+        cls.report_hits(payload, result)
+        for row in result["cards"]:
+            cls.normalize_row(row)
+        return result
+    
+    @classmethod
+    async def extract_async(cls, page, limit: int) -> Dict:
+        """extract 的异步版本（playwright.async_api 页面）"""
+        payload = cls.build_payload(limit)
+        result = await page.evaluate(cls.EXTRACT_JS, payload)
+        cls.report_hits(payload, result)
+        for row in result["cards"]:
+            cls.normalize_row(row)
+        return result
+    
+    @classmethod
+    def normalize_row(cls, row: Dict) -> Dict:
+        """清理文本字段并补默认值"""
+        row.pop("_hits", None)
+        for name, (_, mode, _) in cls.CARD_FIELDS.items():
+            value = row.get(name)
+            if value and mode == "text":
+                value = Utils.clean_text(value)
+            row[name] = value or cls.DEFAULTS.get(name, "")
+        return row
+
+
+# capture.py - 接口数据捕获
+class ApiCapture:
+    """监听搜索接口的 JSON 响应，直接解码职位列表（不经过 DOM）"""
+    
+    URL_PATTERNS = ["/wapi/zpgeek/search/joblist.json"]
+    
+    def __init__(self):
+        self._responses = []
+        self.total_count: Optional[int] = None
+        self.has_more: Optional[bool] = None
+    
+    def attach(self, page):
+        """在页面上注册响应监听（同步/异步页面通用）"""
+        page.on("response", self.on_response)
+    
+    def on_response(self, response):
+        # 只记录响应对象，JSON 在 drain 时再读取，避免在事件回调里发起往返
+        if response.ok and any(pattern in response.url for pattern in self.URL_PATTERNS):
+            self._responses.append(response)
+    
+    def reset(self):
+        """开始一次新的导航前清空缓冲和分页状态，之前的响应（失败的导航、上一个关键词）不会算到新页面上"""
+        self._responses = []
+        self.total_count = None
+        self.has_more = None
+    
+    def drain(self) -> List[Dict]:
+        """取出目前为止捕获到的所有职位（原始字段），并清空缓冲"""
+        responses, self._responses = self._responses, []
+        rows = []
+        for response in responses:
+            try:
+                rows.extend(self.decode(response.json()))
+            except Exception as e:
+                logger.warning(f"解析接口响应失败: {response.url} - {e}")
+        return rows
+    
+    async def drain_async(self) -> List[Dict]:
+        """drain 的异步版本"""
+        responses, self._responses = self._responses, []
+        rows = []
+        for response in responses:
+            try:
+                rows.extend(self.decode(await response.json()))
+            except Exception as e:
+                logger.warning(f"解析接口响应失败: {response.url} - {e}")
+        return rows
+    
+    def decode(self, payload: Dict) -> List[Dict]:
+        """把 joblist.json 转成与 BatchExtractor 相同的原始字段"""
+        if payload.get("code") != 0:
+            logger.warning(f"接口返回异常: code={payload.get('code')} {payload.get('message', '')}")
+            return []
+        data = payload.get("zpData") or {}
+        self.total_count = data.get("totalCount", self.total_count)
+        self.has_more = data.get("hasMore", self.has_more)
+        return [self.to_raw(item) for item in data.get("jobList") or []]
+    
+    @staticmethod
+    def to_raw(item: Dict) -> Dict:
+        """单条职位 JSON -> 原始字段"""
+        def join(values, sep):
+            return sep.join(str(v) for v in values if v)
+        
+        job_id = item.get("encryptJobId")
+        row = {
+            "title": item.get("jobName"),
+            "link": f"/job_detail/{job_id}.html" if job_id else "",
+            "company": item.get("brandName"),
+            "salary": item.get("salaryDesc"),
+            "experience": item.get("jobExperience"),
+            "education": item.get("jobDegree"),
+            "location": join([item.get("cityName"), item.get("areaDistrict"), item.get("businessDistrict")], "·"),
+            "welfare": join(item.get("welfareList") or [], "，"),
+            "company_info": join([item.get("brandIndustry"), item.get("brandStageName"), item.get("brandScaleName")], " "),
+        }
+        return BatchExtractor.normalize_row(row)
+
+
+# network.py - 资源拦截
+class ResourcePolicy:
+    """
+    按资源类型和 URL 规则拦截请求，并统计拦截/放行的请求数和放行响应的字节数
+    字节数取自响应头 content-length（不读取响应体），没有该头的响应（分块传输等）只计数；
+    被拦截的请求从未发出，没有字节数可统计，只记请求数
+    """
+    
+    def __init__(self, config: SpiderConfig):
+        self.block_types = set(config.block_resource_types)
+        self.block_pattern = self.compile(config.block_url_patterns)
+        self.allow_pattern = self.compile(config.allow_url_patterns)
+        self.stats = {
+            "allowed_requests": 0,
+            "blocked_requests": 0,
+            "blocked_by_type": {},
+            "allowed_bytes": 0,
+            "unsized_responses": 0,  # 没有 content-length 的响应
+        }
+    
+    @staticmethod
+    def compile(patterns: List[str]):
+        """把 URL 子串列表编译成一个正则，空列表返回 None"""
+        if not patterns:
+            return None
+        return re.compile("|".join(re.escape(p) for p in patterns))
+    
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if self.allow_pattern and self.allow_pattern.search(url):
+            return False
+        if resource_type in self.block_types:
+            return True
+        return bool(self.block_pattern and self.block_pattern.search(url))
+    
+    def record(self, resource_type: str, blocked: bool):
+        if blocked:
+            self.stats["blocked_requests"] += 1
+            by_type = self.stats["blocked_by_type"]
+            by_type[resource_type] = by_type.get(resource_type, 0) + 1
+        else:
+            self.stats["allowed_requests"] += 1
+    
+    def on_response(self, response):
+        """按响应头累计放行流量（同步、异步 API 的 response.headers 都是普通字典）"""
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.stats["allowed_bytes"] += int(length)
+        else:
+            self.stats["unsized_responses"] += 1
+    
+    def handle(self, route):
+        request = route.request
+        blocked = self.should_block(request.resource_type, request.url)
+        self.record(request.resource_type, blocked)
+        if blocked:
+            route.abort()
+        else:
+            route.continue_()
+    
+    async def handle_async(self, route):
+        request = route.request
+        blocked = self.should_block(request.resource_type, request.url)
+        self.record(request.resource_type, blocked)
+        if blocked:
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    def attach(self, context):
+        """应用到同步上下文"""
+        context.route("**/*", self.handle)
+        context.on("response", self.on_response)
+    
+    async def attach_async(self, context):
+        """应用到异步上下文"""
+        await context.route("**/*", self.handle_async)
+        context.on("response", self.on_response)
+    
+    @staticmethod
+    def merge(stats_list: List[Dict]) -> Dict:
+        """合并多个上下文的统计"""
+        merged = {
+            "allowed_requests": 0, "blocked_requests": 0, "blocked_by_type": {}, "allowed_bytes": 0, "unsized_responses": 0,
+        }
+        for stats in stats_list:
+            for key in ("allowed_requests", "blocked_requests", "allowed_bytes", "unsized_responses"):
+                merged[key] += stats[key]
+            for resource_type, count in stats["blocked_by_type"].items():
+                merged["blocked_by_type"][resource_type] = merged["blocked_by_type"].get(resource_type, 0) + count
+        return merged
+
+
+# pacing.py - 节奏控制
+class Pacer:
+    """
+    节奏控制：
+    1. 等待具体的就绪信号（卡片出现/变化、列表容器被替换、网络空闲），不再固定睡眠
+    2. 根据观察到的信号调整页间延迟：响应慢或遇到拦截页时退避，顺利时逐步加速
+    """
+    
+    # 返回当前卡片签名；previous 非空时，只有签名变化或旧列表被替换才返回
+    SIGNATURE_JS = """
+        ({selectors, previous}) => {
+            for (const sel of selectors) {
+                let cards;
+                try { cards = document.querySelectorAll(sel); } catch (e) { continue; }
+                if (!cards.length) continue;
+                const first = cards[0];
+                const link = first.querySelector('a');
+                const sig = cards.length + '|' + (link ? link.getAttribute('href') : first.textContent.slice(0, 80));
+                const replaced = !document.querySelector('[data-pacer-mark]');
+                if (previous && sig === previous && !replaced) return false;
+                first.setAttribute('data-pacer-mark', '1');
+                return sig;
+            }
+            return false;
+        }
+    """
+    
+    BLOCK_URL_KEYWORDS = ["security-check", "verify", "captcha", "passport/zp/verify"]
+    
+    def __init__(self, config: SpiderConfig):
+        self.config = config
+        self.factor = 1.0
+        self.stats = {
+            "ready_waits": 0,
+            "ready_seconds": 0.0,
+            "timeouts": 0,
+            "slow_responses": 0,
+            "block_pages": 0,
+            "sleep_seconds": 0.0,
+            "factor": self.factor,
+        }
+    
+    def observe(self, elapsed: float, blocked: bool = False):
+        """根据一次页面加载的结果调整延迟倍数"""
+        if blocked:
+            self.stats["block_pages"] += 1
+            self.factor = min(self.factor * 2, self.config.pacing_max_factor)
+            logger.warning(f"检测到验证/拦截页，页间延迟倍数提高到 {self.factor:.2f}")
+        elif elapsed > self.config.slow_response_seconds:
+            self.stats["slow_responses"] += 1
+            self.factor = min(self.factor * 1.5, self.config.pacing_max_factor)
+        else:
+            self.factor = max(self.factor * 0.9, self.config.pacing_min_factor)
+        self.stats["factor"] = round(self.factor, 3)
+    
+    def next_delay(self) -> float:
+        """下一次页间延迟（秒）"""
+        delay = random.uniform(self.config.min_delay, self.config.max_delay) * self.factor * Utils.sleep_scale
+        self.stats["sleep_seconds"] += delay
+        Metrics.observe("sleep", delay, kind="pacing")
+        return delay
+    
+    def sleep(self):
+        time.sleep(self.next_delay())
+    
+    @classmethod
+    def is_block_url(cls, url: str) -> bool:
+        return any(keyword in url for keyword in cls.BLOCK_URL_KEYWORDS)
+    
+    def card_signature(self, page) -> Optional[str]:
+        """当前卡片签名（同时标记当前列表，用于判断是否被替换）"""
+        try:
+            return page.evaluate(self.SIGNATURE_JS, {"selectors": Selectors.JOB_CARD, "previous": None}) or None
+        except Exception:
+            return None
+    
+    @classmethod
+    def is_block_page(cls, page) -> bool:
+        if cls.is_block_url(page.url):
+            return True
+        try:
+            return page.query_selector(", ".join(Selectors.BLOCK_PAGE)) is not None
+        except Exception:
+            return False
+    
+    def wait_ready(self, page, previous: str = None, timeout: int = 15000) -> bool:
+        """
+        等待卡片出现（previous 非空时等待卡片变化），再等网络短暂空闲
+        返回是否就绪，并把耗时和拦截情况反馈给延迟调整
+        """
+        start = time.monotonic()
+        ready = True
+        try:
+            page.wait_for_function(
+                self.SIGNATURE_JS, arg={"selectors": Selectors.JOB_CARD, "previous": previous}, timeout=timeout
+            )
+            try:
+                page.wait_for_load_state("networkidle", timeout=3000)
+            except Exception:
+                pass
+        except Exception:
+            ready = False
+            self.stats["timeouts"] += 1
+        elapsed = time.monotonic() - start
+        self.stats["ready_waits"] += 1
+        self.stats["ready_seconds"] += elapsed
+        self.observe(elapsed, blocked=self.is_block_page(page))
+        Metrics.observe("wait", elapsed, ready=ready)
+        return ready
+    
+    async def card_signature_async(self, page) -> Optional[str]:
+        try:
+            return await page.evaluate(self.SIGNATURE_JS, {"selectors": Selectors.JOB_CARD, "previous": None}) or None
+        except Exception:
+            return None
+    
+    @classmethod
+    async def is_block_page_async(cls, page) -> bool:
+        if cls.is_block_url(page.url):
+            return True
+        try:
+            return await page.query_selector(", ".join(Selectors.BLOCK_PAGE)) is not None
+        except Exception:
+            return False
+    
+    async def wait_ready_async(self, page, previous: str = None, timeout: int = 15000) -> bool:
+        """wait_ready 的异步版本"""
+        start = time.monotonic()
+        ready = True
+        try:
+            await page.wait_for_function(
+                self.SIGNATURE_JS, arg={"selectors": Selectors.JOB_CARD, "previous": previous}, timeout=timeout
+            )
+            try:
+                await page.wait_for_load_state("networkidle", timeout=3000)
+            except Exception:
+                pass
+        except Exception:
+            ready = False
+            self.stats["timeouts"] += 1
+        elapsed = time.monotonic() - start
+        self.stats["ready_waits"] += 1
+        self.stats["ready_seconds"] += elapsed
+        self.observe(elapsed, blocked=await self.is_block_page_async(page))
+        Metrics.observe("wait", elapsed, ready=ready)
+        return ready
+
+
+# resilience.py - 重试与熔断
+class BlockedError(Exception):
+    """打开的页面是验证/拦截页"""
+
+
+@dataclass
+class RetryPolicy:
+    """单个操作的重试策略：最多尝试 attempts 次，第 n 次失败后等待 base_delay * 2^(n-1)（带抖动，不超过 max_delay）"""
+    attempts: int
+    base_delay: float
+    max_delay: float
+    jitter: float = 0.3
+    breaker: bool = True  # 失败是否计入熔断（解析失败与站点拦截无关）
+    
+    def delay(self, attempt: int) -> float:
+        delay = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter) * Utils.sleep_scale
+
+
+class CircuitBreaker:
+    """
+    连续失败 threshold 次后熔断 cooldown 秒，熔断期间所有请求等待（池模式下各 worker 共用）
+    冷却结束后放行一次试探：成功则恢复，失败则立即再次熔断且冷却时间翻倍
+    """
+    
+    def __init__(self, threshold: int, cooldown: float, max_factor: int = 8):
+        self.threshold = max(threshold, 1)
+        self.cooldown = cooldown
+        self.max_factor = max_factor
+        self.failures = 0
+        self.streak = 0  # 连续熔断次数
+        self.open_until = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, ok: bool) -> bool:
+        """记录一次结果，返回是否因此熔断"""
+        with self._lock:
+            if ok:
+                self.failures = 0
+                self.streak = 0
+                return False
+            self.failures += 1
+            if self.failures < self.threshold:
+                return False
+            self.streak += 1
+            cooldown = self.cooldown * min(2 ** (self.streak - 1), self.max_factor) * Utils.sleep_scale
+            self.open_until = time.monotonic() + cooldown
+            logger.warning(f"连续失败 {self.failures} 次，熔断 {cooldown:.0f} 秒")
+            return True
+    
+    def remaining(self) -> float:
+        return max(self.open_until - time.monotonic(), 0.0)
+    
+    def half_open(self):
+        """已换新上下文，不必等冷却结束，直接试探"""
+        with self._lock:
+            self.open_until = 0.0
+
+
+class Resilience:
+    """
+    按操作重试（指数退避 + 抖动），把验证/拦截页当作失败，连续失败时熔断：
+    暂停等待，或调用 rotate 换一个新的上下文。统计失败、退避和熔断浪费的时间
+    """
+    
+    def __init__(self, config: SpiderConfig, breaker: CircuitBreaker = None, rotate=None):
+        self.config = config
+        attempts = max(config.max_retries, 0) + 1
+        self.policies = {
+            "navigation": RetryPolicy(attempts, config.retry_base_delay, config.retry_max_delay),
+            "search": RetryPolicy(attempts, config.retry_base_delay, config.retry_max_delay),
+            "parse": RetryPolicy(2, 0.5, 2.0, breaker=False),
+        }
+        self.breaker = breaker or CircuitBreaker(config.breaker_threshold, config.breaker_cooldown)
+        self.rotate = rotate if config.breaker_action == "rotate" else None
+        self._rotating = False
+        self.stats = {
+            "failures": 0, "blocks": 0, "retries": 0, "gave_up": 0, "trips": 0, "rotations": 0,
+            "lost_seconds": 0.0,
+        }
+    
+    def lose(self, seconds: float, kind: str = None):
+        """记入失败浪费的时间（kind 非空时同时作为休眠计入指标）"""
+        self.stats["lost_seconds"] += seconds
+        if kind:
+            Metrics.observe("sleep", seconds, kind=kind)
+    
+    def breaker_wait(self, policy: RetryPolicy) -> float:
+        wait = self.breaker.remaining() if policy.breaker else 0.0
+        if wait > 0:
+            logger.info(f"熔断中，等待 {wait:.0f} 秒")
+            self.lose(wait, "breaker")
+        return wait
+    
+    def failed(self, operation: str, policy: RetryPolicy, error: Exception, elapsed: float):
+        """记录一次失败，必要时熔断（rotate 模式下换上下文）"""
+        blocked = isinstance(error, BlockedError)
+        self.stats["failures"] += 1
+        self.stats["blocks"] += int(blocked)
+        self.lose(elapsed)
+        Metrics.inc("operation_failures", operation=operation, blocked=blocked)
+        if not (policy.breaker and self.breaker.record(False)):
+            return
+        self.stats["trips"] += 1
+        Metrics.inc("breaker_trips")
+        # 换上下文时的预热也走重试，避免在其中再次触发更换
+        if self.rotate and not self._rotating:
+            self._rotating = True
+            try:
+                self.rotate()
+                self.stats["rotations"] += 1
+                self.breaker.half_open()
+            except Exception as e:
+                logger.error(f"更换上下文失败，改为暂停: {e}")
+            finally:
+                self._rotating = False
+    
+    def backoff(self, operation: str, policy: RetryPolicy, attempt: int, error: Exception) -> float:
+        """用尽次数时返回 -1，否则返回退避秒数"""
+        if attempt == policy.attempts:
+            self.stats["gave_up"] += 1
+            logger.error(f"{operation} 重试 {policy.attempts - 1} 次后仍失败: {error}")
+            return -1
+        delay = policy.delay(attempt)
+        logger.warning(f"{operation} 失败 ({attempt}/{policy.attempts}): {error}，{delay:.1f} 秒后重试")
+        self.stats["retries"] += 1
+        Metrics.inc("retries", operation=operation)
+        self.lose(delay, "backoff")
+        return delay
+    
+    def run(self, operation: str, fn, *args, **kwargs):
+        """执行 fn，失败时按 operation 的策略重试；用尽次数后抛出最后一次的异常"""
+        policy = self.policies[operation]
+        for attempt in range(1, policy.attempts + 1):
+            wait = self.breaker_wait(policy)
+            if wait > 0:
+                time.sleep(wait)
+            start = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self.failed(operation, policy, e, time.monotonic() - start)
+                delay = self.backoff(operation, policy, attempt, e)
+                if delay < 0:
+                    raise
+                time.sleep(delay)
+                continue
+            if policy.breaker:
+                self.breaker.record(True)
+            return result
+    
+    async def run_async(self, operation: str, fn, *args, **kwargs):
+        """run 的异步版本（fn 为协程函数）"""
+        policy = self.policies[operation]
+        for attempt in range(1, policy.attempts + 1):
+            wait = self.breaker_wait(policy)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            start = time.monotonic()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                self.failed(operation, policy, e, time.monotonic() - start)
+                delay = self.backoff(operation, policy, attempt, e)
+                if delay < 0:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            if policy.breaker:
+                self.breaker.record(True)
+            return result
+
+
+# snapshots.py - 页面快照存储
+import mmap
+import struct
+import zlib
+import hashlib
+from collections import namedtuple
+
+
+SnapshotRecord = namedtuple("SnapshotRecord", "index time keyword page offset length raw_length codec digest")
+
+
+class SnapshotStore:
+    """
+    页面快照存储（目录下三个只追加的文件）：
+    - pages.pack: 压缩后的页面内容（zstd，未安装 zstandard 时用 zlib），内容相同的页面只存一份
+    - pages.idx: 定长索引记录（时间、页码、关键词编号、偏移、长度、SHA-256），mmap 读取，第 i 条直接按偏移定位
+    - keywords.txt: 关键词编号 -> 关键词，每行一个
+    先写内容再追加索引，索引记录是提交点；打开时截掉不完整的尾部记录
+    """
+    
+    RECORD = struct.Struct("<dIIQIIB3x32s")
+    CODEC_ZLIB, CODEC_ZSTD = 1, 2
+    
+    def __init__(self, directory: str, level: int = 6, read_only: bool = False):
+        self.directory = directory
+        self.level = level
+        self.read_only = read_only
+        if not read_only:
+            os.makedirs(directory, exist_ok=True)
+        self.pack_path = os.path.join(directory, "pages.pack")
+        self.index_path = os.path.join(directory, "pages.idx")
+        self.keywords_path = os.path.join(directory, "keywords.txt")
+        self._lock = threading.Lock()
+        
+        try:
+            import zstandard
+            self._zstd = zstandard.ZstdCompressor(level=level)
+            self.codec = self.CODEC_ZSTD
+        except ImportError:
+            self._zstd = None
+            self.codec = self.CODEC_ZLIB
+        
+        # 丢弃崩溃时写了一半的索引记录
+        if os.path.exists(self.index_path) and not read_only:
+            size = os.path.getsize(self.index_path)
+            if size % self.RECORD.size:
+                with open(self.index_path, "r+b") as f:
+                    f.truncate(size - size % self.RECORD.size)
+        self.pack = None if read_only else open(self.pack_path, "ab")
+        self.index = open(self.index_path, "rb" if read_only else "a+b")
+        self._mmap = None
+        self._mapped = 0
+        
+        self.keywords: List[str] = []
+        if os.path.exists(self.keywords_path):
+            with open(self.keywords_path, "r", encoding="utf-8") as f:
+                self.keywords = f.read().splitlines()
+        self.keyword_ids = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self.blobs: Dict[str, SnapshotRecord] = {}  # 内容哈希 -> 首次写入的记录
+        self.by_keyword: Dict[str, List[int]] = {}  # 关键词 -> 记录编号（按写入顺序）
+        self._indexed = 0  # 已加入内存索引的记录数
+        self.refresh()
+        self.stats = {"pages": 0, "deduplicated": 0, "raw_bytes": 0, "stored_bytes": 0}
+    
+    def __len__(self) -> int:
+        return os.path.getsize(self.index_path) // self.RECORD.size
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.record(index)
+    
+    def refresh(self):
+        """把尚未加入内存索引的记录（打开时已有的，或只读打开后写入进程新追加的）加入 blobs / by_keyword"""
+        for index in range(self._indexed, len(self)):
+            self.index_record(self.record(index))
+    
+    def index_record(self, record: SnapshotRecord):
+        self.blobs.setdefault(record.digest, record)
+        self.by_keyword.setdefault(record.keyword, []).append(record.index)
+        self._indexed = record.index + 1
+    
+    def remap(self):
+        """索引文件变长后重新映射（只在读到映射范围之外的记录时调用）"""
+        count = len(self)
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if count:
+            self._mmap = mmap.mmap(self.index.fileno(), count * self.RECORD.size, access=mmap.ACCESS_READ)
+        self._mapped = count
+    
+    def record(self, index: int) -> SnapshotRecord:
+        """第 index 条索引记录（O(1)，直接按偏移读 mmap）"""
+        if index >= self._mapped:
+            self.remap()
+        if not 0 <= index < self._mapped:
+            raise IndexError(index)
+        ts, page, keyword_id, offset, length, raw_length, codec, digest = self.RECORD.unpack_from(
+            self._mmap, index * self.RECORD.size
+        )
+        if keyword_id >= len(self.keywords):
+            # 只读打开后写入进程新增了关键词
+            with open(self.keywords_path, "r", encoding="utf-8") as f:
+                self.keywords = f.read().splitlines()
+        return SnapshotRecord(index, ts, self.keywords[keyword_id], page, offset, length, raw_length, codec, digest.hex())
+    
+    def keyword_id(self, keyword: str) -> int:
+        keyword = (keyword or "").replace("\n", " ")
+        if keyword not in self.keyword_ids:
+            with open(self.keywords_path, "a", encoding="utf-8") as f:
+                f.write(keyword + "\n")
+            self.keyword_ids[keyword] = len(self.keywords)
+            self.keywords.append(keyword)
+        return self.keyword_ids[keyword]
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._zstd.compress(data) if self._zstd else zlib.compress(data, self.level)
+    
+    def put(self, html: str, keyword: str = "", page: int = 0, ts: float = None) -> str:
+        """保存一页，返回内容哈希；内容已存在时只追加索引记录"""
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            blob = self.blobs.get(digest)
+            if blob is None:
+                payload = self.compress(data)
+                offset = self.pack.tell()
+                self.pack.write(payload)
+                self.pack.flush()
+                length, codec = len(payload), self.codec
+                self.stats["stored_bytes"] += length
+            else:
+                offset, length, codec = blob.offset, blob.length, blob.codec
+                self.stats["deduplicated"] += 1
+            ts = ts or time.time()
+            keyword_id = self.keyword_id(keyword)
+            self.index.write(self.RECORD.pack(
+                ts, page, keyword_id, offset, length, len(data), codec, bytes.fromhex(digest)
+            ))
+            self.index.flush()
+            # 直接由写入的值构造记录，不必为刚追加的记录重新映射索引
+            self.index_record(SnapshotRecord(
+                self._indexed, ts, self.keywords[keyword_id], page, offset, length, len(data), codec, digest
+            ))
+            self.stats["pages"] += 1
+            self.stats["raw_bytes"] += len(data)
+        return digest
+    
+    def get(self, record: SnapshotRecord) -> str:
+        """读出一页源码"""
+        with open(self.pack_path, "rb") as f:
+            f.seek(record.offset)
+            payload = f.read(record.length)
+        if record.codec == self.CODEC_ZSTD:
+            import zstandard
+            data = zstandard.ZstdDecompressor().decompress(payload, max_output_size=record.raw_length)
+        else:
+            data = zlib.decompress(payload)
+        return data.decode("utf-8")
+    
+    def find(self, keyword: str = None, page: int = None, since: float = None, until: float = None) -> List[SnapshotRecord]:
+        """按关键词/页码/时间范围（time.time() 秒）筛选索引记录；给出关键词时只读该关键词的记录"""
+        self.refresh()
+        indexes = self.by_keyword.get(keyword, []) if keyword is not None else range(self._indexed)
+        return [
+            record for record in map(self.record, indexes)
+            if (page is None or record.page == page)
+            and (since is None or record.time >= since)
+            and (until is None or record.time < until)
+        ]
+    
+    @classmethod
+    def is_store(cls, path: str) -> bool:
+        return os.path.isfile(os.path.join(path, "pages.idx"))
+    
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self.pack:
+            self.pack.close()
+        self.index.close()
+
+
+# offline.py - 离线解析器
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+class OfflineParser:
+    """不启动浏览器，直接用 Selectors 解析保存下来的页面源码"""
+    
+    # 近似 innerText：块级元素前后断行，脚本样式不计入
+    BLOCK_TAGS = {
+        "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt",
+        "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "li",
+        "main", "nav", "ol", "p", "pre", "section", "table", "tr", "ul",
+    }
+    SKIP_TAGS = {"script", "style", "noscript", "template", "head"}
+    
+    # 预编译的选择器缓存（每个进程编译一次）
+    _compiled: Dict[str, object] = {}
+    
+    @classmethod
+    def compile(cls, selector: str):
+        """编译 CSS 选择器，无法编译时返回 None"""
+        if selector not in cls._compiled:
+            from lxml.cssselect import CSSSelector
+            try:
+                cls._compiled[selector] = CSSSelector(selector)
+            except Exception:
+                logger.warning(f"无法编译选择器: {selector}")
+                cls._compiled[selector] = None
+        return cls._compiled[selector]
+    
+    @classmethod
+    def query(cls, root, selector: str):
+        """等价于 root.querySelector(selector)：只查后代，返回文档顺序第一个"""
+        compiled = cls.compile(selector)
+        if compiled is None:
+            return None
+        for elem in compiled(root):
+            if elem is not root:
+                return elem
+        return None
+    
+    @classmethod
+    def query_all(cls, root, selector: str) -> list:
+        compiled = cls.compile(selector)
+        if compiled is None:
+            return []
+        return [elem for elem in compiled(root) if elem is not root]
+    
+    @classmethod
+    def inner_text(cls, elem) -> str:
+        """近似浏览器的 innerText"""
+        parts = []
+        
+        def walk(node):
+            tag = node.tag if isinstance(node.tag, str) else None
+            if tag is None or tag in cls.SKIP_TAGS:
+                return
+            if tag == "br":
+                parts.append("\n")
+                return
+            block = tag in cls.BLOCK_TAGS
+            if block:
+                parts.append("\n")
+            if node.text:
+                parts.append(node.text)
+            for child in node:
+                walk(child)
+                if child.tail:
+                    parts.append(child.tail)
+            if block:
+                parts.append("\n")
+        
+        walk(elem)
+        return "".join(parts).strip()
+    
+    @classmethod
+    def pick(cls, card, selectors: List[str], attr: str = None) -> Optional[str]:
+        """与 JobParser.safe_get_text / safe_get_attribute 相同的回退逻辑"""
+        for selector in selectors:
+            elem = cls.query(card, selector)
+            if elem is None:
+                continue
+            value = elem.get(attr) if attr else cls.inner_text(elem)
+            if value:
+                return value
+        return None
+    
+    @classmethod
+    def extract_cards(cls, html: str, limit: int = None) -> Dict:
+        """从页面源码提取卡片原始字段，返回结构与 BatchExtractor.extract 一致"""
+        import lxml.html
+        root = lxml.html.document_fromstring(html)
+        
+        cards, used = [], None
+        for selector in Selectors.JOB_CARD:
+            cards = cls.query_all(root, selector)
+            if cards:
+                used = selector
+                break
+        
+        rows = []
+        for card in cards[:limit]:
+            row = {}
+            for name, (attr_name, mode, attr) in BatchExtractor.CARD_FIELDS.items():
+                row[name] = cls.pick(card, getattr(Selectors, attr_name), attr if mode == "attr" else None)
+            if not row["salary"] or Utils.clean_text(row["salary"]) == "面议":
+                row["card_text"] = cls.inner_text(card)
+            rows.append(BatchExtractor.normalize_row(row))
+        return {"selector": used, "total": len(cards), "cards": rows}
+    
+    @staticmethod
+    def snapshot_time(path: str) -> str:
+        """从 page_<时间戳>.html 文件名取抓取时间，取不到则用修改时间"""
+        match = re.search(r'(\d{8}_\d{6})', os.path.basename(path))
+        if match:
+            ts = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+        else:
+            ts = datetime.fromtimestamp(os.path.getmtime(path))
+        return ts.strftime("%Y-%m-%d %H:%M:%S")
+    
+    @classmethod
+    def parse_file(cls, path: str, limit: int = None) -> List[Dict]:
+        """解析单个快照文件，返回通过验证的职位数据"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.parse_html(f.read(), cls.snapshot_time(path), limit)
+    
+    # 每个进程打开一次的快照存储（只读）
+    _stores: Dict[str, SnapshotStore] = {}
+    
+    @classmethod
+    def parse_snapshot(cls, item: tuple, limit: int = None) -> List[Dict]:
+        """解析快照存储中的一页，item 为 (存储目录, 索引号)"""
+        directory, index = item
+        if directory not in cls._stores:
+            cls._stores[directory] = SnapshotStore(directory, read_only=True)
+        store = cls._stores[directory]
+        record = store.record(index)
+        crawl_time = datetime.fromtimestamp(record.time).strftime("%Y-%m-%d %H:%M:%S")
+        return cls.parse_html(store.get(record), crawl_time, limit)
+    
+    @classmethod
+    def parse_html(cls, html: str, crawl_time: str, limit: int = None) -> List[Dict]:
+        extracted = cls.extract_cards(html, limit)
+        jobs = []
+        for raw in extracted["cards"]:
+            job_data = JobParser.build_job_data(raw, crawl_time=crawl_time)
+            if job_data:
+                jobs.append(job_data)
+        return SalaryNormalizer.apply(jobs)
+    
+    @staticmethod
+    def collect_files(source: str) -> List[str]:
+        """目录下所有 page_*.html（按文件名排序），或单个文件"""
+        if os.path.isfile(source):
+            return [source]
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.startswith("page_") and name.endswith(".html")
+        )
+    
+    @classmethod
+    def reparse(cls, source: str, config: SpiderConfig = None, workers: int = None) -> List[Dict]:
+        """
+        多进程重新解析快照目录，并按 config 的存储设置导出
+        选择器修复后用它从存档重新提取，无需重新爬取
+        """
+        config = config or SpiderConfig()
+        if SnapshotStore.is_store(source):
+            # 快照存储：内容相同的页面只解析一次
+            store = SnapshotStore(source, read_only=True)
+            files = [(source, record.index) for record in store.blobs.values()]
+            store.close()
+            parse = cls.parse_snapshot
+        else:
+            files = cls.collect_files(source)
+            parse = cls.parse_file
+        if not files:
+            logger.warning(f"没有找到页面快照: {source}")
+            return []
+        
+        logger.info(f"开始离线解析 {len(files)} 个页面快照...")
+        start = time.perf_counter()
+        jobs = []
+        if workers == 1 or len(files) == 1:
+            for item in files:
+                jobs.extend(parse(item))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunksize = max(1, len(files) // ((workers or os.cpu_count() or 1) * 4))
+                for page_jobs in executor.map(parse, files, chunksize=chunksize):
+                    jobs.extend(page_jobs)
+        logger.info(f"离线解析完成: {len(files)} 页, {len(jobs)} 条有效数据, 耗时 {time.perf_counter() - start:.1f} 秒")
+        
+        if jobs:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            if config.save_csv:
+                Utils.save_to_csv(jobs, f"{config.output_dir}/reparsed_jobs_{timestamp}.csv")
+            if config.save_json:
+                Utils.save_to_json(jobs, f"{config.output_dir}/reparsed_jobs_{timestamp}.json")
+        return jobs
+
+
+# seen_index.py - 已抓取职位索引
+import sqlite3
+
+
+class SeenJobsIndex:
+    """持久化的职位索引（SQLite），记录每个职位 ID 的首次/最近出现时间，用于增量抓取"""
+    
+    JOB_ID_PATTERN = re.compile(r'/job_detail/([^/?#]+?)\.html')
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_jobs (
+                job_id TEXT PRIMARY KEY,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                keyword TEXT,
+                times_seen INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+        self.conn.commit()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def job_id(cls, link: str) -> str:
+        """从职位链接取职位 ID，取不到时用整个链接"""
+        match = cls.JOB_ID_PATTERN.search(link or "")
+        return match.group(1) if match else (link or "")
+    
+    @classmethod
+    def record_id(cls, job) -> str:
+        """职位 ID；没有职位链接时用 职位名称|公司名称|工作地点 的内容哈希，避免无链接的职位共用空 ID"""
+        job_id = cls.job_id(job.get("职位链接"))
+        if job_id:
+            return job_id
+        content = "|".join(str(job.get(field) or "") for field in ("职位名称", "公司名称", "工作地点"))
+        return "h:" + hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+    
+    def split(self, jobs: List[Dict]) -> tuple:
+        """把一页数据分成 (新职位, 已知职位)；只查询不记录，输出落盘后再调用 mark"""
+        if not jobs:
+            return [], []
+        ids = [self.record_id(job) for job in jobs]
+        
+        with self._lock:
+            placeholders = ",".join("?" * len(ids))
+            known_ids = {
+                row[0] for row in self.conn.execute(
+                    f"SELECT job_id FROM seen_jobs WHERE job_id IN ({placeholders})", ids
+                )
+            }
+        
+        new, known, page_ids = [], [], set()
+        for job, job_id in zip(jobs, ids):
+            # 同一页内重复出现的也算已知
+            if job_id in known_ids or job_id in page_ids:
+                known.append(job)
+            else:
+                new.append(job)
+            page_ids.add(job_id)
+        return new, known
+    
+    def mark(self, jobs: List[Dict], keyword: str = ""):
+        """把职位记为已抓取（新职位写入后才调用，写入失败时下次仍会当作新职位）"""
+        if not jobs:
+            return
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self.conn.executemany(
+                """
+                INSERT INTO seen_jobs (job_id, first_seen, last_seen, keyword) VALUES (?, ?, ?, ?)
+                ON CONFLICT(job_id) DO UPDATE SET last_seen = excluded.last_seen, times_seen = times_seen + 1
+                """,
+                [(self.record_id(job), now, now, keyword) for job in jobs],
+            )
+            self.conn.commit()
+    
+    def close(self):
+        self.conn.close()
+
+
+# dedup.py - 近似重复检测
+import hashlib
+
+
+class NearDuplicateIndex:
+    """
+    近似重复检测：同一公司、同一城市下，标题二元组做 MinHash，按 BANDS 段建 LSH 倒排索引，
+    每条记录只和同段候选比较（不做两两比较）；候选再按标题相似度和薪资/地点/福利词重合度加权复核。
+    同一组用最早记录的职位 ID 作为组 ID，索引保存在 SQLite 中，跨运行保持组 ID 不变
+    """
+    
+    BANDS = 8
+    ROWS = 2  # 每段的 MinHash 个数；标题相似度 0.5 时约 90% 概率成为候选
+    PRIME = (1 << 61) - 1
+    TITLE_WEIGHT = 0.6  # 综合相似度 = 标题 Jaccard * 0.6 + 其余词 Jaccard * 0.4
+    STRIP_PATTERN = re.compile(r"[\s\(\)（）【】\[\]·,，/、|-]+")
+    
+    # 固定种子：跨运行的签名必须一致
+    _rng = random.Random(20240101)
+    PERMUTATIONS = list(zip(_rng.sample(range(1, PRIME), BANDS * ROWS), _rng.sample(range(PRIME), BANDS * ROWS)))
+    
+    def __init__(self, path: str, threshold: float = 0.6):
+        self.path = path
+        self.threshold = threshold
+        self.buckets: Dict[tuple, List[int]] = {}  # (段, 公司|城市, 该段 MinHash) -> 记录下标
+        self.entries: List[tuple] = []  # (组 ID, 标题二元组, 其余词)
+        self.clusters: Dict[str, str] = {}  # 职位 ID -> 组 ID
+        self.emitted_clusters: set = set()  # 本次运行已输出的组
+        self.stats = {"checked": 0, "matched": 0, "dropped": 0, "candidates": 0}
+        self._lock = threading.Lock()
+        
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS near_dups (
+                job_id TEXT PRIMARY KEY,
+                cluster_id TEXT NOT NULL,
+                block TEXT,
+                title TEXT,
+                terms TEXT,
+                signature TEXT,
+                first_seen TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+        for job_id, cluster_id, block, title, terms, signature in self.conn.execute(
+            "SELECT job_id, cluster_id, block, title, terms, signature FROM near_dups ORDER BY rowid"
+        ):
+            self.add(job_id, cluster_id, self.bigrams(title), frozenset(terms.split("\x1f")),
+                     self.band_keys(block, [int(value) for value in signature.split(",")]))
+    
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        return cls.STRIP_PATTERN.sub("", (text or "").lower())
+    
+    @classmethod
+    def block(cls, job) -> str:
+        """只在同一公司、同一城市内找重复"""
+        city = (job.get("工作地点") or "").split("·")[0]
+        return f"{cls.normalize(job.get('公司名称'))}|{city}"
+    
+    @classmethod
+    def bigrams(cls, text: str) -> frozenset:
+        text = cls.normalize(text)
+        return frozenset(text[i:i + 2] for i in range(len(text) - 1)) or frozenset([text])
+    
+    @staticmethod
+    def terms(job) -> frozenset:
+        """薪资、地点、福利拆成词"""
+        words = {f"s:{(job.get('薪资') or '').replace(' ', '')}"}
+        words.update(f"l:{part}" for part in re.split(r"[·\s]+", job.get("工作地点") or "") if part)
+        words.update(f"w:{part}" for part in re.split(r"[，,、\s]+", job.get("福利待遇") or "") if part)
+        return frozenset(words)
+    
+    @classmethod
+    def minhash(cls, grams: frozenset) -> List[int]:
+        hashes = [int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big") for gram in grams]
+        return [min((a * h + b) % cls.PRIME for h in hashes) for a, b in cls.PERMUTATIONS]
+    
+    @classmethod
+    def band_keys(cls, block: str, signature: List[int]) -> List[tuple]:
+        return [
+            (band, block, tuple(signature[band * cls.ROWS:(band + 1) * cls.ROWS]))
+            for band in range(cls.BANDS)
+        ]
+    
+    @staticmethod
+    def jaccard(a: frozenset, b: frozenset) -> float:
+        return len(a & b) / len(a | b) if a or b else 1.0
+    
+    def similarity(self, grams: frozenset, terms: frozenset, entry: tuple) -> float:
+        _, other_grams, other_terms = entry
+        return (self.TITLE_WEIGHT * self.jaccard(grams, other_grams)
+                + (1 - self.TITLE_WEIGHT) * self.jaccard(terms, other_terms))
+    
+    def add(self, job_id: str, cluster_id: str, grams: frozenset, terms: frozenset, keys: List[tuple]):
+        index = len(self.entries)
+        self.entries.append((cluster_id, grams, terms))
+        for key in keys:
+            self.buckets.setdefault(key, []).append(index)
+        self.clusters[job_id] = cluster_id
+    
+    def find(self, keys: List[tuple], grams: frozenset, terms: frozenset) -> Optional[str]:
+        """在同段候选里找综合相似度最高且达到阈值的记录，返回其组 ID"""
+        candidates = {index for key in keys for index in self.buckets.get(key, ())}
+        self.stats["candidates"] += len(candidates)
+        best, best_score = None, self.threshold
+        for index in candidates:
+            score = self.similarity(grams, terms, self.entries[index])
+            if score >= best_score:
+                best, best_score = self.entries[index][0], score
+        return best
+    
+    def tag(self, jobs: List[Dict], drop: bool = False) -> List[Dict]:
+        """给一页职位标注重复组（写入"重复组"列）；drop=True 时去掉本次运行已输出过的组"""
+        kept, rows = [], []
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            for job in jobs:
+                self.stats["checked"] += 1
+                job_id = SeenJobsIndex.record_id(job)
+                cluster_id = self.clusters.get(job_id)
+                if cluster_id is None:
+                    block = self.block(job)
+                    grams, terms = self.bigrams(job.get("职位名称")), self.terms(job)
+                    signature = self.minhash(grams)
+                    keys = self.band_keys(block, signature)
+                    cluster_id = self.find(keys, grams, terms)
+                    if cluster_id is not None:
+                        self.stats["matched"] += 1
+                    cluster_id = cluster_id or job_id
+                    self.add(job_id, cluster_id, grams, terms, keys)
+                    rows.append((
+                        job_id, cluster_id, block, job.get("职位名称"), "\x1f".join(sorted(terms)),
+                        ",".join(map(str, signature)), now,
+                    ))
+                job["重复组"] = cluster_id
+                if drop and cluster_id in self.emitted_clusters:
+                    self.stats["dropped"] += 1
+                    continue
+                self.emitted_clusters.add(cluster_id)
+                kept.append(job)
+            if rows:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO near_dups (job_id, cluster_id, block, title, terms, signature, first_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self.conn.commit()
+        return kept
+    
+    def close(self):
+        self.conn.close()
+
+
+# sinks.py - 流式结果输出
+import csv
+import glob
+
+
+class ResultSink:
+    """结果输出基类：每页追加写入并 flush，每 fsync_every 页强制落盘"""
+    
+    extension = ""
+    
+    def __init__(self, path: str, fsync_every: int = 1):
+        self.path = path
+        self.fsync_every = max(fsync_every, 1)
+        self.pages = 0
+        self.file = None
+    
+    def write(self, jobs: List[Dict]):
+        if not jobs:
+            return
+        self.write_rows(jobs)
+        self.pages += 1
+        self.flush(sync=self.pages % self.fsync_every == 0)
+    
+    def write_rows(self, jobs: List[Dict]):
+        raise NotImplementedError
+    
+    def read_rows(self) -> List[Dict]:
+        """读回文件中已有的行（续爬时恢复去重状态）"""
+        raise NotImplementedError
+    
+    def flush(self, sync: bool = False):
+        if self.file:
+            self.file.flush()
+            if sync:
+                os.fsync(self.file.fileno())
+    
+    def close(self):
+        if self.file:
+            self.flush(sync=True)
+            self.file.close()
+            self.file = None
+
+
+class JsonlSink(ResultSink):
+    """每行一条 JSON"""
+    
+    extension = "jsonl"
+    
+    def __init__(self, path: str, fsync_every: int = 1):
+        super().__init__(path, fsync_every)
+        self.file = open(path, "a", encoding="utf-8")
+    
+    def write_rows(self, jobs: List[Dict]):
+        self.file.write("".join(json.dumps(JobRecord.as_dict(job), ensure_ascii=False) + "\n" for job in jobs))
+    
+    def read_rows(self) -> List[Dict]:
+        self.flush()
+        with open(self.path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    
+    def export_array(self) -> str:
+        """关闭后把整个 .jsonl 另存为同名 .json 数组（续爬追加的行也包含在内），返回文件名"""
+        path = f"{os.path.splitext(self.path)[0]}.json"
+        rows = self.read_rows()
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        os.replace(f"{path}.tmp", path)
+        return path
+
+
+class CsvSink(ResultSink):
+    """CSV（utf-8-sig，Excel 可直接打开）；追加到已有文件时沿用原表头"""
+    
+    extension = "csv"
+    
+    def __init__(self, path: str, fsync_every: int = 1):
+        super().__init__(path, fsync_every)
+        self.fieldnames = None
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "r", encoding="utf-8-sig", newline="") as f:
+                self.fieldnames = next(csv.reader(f), None)
+        self.file = open(path, "a", encoding="utf-8-sig", newline="")
+        self.writer = None
+    
+    def write_rows(self, jobs: List[Dict]):
+        if self.writer is None:
+            header_needed = self.fieldnames is None
+            self.fieldnames = self.fieldnames or list(jobs[0].keys())
+            self.writer = csv.writer(self.file)
+            if header_needed:
+                self.writer.writerow(self.fieldnames)
+        # JobRecord 直接按列取值，不构造中间 dict
+        self.writer.writerows(
+            job.row(self.fieldnames) if isinstance(job, JobRecord) else [job.get(name, "") for name in self.fieldnames]
+            for job in jobs
+        )
+    
+    def read_rows(self) -> List[Dict]:
+        self.flush()
+        with open(self.path, "r", encoding="utf-8-sig", newline="") as f:
+            return list(csv.DictReader(f))
+
+
+class ParquetSink(ResultSink):
+    """
+    Parquet：每页一个 row group
+    Parquet 文件要写完尾部才能读取，所以每 fsync_every 页换一个分片文件，崩溃时只丢失未关闭的分片
+    """
+    
+    extension = "parquet"
+    
+    def __init__(self, path: str, fsync_every: int = 1):
+        super().__init__(path, fsync_every)
+        import pyarrow  # noqa: F401  尽早报告缺少依赖
+        self.base = path[: -len(".parquet")] if path.endswith(".parquet") else path
+        # 续写时从已有分片之后开始编号
+        existing = glob.glob(f"{glob.escape(self.base)}.part-*.parquet")
+        self.part = max((int(re.search(r'part-(\d+)', name).group(1)) for name in existing), default=0)
+        self.writer = None
+        self.schema = None
+    
+    def write_rows(self, jobs: List[Dict]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if isinstance(jobs[0], JobRecord):
+            # 按列构造，类别字段字典编码
+            if self.schema is None:
+                self.schema = JobRecord.arrow_schema(jobs[0].keys())
+            table = JobRecord.to_arrow(jobs, self.schema)
+        else:
+            if self.schema is None:
+                self.schema = pa.Table.from_pylist(jobs).schema
+            table = pa.Table.from_pylist(jobs, schema=self.schema)
+        if self.writer is None:
+            self.part += 1
+            self.file = open(f"{self.base}.part-{self.part:04d}.parquet", "wb")
+            self.writer = pq.ParquetWriter(self.file, self.schema)
+        self.writer.write_table(table)
+    
+    def flush(self, sync: bool = False):
+        # 到达落盘间隔时关闭当前分片（写入尾部），下一页开新分片
+        if sync and self.writer:
+            self.writer.close()
+            self.writer = None
+            super().flush(sync=True)
+            self.file.close()
+            self.file = None
+    
+    def read_rows(self) -> List[Dict]:
+        """只读已关闭的分片（正在写的分片还没有尾部）"""
+        import pyarrow.parquet as pq
+        writing = f"{self.base}.part-{self.part:04d}.parquet" if self.writer else None
+        rows = []
+        for part in sorted(glob.glob(f"{glob.escape(self.base)}.part-*.parquet")):
+            if part != writing:
+                rows.extend(pq.read_table(part).to_pylist())
+        return rows
+    
+    def close(self):
+        self.flush(sync=True)
+
+
+class ResultWriter:
+    """按配置同时写多种格式（线程安全，池模式下各 worker 共用）"""
+    
+    SINKS = {"jsonl": JsonlSink, "csv": CsvSink, "parquet": ParquetSink}
+    
+    def __init__(self, config: SpiderConfig, basename: str):
+        self.sinks = [
+            self.SINKS[fmt](f"{config.output_dir}/{basename}.{self.SINKS[fmt].extension}", config.fsync_every_pages)
+            for fmt in config.stream_formats
+        ]
+        self.json_array = config.stream_json_array
+        self.exported: List[str] = []
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def paths(self) -> List[str]:
+        return [sink.path for sink in self.sinks]
+    
+    def write(self, jobs: List[Dict]):
+        with self._lock, Metrics.timer("write", mode="stream"):
+            for sink in self.sinks:
+                sink.write(jobs)
+            self.count += len(jobs)
+        Metrics.inc("records_written", len(jobs))
+    
+    def written_ids(self) -> set:
+        """结果文件中已有职位的 ID（各格式内容相同，读第一种）"""
+        with self._lock:
+            if not self.sinks:
+                return set()
+            return {SeenJobsIndex.record_id(row) for row in self.sinks[0].read_rows()}
+    
+    def close(self):
+        with self._lock:
+            for sink in self.sinks:
+                sink.close()
+                if self.json_array and isinstance(sink, JsonlSink):
+                    self.exported.append(sink.export_array())
+
+
+# details.py - 职位详情补充
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+class DetailCache:
+    """按职位链接缓存详情字段（SQLite），超过有效期的视为未命中"""
+    
+    def __init__(self, path: str, ttl_hours: float):
+        self.ttl = ttl_hours * 3600
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_details (
+                url TEXT PRIMARY KEY,
+                fields TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self._lock = threading.Lock()
+    
+    def get_many(self, urls: List[str]) -> Dict[str, Dict]:
+        if not urls:
+            return {}
+        placeholders = ",".join("?" * len(urls))
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT url, fields FROM job_details WHERE url IN ({placeholders}) AND fetched_at >= ?",
+                [*urls, time.time() - self.ttl],
+            ).fetchall()
+        return {url: json.loads(fields) for url, fields in rows}
+    
+    def put_many(self, results: Dict[str, Dict]):
+        if not results:
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO job_details (url, fields, fetched_at) VALUES (?, ?, ?)",
+                [(url, json.dumps(fields, ensure_ascii=False), now) for url, fields in results.items()],
+            )
+            self.conn.commit()
+    
+    def close(self):
+        self.conn.close()
+
+
+class DetailFetcher:
+    """
+    用线程池并发抓取职位详情页（不经过浏览器，带上浏览器里的 cookie），
+    按域名限速，结果按链接缓存，重复运行或同一职位出现在多个关键词下时只抓一次
+    """
+    
+    FIELDS = {
+        "职位描述": Selectors.DETAIL_DESCRIPTION,
+        "工作地址": Selectors.DETAIL_ADDRESS,
+        "招聘者": Selectors.DETAIL_RECRUITER,
+        "招聘者职位": Selectors.DETAIL_RECRUITER_TITLE,
+    }
+    
+    def __init__(self, config: SpiderConfig, user_agent: str = None):
+        self.config = config
+        self.user_agent = user_agent or "Mozilla/5.0"
+        self.cookie_header = ""
+        self.cache = DetailCache(config.detail_cache, config.detail_cache_ttl_hours)
+        self.executor = ThreadPoolExecutor(max_workers=max(config.detail_workers, 1), thread_name_prefix="detail")
+        self.limiters: Dict[str, "PolitenessScheduler"] = {}
+        self._lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "fetched": 0, "failed": 0, "fetch_seconds": 0.0}
+    
+    def set_cookies(self, cookies: List[Dict]):
+        """使用浏览器上下文的 cookie（context.cookies() 的返回值）"""
+        self.cookie_header = "; ".join(f"{c['name']}={c['value']}" for c in cookies)
+    
+    def limiter(self, url: str) -> "PolitenessScheduler":
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self.limiters:
+                self.limiters[host] = PolitenessScheduler(self.config.detail_requests_per_second * 60)
+            return self.limiters[host]
+    
+    def fetch(self, url: str) -> Optional[Dict]:
+        """抓取并解析一个详情页，失败或遇到验证页时返回 None"""
+        self.limiter(url).acquire()
+        start = time.perf_counter()
+        request = urllib.request.Request(url, headers={
+            "User-Agent": self.user_agent,
+            "Cookie": self.cookie_header,
+            "Referer": self.config.base_url,
+            "Accept-Language": "zh-CN,zh;q=0.9",
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=self.config.detail_timeout) as response:
+                if any(keyword in response.geturl() for keyword in Pacer.BLOCK_URL_KEYWORDS):
+                    logger.warning(f"详情页被重定向到验证页: {url}")
+                    return None
+                charset = response.headers.get_content_charset() or "utf-8"
+                html = response.read().decode(charset, errors="replace")
+            Metrics.observe("detail_fetch", time.perf_counter() - start)
+            return self.parse(html)
+        except Exception as e:
+            logger.warning(f"抓取详情页失败: {url} ({e})")
+            return None
+    
+    @classmethod
+    def parse(cls, html: str) -> Optional[Dict]:
+        from lxml import html as lxml_html
+        root = lxml_html.fromstring(html)
+        if any(OfflineParser.query(root, selector) is not None for selector in Selectors.BLOCK_PAGE):
+            return None
+        fields = {name: Utils.clean_text(OfflineParser.pick(root, selectors) or "") for name, selectors in cls.FIELDS.items()}
+        # 一个字段都没取到多半不是正常的详情页，不写入缓存
+        return fields if any(fields.values()) else None
+    
+    def enrich(self, jobs: List[Dict]) -> List[Dict]:
+        """为一页职位补充详情字段（原地修改并返回）"""
+        urls = list(dict.fromkeys(job["职位链接"] for job in jobs if job.get("职位链接")))
+        results = self.cache.get_many(urls)
+        self.stats["cache_hits"] += len(results)
+        
+        misses = [url for url in urls if url not in results]
+        if misses:
+            start = time.monotonic()
+            fetched = {}
+            for url, fields in zip(misses, self.executor.map(self.fetch, misses)):
+                if fields is None:
+                    self.stats["failed"] += 1
+                else:
+                    fetched[url] = fields
+            self.cache.put_many(fetched)
+            results.update(fetched)
+            self.stats["fetched"] += len(fetched)
+            self.stats["fetch_seconds"] += time.monotonic() - start
+        
+        empty = dict.fromkeys(self.FIELDS, "")
+        for job in jobs:
+            job.update(results.get(job.get("职位链接"), empty))
+        return jobs
+    
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.cache.close()
+
+
+# har.py - 录制与回放
+class HarArchive:
+    """
+    录制：每个浏览器上下文把网络流量写到 <目录>/<名称>.har.zip
+    回放：上下文的所有请求依次在各录制文件中查找，找不到的直接中止，不访问网络
+    """
+    
+    @staticmethod
+    def record_path(directory: str, name: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        safe_name = re.sub(r"[^\w.-]+", "_", name)
+        return os.path.join(directory, f"{safe_name}.har.zip")
+    
+    @staticmethod
+    def files(source: str) -> List[str]:
+        if os.path.isfile(source):
+            return [source]
+        files = sorted(glob.glob(os.path.join(source, "*.har")) + glob.glob(os.path.join(source, "*.har.zip")))
+        if not files:
+            raise FileNotFoundError(f"没有找到录制文件: {source}")
+        return files
+    
+    @classmethod
+    def record_options(cls, config: SpiderConfig, name: str) -> Dict:
+        """new_context 的录制参数（未开启录制时为空）"""
+        if not config.har_record:
+            return {}
+        return dict(record_har_path=cls.record_path(config.har_record, name), record_har_mode="full")
+    
+    @classmethod
+    def replay(cls, context, source: str):
+        # 后注册的路由优先：先兜底中止，再按文件顺序逐个尝试
+        context.route("**/*", lambda route: route.abort())
+        for path in cls.files(source):
+            context.route_from_har(path, not_found="fallback")
+    
+    @classmethod
+    async def replay_async(cls, context, source: str):
+        async def abort(route):
+            await route.abort()
+        
+        await context.route("**/*", abort)
+        for path in cls.files(source):
+            await context.route_from_har(path, not_found="fallback")
+
+
+# checkpoint.py - 断点续爬
+class Checkpoint:
+    """
+    持久化爬取进度：已完成的关键词、进行中关键词的下一页页码和结果页 URL（切片模式下还有待抓取的切片栈）、
+    输出文件名和已输出条数
+    每完成一页原子地写一次；整次运行正常结束后删除
+    """
+    
+    def __init__(self, path: str, state: Dict = None):
+        self.path = path
+        self.state = state or {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def load(cls, path: str) -> Optional["Checkpoint"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(path, json.load(f))
+        except Exception as e:
+            logger.warning(f"读取断点失败，重新开始: {e}")
+            return None
+    
+    @classmethod
+    def open(cls, config: SpiderConfig, resume: bool) -> "Checkpoint":
+        """续爬时加载已有断点（关键词列表需一致），否则开始新的断点"""
+        path = os.path.join(config.output_dir, "checkpoint.json")
+        checkpoint = cls.load(path) if resume else None
+        if checkpoint and checkpoint.state.get("keywords") != config.keywords:
+            logger.warning("断点中的关键词与当前配置不一致，重新开始")
+            checkpoint = None
+        if checkpoint:
+            logger.info(
+                f"从断点续爬: 已完成 {len(checkpoint.state['done'])} 个关键词, "
+                f"已输出 {checkpoint.state['emitted']} 条"
+            )
+            return checkpoint
+        if resume:
+            logger.info("没有可用的断点，从头开始")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return cls(path, {
+            "keywords": list(config.keywords),
+            "done": [],
+            "progress": {},  # 关键词 -> {"page": 下一页页码, "url": 该页 URL, "slices": 切片栈（切片模式，栈顶为当前切片）}
+            "output": f"boss_jobs_{timestamp}",
+            "emitted": 0,
+        })
+    
+    @property
+    def output(self) -> str:
+        return self.state["output"]
+    
+    def pending(self, keywords: List[str]) -> List[str]:
+        return [keyword for keyword in keywords if keyword not in self.state["done"]]
+    
+    def resume_point(self, keyword: str) -> Optional[Dict]:
+        return self.state["progress"].get(keyword)
+    
+    def page_done(self, keyword: str, emitted: int, next_page: int = None, url: str = None,
+                  slices: List[Dict[str, str]] = None):
+        """
+        记录一页已输出；next_page 非空时在同一次保存中记下下一页的位置（切片模式下连同切片栈），
+        翻页途中被中断时续爬直接打开下一页，不会重抓、重复输出本页
+        """
+        with self._lock:
+            self.state["emitted"] += emitted
+            if next_page is not None:
+                self.state["progress"][keyword] = {"page": next_page, "url": url}
+                if slices is not None:
+                    self.state["progress"][keyword]["slices"] = slices
+            self.save()
+    
+    def slices_left(self, keyword: str, slices: List[Dict[str, str]]):
+        """切片模式：一个切片抓完后记下剩余的切片栈，续爬从栈顶切片的第一页开始"""
+        with self._lock:
+            self.state["progress"][keyword] = {"page": 1, "url": None, "slices": slices}
+            self.save()
+    
+    def keyword_done(self, keyword: str):
+        with self._lock:
+            self.state["progress"].pop(keyword, None)
+            if keyword not in self.state["done"]:
+                self.state["done"].append(keyword)
+            self.save()
+    
+    def save(self):
+        self.state["updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+    
+    def finish(self):
+        """全部关键词完成后删除断点"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# session.py - 会话复用
+class SessionState:
+    """
+    浏览器会话（cookie、localStorage）持久化：预热后和退出前保存，下次启动新上下文时加载
+    会话文件未过期时跳过首页预热，直接打开结果页；录制/回放时不使用，保证流量完整可重放
+    """
+    
+    @staticmethod
+    def enabled(config: SpiderConfig) -> bool:
+        return config.reuse_session and not (config.har_record or config.har_replay)
+    
+    @classmethod
+    def load(cls, config: SpiderConfig) -> Optional[str]:
+        """返回可用的会话文件路径；未启用、不存在或已过期时返回 None"""
+        path = config.storage_state
+        if not cls.enabled(config) or not os.path.exists(path):
+            return None
+        age_hours = (time.time() - os.path.getmtime(path)) / 3600
+        if age_hours > config.session_max_age_hours:
+            logger.info(f"会话文件已保存 {age_hours:.1f} 小时，重新预热")
+            return None
+        return path
+    
+    @classmethod
+    def save(cls, context, config: SpiderConfig):
+        if not cls.enabled(config):
+            return
+        # 池模式/异步模式下多个上下文可能同时保存，各自用独立的临时文件
+        tmp_path = f"{config.storage_state}.{id(context)}.tmp"
+        try:
+            context.storage_state(path=tmp_path)
+            os.replace(tmp_path, config.storage_state)
+        except Exception as e:
+            logger.warning(f"保存会话失败: {e}")
+    
+    @classmethod
+    async def save_async(cls, context, config: SpiderConfig):
+        if not cls.enabled(config):
+            return
+        tmp_path = f"{config.storage_state}.{id(context)}.tmp"
+        try:
+            await context.storage_state(path=tmp_path)
+            os.replace(tmp_path, config.storage_state)
+        except Exception as e:
+            logger.warning(f"保存会话失败: {e}")
+    
+    @staticmethod
+    def discard(config: SpiderConfig):
+        if os.path.exists(config.storage_state):
+            os.remove(config.storage_state)
+            logger.info(f"已删除保存的会话: {config.storage_state}")
+
+
+# planner.py - 查询拆分
+import math
+
+
+class QueryPlanner:
+    """
+    站点对单个查询最多返回 page_cap 页。结果更多的查询按分面（薪资档位、城市、经验、学历）
+    逐级拆成互不重叠的切片，触及上限的切片继续细分，直到每个叶子切片都能完整翻完
+    """
+    
+    # 取值不能覆盖全部职位的分面：按它拆分后，不在取值内的职位不属于任何子切片
+    PARTIAL_FACETS = {
+        "city": "只包含主要城市，其他城市的职位",
+        "experience": "不含经验不限，不限经验的职位",
+        "degree": "不含学历不限，不限学历的职位",
+    }
+    
+    def __init__(self, config: SpiderConfig):
+        self.config = config
+        self.stats = {"slices": 0, "splits": 0, "capped": 0, "pages": 0, "duplicates": 0, "gaps": 0}
+        self.totals: Dict[tuple, Optional[int]] = {}  # 切片 -> 接口给出的结果总数
+        self.children: Dict[tuple, List[tuple]] = {}  # 已拆分的切片 -> 子切片
+        for facet in config.split_facets:
+            if facet in self.PARTIAL_FACETS:
+                logger.warning(f"按 {facet} 拆分会有遗漏：取值{self.PARTIAL_FACETS[facet]}不会被抓取")
+    
+    @staticmethod
+    def key(filters: Dict[str, str]) -> tuple:
+        return tuple(sorted(filters.items()))
+    
+    @staticmethod
+    def values(facet: str) -> List[str]:
+        """某个分面下可拆分的全部代码（不含"全国"、"不限"这类不做筛选的值）"""
+        if facet == "city":
+            return [code for name, code in SearchUrl.CITY_CODES.items() if name != "全国"]
+        if facet == "salary":
+            return [code for _, _, code in SearchUrl.SALARY_BANDS]
+        if facet == "experience":
+            return sorted(set(SearchUrl.EXPERIENCE_CODES.values()) - {SearchUrl.EXPERIENCE_CODES["不限"]})
+        if facet == "degree":
+            return list(SearchUrl.DEGREE_CODES.values())
+        raise ValueError(f"未知分面: {facet}")
+    
+    def root(self) -> Dict[str, str]:
+        """根切片：配置中的筛选条件（开始一个新关键词，清空上一个关键词的切片总数）"""
+        self.totals.clear()
+        self.children.clear()
+        return SearchUrl.filters(self.config)
+    
+    def record_total(self, filters: Dict[str, str], total: Optional[int]):
+        self.totals[self.key(filters)] = total
+    
+    def open_facet(self, filters: Dict[str, str]) -> Optional[str]:
+        """按拆分顺序找第一个还能细分的分面：未设置、全国，或同时包含多个薪资档位"""
+        for facet in self.config.split_facets:
+            code = filters.get(facet)
+            if code is None or "," in code or (facet == "city" and code == SearchUrl.CITY_CODES["全国"]):
+                return facet
+        return None
+    
+    def split(self, filters: Dict[str, str]) -> List[Dict[str, str]]:
+        """把切片按下一个分面拆开；已无法拆分时返回空列表"""
+        facet = self.open_facet(filters)
+        if facet is None:
+            return []
+        code = filters.get(facet)
+        if code and "," in code:
+            values = code.split(",")
+        else:
+            values = self.values(facet)
+            if facet in self.PARTIAL_FACETS:
+                logger.warning(f"切片 {self.label(filters)} 按 {facet} 拆分：取值{self.PARTIAL_FACETS[facet]}会遗漏")
+        children = [{**filters, facet: value} for value in values]
+        self.children[self.key(filters)] = [self.key(child) for child in children]
+        return children
+    
+    def coverage_gaps(self) -> List[tuple]:
+        """
+        已拆分且自身和所有子切片总数都已知的切片中，子切片合计少于自身的：[(标签, 总数, 子切片合计)]
+        没有接口数据（不知道总数）时无法判断，返回空列表
+        """
+        gaps = []
+        for parent, children in self.children.items():
+            total = self.totals.get(parent)
+            counts = [self.totals.get(child) for child in children]
+            if total is None or None in counts:
+                continue
+            if sum(counts) < total:
+                gaps.append((self.label(dict(parent)), total, sum(counts)))
+        return gaps
+    
+    def over_cap(self, total_count: int) -> bool:
+        return total_count > self.config.page_cap * self.config.page_size
+    
+    def pages_needed(self, total_count: int) -> int:
+        return max(min(math.ceil(total_count / self.config.page_size), self.config.page_cap), 1)
+    
+    @staticmethod
+    def label(filters: Dict[str, str]) -> str:
+        return " ".join(f"{name}={code}" for name, code in filters.items()) or "全部"
+
+
+# spider.py - 主爬虫类
+from playwright.sync_api import sync_playwright, Page, Browser, BrowserContext
+from typing import List, Dict
+
+class BossSpider:
+    """Boss 直聘爬虫主类"""
+    
+    # 反检测脚本
+    STEALTH_SCRIPT = """
+        Object.defineProperty(navigator, 'webdriver', {get: () => false});
+        Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
+        Object.defineProperty(navigator, 'languages', {get: () => ['zh-CN', 'zh', 'en']});
+        window.chrome = {
+            runtime: {},
+            app: {},
+            csi: function() {},
+            loadTimes: function() {}
+        };
+    """
+    
+    def __init__(self, config: SpiderConfig = None, pool: "BossSpider" = None):
+        """pool: 池模式下的 SpiderPool，worker 直接使用它打开的已抓取索引和重复索引，不再各自打开"""
+        self.config = config or SpiderConfig()
+        self.jobs: List[Dict] = []
+        self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
+        self.page: Optional[Page] = None
+        self.scheduler: Optional["PolitenessScheduler"] = None  # 池模式下由 SpiderPool 注入
+        self.api_capture: Optional[ApiCapture] = None
+        self.resource_policy: Optional[ResourcePolicy] = None
+        self.pacer = Pacer(self.config) if self.config.adaptive_pacing else None
+        if pool:
+            self.seen_index = pool.seen_index
+        else:
+            self.seen_index = SeenJobsIndex(self.config.seen_db) if self.config.incremental else None
+        self.unmarked: Dict[str, List[Dict]] = {}  # 批量模式下已输出、待保存后记为已抓取的新职位（按关键词）
+        self.current_keyword = ""
+        self.known_ratio: Dict[str, float] = {}  # 关键词 -> 最近一页已知职位占比
+        self.writer: Optional[ResultWriter] = None
+        self.checkpoint: Optional[Checkpoint] = None
+        self.detail_fetcher: Optional[DetailFetcher] = None
+        self.metrics_exporter: Optional[MetricsExporter] = None
+        self.attached = False  # 通过 CDP 连接到已运行的浏览器
+        self.owns_context = True  # 复用已有浏览器的上下文时为 False，结束时只关闭自己的页面
+        self.session_warm = False  # 上下文已带有效会话，可以跳过首页预热
+        self.deadline: Optional[float] = None  # time.monotonic() 时间点，超过后在页间停下（由调度器设置）
+        self.current_page = 1
+        self.current_filters: Optional[Dict[str, str]] = None
+        self.planner = QueryPlanner(self.config) if self.config.split_queries else None
+        self.run_ids: Optional[set] = set() if self.config.split_queries else None  # 本次运行已输出的职位 ID
+        if pool:
+            # 共用一个索引，跨 worker 的重复也能识别；统计记在池上
+            self.dedup = pool.dedup
+        else:
+            self.dedup = (
+                NearDuplicateIndex(self.config.near_dup_db, self.config.near_dup_threshold)
+                if self.config.near_dedup else None
+            )
+        self.snapshots: Optional[SnapshotStore] = None
+        self.saved_sleep_scale: Optional[float] = None  # 回放模式临时关闭等待，结束时恢复
+        self.resilience = Resilience(self.config, rotate=self.rotate_context)
+        self.stats = {
+            "total_pages": 0,
+            "total_crawled": 0,
+            "total_valid": 0,
+            "total_failed": 0,
+            "total_new": 0,
+            "total_known": 0,
+            "start_time": None,
+            "end_time": None
+        }
+        if self.planner:
+            self.stats["planner"] = self.planner.stats
+        if self.dedup and not pool:
+            self.stats["near_dups"] = self.dedup.stats
+        self.stats["resilience"] = self.resilience.stats
+        if self.pacer:
+            self.stats["pacing"] = self.pacer.stats
+        if self.config.selector_cache:
+            SelectorCache.activate(self.config.selector_stats)
     
     def setup_browser(self, playwright):
-        """初始化浏览器"""
-        logger.info("正在启动 Chrome 浏览器...")
+        """初始化浏览器（配置了 cdp_endpoint 时连接已运行的浏览器）"""
+        if self.config.cdp_endpoint:
+            logger.info(f"正在连接浏览器: {self.config.cdp_endpoint}")
+            self.browser = playwright.chromium.connect_over_cdp(self.config.cdp_endpoint)
+            self.attached = True
+        else:
+            logger.info("正在启动 Chrome 浏览器...")
+            self.browser = self.launch_browser(playwright)
+        self.open_page(self.browser)
+        logger.info("浏览器启动成功")
+    
+    def launch_browser(self, playwright, extra_args: List[str] = None) -> Browser:
+        """启动 Chrome"""
+        return playwright.chromium.launch(
+            headless=self.config.headless,
+            executable_path=self.config.chrome_path,
+            args=[
+                '--no-sandbox',
+                '--disable-blink-features=AutomationControlled',
+                '--start-maximized',
+                '--disable-dev-shm-usage'
+            ] + (extra_args or [])
+        )
+    
+    def open_page(self, browser: Browser, name: str = "main"):
+        """在浏览器中创建独立上下文和页面，并注入反检测脚本（name 为录制文件名）"""
+        reuse = self.attached and browser.contexts and not self.config.own_context
+        if reuse and not (self.config.har_record or self.config.har_replay):
+            # 复用已运行浏览器的上下文，沿用其中的登录状态和缓存
+            self.context = browser.contexts[0]
+            self.owns_context = False
+            self.session_warm = True
+            logger.info("复用已运行浏览器的上下文")
+        else:
+            state = SessionState.load(self.config)
+            self.context = browser.new_context(
+                **self.context_options(), **HarArchive.record_options(self.config, name),
+                **({"storage_state": state} if state else {}),
+            )
+            self.session_warm = state is not None
+        
+        if self.config.har_replay:
+            HarArchive.replay(self.context, self.config.har_replay)
+        elif self.config.block_resources:
+            # 拦截与解析无关的资源
+            self.resource_policy = ResourcePolicy(self.config)
+            self.resource_policy.attach(self.context)
+            self.stats["resources"] = self.resource_policy.stats
+        
+        self.page = self.context.new_page()
+        
+        # 注入反检测脚本
+        self.page.add_init_script(self.STEALTH_SCRIPT)
+        
+        # 监听搜索接口响应
+        if self.config.capture_api:
+            self.api_capture = ApiCapture()
+            self.api_capture.attach(self.page)
+    
+    def context_options(self) -> Dict:
+        """浏览器上下文参数（同步/异步爬虫共用）"""
+        return dict(
+            viewport=self.config.viewport,
+            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            locale='zh-CN',
+            timezone_id='Asia/Shanghai',
+            permissions=[]
+        )
+    
+    def throttle(self):
+        """页间随机延迟；池模式下改由全局调度器在导航前统一节流"""
+        if self.scheduler is not None:
+            # 池模式下平时由调度器节流，只有退避时才额外等待
+            if self.pacer and self.pacer.factor > 1:
+                self.pacer.sleep()
+            return
+        if self.pacer:
+            self.pacer.sleep()
+        else:
+            Utils.random_sleep(self.config.min_delay, self.config.max_delay)
+    
+    def wait_for_results(self, previous: str = None) -> bool:
+        """等待职位列表加载（previous 为翻页前的卡片签名），返回是否加载成功"""
+        if self.pacer:
+            if self.pacer.wait_ready(self.page, previous):
+                logger.info("职位列表加载完成")
+                return True
+            logger.warning("等待职位列表超时，尝试继续...")
+            return False
+        
+        # 未启用节奏控制：固定等待
+        Utils.random_sleep(5, 8)
+        try:
+            with Metrics.timer("wait", ready="fixed"):
+                self.page.wait_for_selector(Selectors.JOB_LIST[0], timeout=15000)
+            logger.info("职位列表加载完成")
+            return True
+        except:
+            logger.warning("等待职位列表超时，尝试继续...")
+            return False
+    
+    def open_results(self, keyword: str, page_num: int, city: str = None, filters: Dict[str, str] = None) -> bool:
+        """直接打开某个关键词的第 page_num 页结果（filters 为查询切片的筛选条件）"""
+        url = SearchUrl.build(self.config, keyword, page_num, city, filters)
+        self.current_filters = filters
+        logger.info(f"打开结果页: {url}")
+        return self.resilience.run("navigation", self.load_results, url, page_num)
+    
+    def load_results(self, url: str, page_num: int) -> bool:
+        """导航到结果页并等待加载；遇到验证/拦截页时抛出 BlockedError"""
+        if self.api_capture:
+            self.api_capture.reset()
+        previous = self.pacer.card_signature(self.page) if self.pacer else None
+        self.acquire_slot()
+        with Metrics.timer("navigation", kind="results"):
+            self.page.goto(url, timeout=30000)
+        self.check_blocked()
+        self.current_page = page_num
+        if self.wait_for_results(previous):
+            return True
+        if Pacer.is_block_page(self.page):
+            raise BlockedError(f"加载结果页时遇到验证/拦截页: {self.page.url}")
+        return False
+    
+    def check_blocked(self):
+        """导航被重定向到验证页时立即放弃本次加载（不必等列表超时）"""
+        if Pacer.is_block_url(self.page.url):
+            if self.pacer:
+                self.pacer.observe(0, blocked=True)
+            raise BlockedError(f"被重定向到验证页: {self.page.url}")
+    
+    def rotate_context(self):
+        """熔断时换一个新的浏览器上下文（丢弃可能已被标记的会话），重新预热后继续"""
+        if not (self.owns_context and self.browser):
+            logger.warning("未持有浏览器上下文，熔断时只能暂停")
+            return
+        rotation = self.resilience.stats["rotations"] + 1
+        logger.warning(f"熔断，更换浏览器上下文 (第 {rotation} 次)")
+        SessionState.discard(self.config)
+        old_context = self.context
+        self.open_page(self.browser, f"rotated-{rotation}")
+        try:
+            old_context.close()
+        except Exception as e:
+            logger.warning(f"关闭旧上下文失败: {e}")
+        self.warm_up()
+        if self.detail_fetcher:
+            self.detail_fetcher.set_cookies(self.context.cookies())
+    
+    def acquire_slot(self):
+        """导航前向全局调度器申请请求配额（单进程模式下不做任何事）"""
+        if self.scheduler is not None:
+            self.scheduler.acquire()
+    
+    # 一次查询找出当前可见的关闭按钮（没有弹窗时只需一次往返）
+    VISIBLE_POPUPS_JS = """
+        (selectors) => selectors.filter(sel => {
+            let el = null;
+            try { el = document.querySelector(sel); } catch (e) { return false; }
+            if (!el || !el.getClientRects().length) return false;
+            const style = getComputedStyle(el);
+            return style.visibility !== 'hidden' && style.display !== 'none';
+        })
+    """
+    
+    def close_popups(self):
+        """关闭可能出现的弹窗"""
+        try:
+            visible = self.page.evaluate(self.VISIBLE_POPUPS_JS, Selectors.CLOSE_BUTTONS)
+        except Exception as e:
+            logger.warning(f"检查弹窗失败: {e}")
+            return
+        for selector in visible:
+            try:
+                self.page.click(selector, timeout=2000)
+                logger.info("已关闭弹窗")
+                Utils.random_sleep(0.5, 1)
+            except:
+                continue
+    
+    def search_jobs(self, keyword: str, first_search: bool = True):
+        """搜索职位"""
+        logger.info(f"正在搜索关键词: {keyword}")
+        if self.api_capture:
+            self.api_capture.reset()
+        
+        if self.config.direct_url:
+            self.open_results(keyword, 1)
+            return
+        
+        self.current_page = 1
+        
+        # 如果不是第一次搜索，先回到首页
+        if not first_search:
+            logger.info("返回首页重新搜索...")
+            self.open_home()
+            Utils.random_sleep(3, 5)
+            self.close_popups()
+        
+        # 尝试多个搜索框选择器
+        search_box = None
+        for selector in SelectorCache.candidates("SEARCH_BOX"):
+            try:
+                search_box = self.page.wait_for_selector(selector, timeout=10000)
+                if search_box:
+                    logger.info(f"使用选择器 '{selector}' 找到搜索框")
+                    SelectorCache.report("SEARCH_BOX", selector, True)
+                    break
+            except:
+                pass
+            SelectorCache.report("SEARCH_BOX", selector, False)
+        
+        if not search_box:
+            # 保存页面用于调试
+            with open(f"{self.config.output_dir}/debug_search_page.html", "w", encoding="utf-8") as f:
+                f.write(self.page.content())
+            raise Exception("未找到搜索框，已保存页面到 debug_search_page.html")
+        
+        # 清空并输入关键词
+        search_box.click()
+        Utils.random_sleep(0.5, 1)
+        
+        # 清空输入框 - 使用多种方法
+        search_box.fill("")
+        self.page.keyboard.press("Control+A")
+        self.page.keyboard.press("Backspace")
+        Utils.random_sleep(0.3, 0.6)
+        
+        # 模拟逐字输入
+        for char in keyword:
+            search_box.type(char, delay=random.randint(50, 150))
+        
+        Utils.random_sleep(1, 2)
+        
+        # 点击搜索按钮
+        self.acquire_slot()
+        for selector in SelectorCache.candidates("SEARCH_BUTTON"):
+            try:
+                self.page.click(selector, timeout=5000)
+                logger.info("已点击搜索按钮")
+                SelectorCache.report("SEARCH_BUTTON", selector, True)
+                break
+            except:
+                SelectorCache.report("SEARCH_BUTTON", selector, False)
+        
+        # 等待结果加载
+        if not self.wait_for_results() and Pacer.is_block_page(self.page):
+            raise BlockedError(f"搜索后遇到验证/拦截页: {self.page.url}")
+    
+    def save_snapshot(self, html: str, keyword: str, page_num: int):
+        """保存页面源码：写入快照存储；未启用存储（或只是调试）时每页一个 .html 文件"""
+        if self.snapshots and self.config.save_html:
+            digest = self.snapshots.put(html, keyword, page_num)
+            logger.info(f"已保存页面快照: {keyword} 第 {page_num} 页 ({digest[:12]})")
+            return
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        html_file = f"{self.config.output_dir}/page_{timestamp}.html"
+        with open(html_file, "w", encoding="utf-8") as f:
+            f.write(html)
+        logger.info(f"已保存页面源码: {html_file}")
+    
+    def crawl_current_page(self, debug=False) -> int:
+        """抓取当前页面的职位"""
+        # 保存页面源码（用于调试）
+        if self.config.save_html or debug:
+            self.save_snapshot(self.page.content(), self.current_keyword, self.current_page)
+        
+        # 整页共用一个抓取时间
+        crawl_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        # 接口数据：直接使用捕获到的 JSON
+        parsed = None
+        if self.api_capture:
+            rows = self.api_capture.drain()[:self.config.items_per_page]
+            if rows:
+                logger.info(f"使用接口数据: {len(rows)} 个职位")
+                total = len(rows)
+                with Metrics.timer("parse", source="api"):
+                    parsed = [
+                        JobParser.build_job_data(
+                            raw, debug=(i <= 3 and debug), crawl_time=crawl_time, base_url=self.config.base_url
+                        )
+                        for i, raw in enumerate(rows, 1)
+                    ]
+        
+        # 批量提取：整页一次 evaluate
+        if parsed is None and self.config.batch_extract:
+            try:
+                with Metrics.timer("parse", source="batch"):
+                    extracted = self.resilience.run(
+                        "parse", BatchExtractor.extract, self.page, self.config.items_per_page
+                    )
+                    if extracted["total"]:
+                        logger.info(f"使用选择器 '{extracted['selector']}' 找到 {extracted['total']} 个职位")
+                        total = extracted["total"]
+                        parsed = [
+                            JobParser.build_job_data(
+                                raw, debug=(i <= 3 and debug), crawl_time=crawl_time, base_url=self.config.base_url
+                            )
+                            for i, raw in enumerate(extracted["cards"], 1)
+                        ]
+            except Exception as e:
+                logger.warning(f"批量提取失败，回退到逐卡解析: {e}")
+        
+        # 逐卡解析（批量提取关闭或失败时）
+        if parsed is None:
+            parse_start = time.perf_counter()
+            job_cards = []
+            for selector in SelectorCache.candidates("JOB_CARD"):
+                try:
+                    job_cards = self.page.query_selector_all(selector)
+                    if job_cards:
+                        logger.info(f"使用选择器 '{selector}' 找到 {len(job_cards)} 个职位")
+                        SelectorCache.report("JOB_CARD", selector, True)
+                        break
+                except:
+                    pass
+                SelectorCache.report("JOB_CARD", selector, False)
+            
+            total = len(job_cards)
+            # 前3个卡片开启调试
+            parsed = [
+                JobParser.parse_job_card(
+                    card, debug=(i <= 3 and debug), crawl_time=crawl_time, base_url=self.config.base_url
+                )
+                for i, card in enumerate(job_cards[:self.config.items_per_page], 1)
+            ]
+            Metrics.observe("parse", time.perf_counter() - parse_start, source="per_card")
+        
+        if not parsed:
+            logger.warning("未找到任何职位卡片")
+            # 如果第一次失败，开启调试模式保存前几个元素
+            if debug:
+                with open(f"{self.config.output_dir}/debug_elements.txt", "w", encoding="utf-8") as f:
+                    f.write("Page title: " + self.page.title() + "\n\n")
+                    f.write("Page URL: " + self.page.url + "\n\n")
+            return 0
+        
+        self.stats["total_pages"] += 1
+        valid = []
+        for i, job_data in enumerate(parsed, 1):
+            self.stats["total_crawled"] += 1
+            
+            if job_data:
+                valid.append(job_data)
+                self.stats["total_valid"] += 1
+                logger.info(f"[{i}/{total}] ✓ {job_data['职位名称']} @ {job_data['公司名称']} - {job_data['薪资']}")
+            else:
+                self.stats["total_failed"] += 1
+                logger.warning(f"[{i}/{total}] ✗ 解析失败")
+        
+        return self.emit(valid, self.current_keyword)
+    
+    def emit(self, jobs: List[Dict], keyword: str) -> int:
+        """处理一页的有效数据（增量模式下先过滤已知职位），返回新增条数"""
+        if "first_page_seconds" not in self.stats and self.stats["start_time"]:
+            self.stats["first_page_seconds"] = (datetime.now() - self.stats["start_time"]).total_seconds()
+        SalaryNormalizer.apply(jobs)
+        if self.run_ids is not None:
+            # 查询切片之间有重叠（父切片首页、跨档位职位），同一职位只输出一次
+            unique = []
+            for job in jobs:
+                job_id = SeenJobsIndex.record_id(job)
+                if job_id not in self.run_ids:
+                    self.run_ids.add(job_id)
+                    unique.append(job)
+            self.planner.stats["duplicates"] += len(jobs) - len(unique)
+            jobs = unique
+        if self.dedup:
+            jobs = self.dedup.tag(jobs, drop=self.config.drop_near_duplicates)
+        known = []
+        if self.seen_index:
+            jobs, known = self.seen_index.split(jobs)
+            self.stats["total_new"] += len(jobs)
+            self.stats["total_known"] += len(known)
+            self.known_ratio[keyword] = len(known) / max(len(jobs) + len(known), 1)
+            if known:
+                logger.info(f"跳过已抓取过的职位 {len(known)} 条")
+        if self.detail_fetcher and jobs:
+            self.detail_fetcher.enrich(jobs)
+        if self.writer:
+            self.writer.write(jobs)
+        else:
+            self.jobs.extend(jobs)
+        if self.seen_index:
+            # 写入成功后才记为已抓取；批量模式下数据在 save_results 才落盘，届时再记录
+            self.seen_index.mark(known + (jobs if self.writer else []), keyword)
+            if not self.writer:
+                self.unmarked.setdefault(keyword, []).extend(jobs)
+        return len(jobs)
+    
+    def open_writer(self, basename: str = None):
+        """流式模式下打开结果文件（续爬时追加到原文件）"""
+        if self.config.streaming and self.config.stream_formats:
+            if basename is None:
+                basename = f"boss_jobs_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            self.writer = ResultWriter(self.config, basename)
+            logger.info(f"结果将实时写入: {', '.join(self.writer.paths)}")
+    
+    def prepare_run(self, resume: bool = False) -> List[str]:
+        """打开断点、结果文件、快照存储、详情抓取器和指标导出，返回还需要爬取的关键词"""
+        self.start_metrics()
+        if self.config.save_html and self.config.snapshot_store:
+            self.snapshots = SnapshotStore(self.config.snapshot_dir)
+            self.stats["snapshots"] = self.snapshots.stats
+        if self.config.har_replay:
+            self.saved_sleep_scale, Utils.sleep_scale = Utils.sleep_scale, 0.0
+            logger.info(f"回放模式: 所有请求从 {self.config.har_replay} 返回，跳过等待")
+        elif self.config.har_record:
+            logger.info(f"录制模式: 网络流量保存到 {self.config.har_record}")
+        
+        if self.config.fetch_details and self.config.har_replay:
+            logger.warning("回放模式下不抓取职位详情（详情页不经过浏览器，没有录制）")
+        elif self.config.fetch_details:
+            self.detail_fetcher = DetailFetcher(self.config, self.context_options()["user_agent"])
+            self.stats["details"] = self.detail_fetcher.stats
+        
+        if not self.config.checkpoint:
+            self.open_writer()
+            return list(self.config.keywords)
+        
+        self.checkpoint = Checkpoint.open(self.config, resume)
+        if not self.config.streaming:
+            logger.warning("未启用流式输出，中断后已抓取的数据无法随断点恢复")
+        self.open_writer(self.checkpoint.output)
+        if self.run_ids is not None and self.writer:
+            # 切片模式的去重集合只在内存中：续爬时从已写出的结果恢复，避免重叠切片再次输出同一职位
+            self.run_ids.update(self.writer.written_ids())
+            if self.run_ids:
+                logger.info(f"从结果文件恢复 {len(self.run_ids)} 个已输出的职位 ID")
+        return self.checkpoint.pending(self.config.keywords)
+    
+    def finish_run(self):
+        """所有关键词完成后清理断点"""
+        if self.checkpoint and not self.checkpoint.pending(self.config.keywords):
+            self.checkpoint.finish()
+    
+    def start_metrics(self):
+        """激活指标并开始导出"""
+        if self.config.metrics and self.metrics_exporter is None:
+            self.metrics_exporter = MetricsExporter(self.config, Metrics.activate(), self.stats)
+            self.metrics_exporter.start()
+    
+    def close_services(self):
+        """关闭详情抓取器和重复索引，写出最终指标，并恢复回放模式改动的等待比例"""
+        if self.saved_sleep_scale is not None:
+            Utils.sleep_scale, self.saved_sleep_scale = self.saved_sleep_scale, None
+        if self.detail_fetcher:
+            self.detail_fetcher.close()
+        if self.dedup:
+            self.dedup.close()
+        if self.snapshots:
+            self.snapshots.close()
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+    
+    def out_of_time(self) -> bool:
+        """超过运行时间上限（未设置时永远为 False）"""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+    
+    def should_stop_early(self, keyword: str) -> bool:
+        """增量模式下，最近一页几乎全是已知职位时停止翻页"""
+        if not self.seen_index:
+            return False
+        ratio = self.known_ratio.get(keyword, 0.0)
+        if ratio >= self.config.early_stop_ratio:
+            logger.info(f"本页已知职位占比 {ratio:.0%}，提前停止翻页")
+            return True
+        return False
+    
+    def go_to_next_page(self) -> bool:
+        """
+        翻到下一页；确实没有更多结果时返回 False
+        导航失败（拦截、超时、重试用尽、找不到翻页按钮）时抛出异常，关键词保持未完成，续爬时从下一页继续
+        """
+        if self.config.direct_url:
+            return self.open_next_results()
+        
+        # 滚动到底部
+        self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        if not self.pacer:
+            Utils.random_sleep(1, 2)
+        
+        # 查找下一页按钮
+        for selector in SelectorCache.candidates("NEXT_PAGE"):
+            try:
+                next_btn = self.page.query_selector(selector)
+                found = bool(next_btn and next_btn.is_visible())
+                SelectorCache.report("NEXT_PAGE", selector, found)
+                if found:
+                    # 检查是否可点击
+                    if "disabled" in (next_btn.get_attribute("class") or ""):
+                        logger.info("已到最后一页")
+                        return False
+                    
+                    previous = self.pacer.card_signature(self.page) if self.pacer else None
+                    if self.api_capture:
+                        self.api_capture.reset()
+                    self.acquire_slot()
+                    with Metrics.timer("navigation", kind="next"):
+                        next_btn.click()
+                    logger.info("已点击下一页")
+                    self.current_page += 1
+                    self.wait_for_results(previous)
+                    return True
+            except:
+                continue
+        
+        raise RuntimeError("未找到下一页按钮")
+    
+    def open_next_results(self) -> bool:
+        """按页码直接打开下一页；接口已表明没有更多结果或页面没有职位时返回 False，导航失败时抛出异常"""
+        if self.api_capture and self.api_capture.has_more is False:
+            logger.info("已到最后一页")
+            return False
+        if not self.open_results(self.current_keyword, self.current_page + 1, filters=self.current_filters):
+            logger.info("下一页没有职位，已到最后一页")
+            return False
+        return True
+    
+    def run(self, resume: bool = False):
+        """运行爬虫（resume=True 时从上次的断点继续）"""
+        self.stats["start_time"] = datetime.now()
+        logger.info("=" * 60)
+        logger.info("Boss 直聘爬虫启动")
+        logger.info(f"搜索关键词: {', '.join(self.config.keywords)}")
+        logger.info(f"最大页数: {self.config.max_pages}")
+        logger.info("=" * 60)
+        
+        with sync_playwright() as playwright:
+            try:
+                keywords = self.prepare_run(resume)
+                self.setup_browser(playwright)
+                
+                self.warm_up()
+                if self.detail_fetcher:
+                    self.detail_fetcher.set_cookies(self.context.cookies())
+                
+                # 遍历关键词
+                for idx, keyword in enumerate(keywords):
+                    if self.out_of_time():
+                        logger.warning(f"超出运行时间上限，剩余 {len(keywords) - idx} 个关键词留到下次")
+                        break
+                    # 第一个关键词第一页开启调试；单个关键词重试用尽时记下来继续下一个
+                    try:
+                        self.crawl_keyword(keyword, first_search=(idx == 0), debug=(idx == 0))
+                    except Exception as e:
+                        logger.error(f"关键词 {keyword} 抓取失败，跳过: {e}")
+                
+                # 保存数据
+                self.save_results()
+                self.finish_run()
+                
+            except Exception as e:
+                logger.error(f"爬虫运行出错: {e}", exc_info=True)
+            finally:
+                self.close_services()
+                self.stats["end_time"] = datetime.now()
+                self.print_stats()
+                
+                # 回放用于自动化测试，不等待确认
+                if self.config.interactive and not self.config.har_replay:
+                    input("\n按 Enter 关闭浏览器...")
+                self.close_browser()
+    
+    def close_browser(self):
+        """保存会话并关闭；连接到已运行的浏览器时只关闭自己的页面并断开连接"""
+        if self.context:
+            try:
+                SessionState.save(self.context, self.config)
+            finally:
+                if self.owns_context:
+                    # 录制文件在关闭上下文时写出
+                    self.context.close()
+                elif self.page:
+                    self.page.close()
+                self.context = None
+        if self.browser:
+            self.browser.close()
+    
+    def warm_up(self):
+        """打开首页、模拟人类行为并关闭弹窗；已有有效会话且直接打开结果页时跳过"""
+        if self.session_warm and self.config.direct_url:
+            logger.info("会话有效，跳过首页预热")
+            return
+        # 打开 Boss 直聘
+        logger.info("正在访问 Boss 直聘...")
+        self.resilience.run("navigation", self.open_home)
+        Utils.random_sleep(3, 5)
         
-        self.browser = playwright.chromium.launch(
-            headless=self.config.headless,
-            executable_path=self.config.chrome_path,
-            args=[
-                '--no-sandbox',
-                '--disable-blink-features=AutomationControlled',
-                '--start-maximized',
-                '--disable-dev-shm-usage'
-            ]
+        # 模拟人类行为
+        if self.config.mouse_move_enabled:
+            Utils.human_mouse_move(self.page)
+        
+        # 关闭弹窗
+        self.close_popups()
+        SessionState.save(self.context, self.config)
+    
+    def open_home(self):
+        self.acquire_slot()
+        with Metrics.timer("navigation", kind="home"):
+            self.page.goto(self.config.base_url, timeout=30000)
+        self.check_blocked()
+    
+    def crawl_keyword(self, keyword: str, first_search: bool = True, debug: bool = False):
+        """搜索一个关键词并抓取多页"""
+        self.current_keyword = keyword
+        if self.planner:
+            return self.crawl_keyword_split(keyword)
+        
+        resume = self.checkpoint.resume_point(keyword) if self.checkpoint else None
+        if resume:
+            # 直接打开断点记录的结果页
+            logger.info(f"续爬关键词 {keyword}: 从第 {resume['page']} 页开始")
+            start_page = resume["page"]
+            if self.config.direct_url:
+                if not self.open_results(keyword, start_page):
+                    # 中断前记录的下一页其实已经没有结果
+                    logger.info(f"第 {start_page} 页没有职位，关键词 {keyword} 已完成")
+                    self.checkpoint.keyword_done(keyword)
+                    return
+            else:
+                if self.api_capture:
+                    self.api_capture.reset()
+                self.acquire_slot()
+                with Metrics.timer("navigation", kind="resume"):
+                    self.page.goto(resume["url"], timeout=30000)
+                self.wait_for_results()
+                self.current_page = start_page
+        elif self.config.direct_url:
+            self.search_jobs(keyword)
+            start_page = 1
+        else:
+            # 搜索（重试时先回到首页）
+            attempts = iter(range(self.resilience.policies["search"].attempts))
+            self.resilience.run(
+                "search", lambda: self.search_jobs(keyword, first_search=first_search and next(attempts) == 0)
+            )
+            start_page = 1
+        
+        # 抓取多页
+        for page_num in range(start_page, self.config.max_pages + 1):
+            logger.info(f"\n{'='*50}")
+            logger.info(f"关键词: {keyword} - 第 {page_num} 页")
+            logger.info(f"{'='*50}")
+            
+            count = self.crawl_current_page(debug=(debug and page_num == 1))
+            logger.info(f"本页抓取: {count} 条有效数据")
+            if self.checkpoint:
+                self.checkpoint.page_done(
+                    keyword, count, *self.next_position(keyword, page_num, self.page.url if self.page else None)
+                )
+            
+            if self.should_stop_early(keyword):
+                break
+            
+            # 如果不是最后一页，翻页（导航失败时抛出异常，关键词留在断点中）
+            if page_num < self.config.max_pages:
+                if not self.go_to_next_page():
+                    logger.info("已没有更多结果，停止抓取")
+                    break
+                if self.out_of_time():
+                    # 不标记关键词完成，下次从断点记录的页码继续
+                    logger.warning(f"超出运行时间上限，{keyword} 停在第 {page_num + 1} 页")
+                    return
+            
+            # 随机延迟
+            self.throttle()
+        
+        if self.checkpoint:
+            self.checkpoint.keyword_done(keyword)
+    
+    def next_position(self, keyword: str, page_num: int, current_url: str = None) -> tuple:
+        """
+        第 page_num 页之后的续爬位置 (页码, 结果页 URL)；已是最后一页时为 (None, None)
+        点击翻页模式下按实际打开的页面 URL（current_url）换页码，而不是按配置重新拼接，续爬时结果集不变
+        """
+        if page_num >= self.config.max_pages:
+            return None, None
+        if not self.config.direct_url and current_url:
+            return page_num + 1, SearchUrl.with_page(current_url, page_num + 1)
+        return page_num + 1, SearchUrl.build(self.config, keyword, page_num + 1, filters=self.current_filters)
+    
+    def crawl_keyword_split(self, keyword: str):
+        """
+        按查询切片抓取一个关键词：触及翻页上限的切片继续细分，深度优先，只有叶子切片完整翻页
+        断点记录剩余的切片栈和当前切片的下一页，续爬时从中断的位置继续
+        """
+        stack = [self.planner.root()]
+        start_page = 1
+        resume = self.checkpoint.resume_point(keyword) if self.checkpoint else None
+        if resume and resume.get("slices") is not None:
+            stack = [dict(filters) for filters in resume["slices"]]
+            start_page = resume["page"]
+            logger.info(f"续爬关键词 {keyword}: 剩余 {len(stack)} 个切片，当前切片从第 {start_page} 页开始")
+        while stack:
+            if self.out_of_time():
+                logger.warning(f"超出运行时间上限，{keyword} 还有 {len(stack)} 个切片未抓取")
+                return
+            filters = stack.pop()
+            capped = self.crawl_slice(keyword, filters, start_page, pending=stack)
+            start_page = 1
+            if capped:
+                children = self.planner.split(filters)
+                if children:
+                    logger.info(f"切片 {QueryPlanner.label(filters)} 触及翻页上限，拆成 {len(children)} 个")
+                    self.planner.stats["splits"] += 1
+                    stack.extend(reversed(children))
+                else:
+                    self.planner.stats["capped"] += 1
+                    logger.warning(f"切片 {QueryPlanner.label(filters)} 已无法再拆分，超出翻页上限的结果会遗漏")
+            if self.checkpoint and stack:
+                self.checkpoint.slices_left(keyword, stack)
+        
+        for label, total, covered in self.planner.coverage_gaps():
+            self.planner.stats["gaps"] += 1
+            logger.warning(f"{keyword} 切片 {label}: 共 {total} 条，子切片合计只有 {covered} 条，{total - covered} 条未覆盖")
+        if self.checkpoint:
+            self.checkpoint.keyword_done(keyword)
+    
+    def crawl_slice(self, keyword: str, filters: Dict[str, str], start_page: int = 1,
+                    pending: List[Dict[str, str]] = None) -> bool:
+        """
+        从 start_page 开始翻完一个切片，返回它是否触及翻页上限（需要继续拆分）
+        pending 是还没抓取的切片栈，和本切片的下一页一起写入断点
+        """
+        label = QueryPlanner.label(filters)
+        self.planner.stats["slices"] += 1
+        # 总数和是否有下一页只对当前切片有效，open_results 会先清空接口捕获的状态
+        if not self.open_results(keyword, start_page, filters=filters):
+            logger.info(f"切片 {label}: 第 {start_page} 页没有职位")
+            if self.api_capture and start_page == 1:
+                self.planner.record_total(filters, 0)
+            return False
+        
+        last_page = self.config.page_cap
+        page_num, cards = 0, 0
+        for page_num in range(start_page, self.config.page_cap + 1):
+            crawled = self.stats["total_crawled"]
+            count = self.crawl_current_page()
+            cards = self.stats["total_crawled"] - crawled
+            self.planner.stats["pages"] += 1
+            logger.info(f"切片 {label} 第 {page_num} 页: {cards} 个职位, 新增 {count} 条")
+            if self.checkpoint:
+                self.checkpoint.page_done(
+                    keyword, count, page_num + 1, SearchUrl.build(self.config, keyword, page_num + 1, filters=filters),
+                    slices=(pending or []) + [filters],
+                )
+            
+            total = self.api_capture.total_count if self.api_capture else None
+            if total is not None:
+                if page_num == 1:
+                    self.planner.record_total(filters, total)
+                if page_num == start_page and self.planner.over_cap(total):
+                    # 接口给出了总数：首页就能判断，不必翻到上限
+                    logger.info(f"切片 {label}: 共 {total} 条，超过翻页上限")
+                    return True
+                last_page = self.planner.pages_needed(total)
+            if page_num >= last_page:
+                break
+            if not self.open_next_results():
+                return False
+            self.throttle()
+        
+        # 翻到上限仍然有下一页；没有接口数据时看最后一页是否满页（抓取条数被 items_per_page 截断时按满页处理）
+        has_more = self.api_capture.has_more if self.api_capture else None
+        full_page = min(self.config.items_per_page, self.config.page_size)
+        return page_num >= self.config.page_cap and (
+            has_more is True or (has_more is None and cards >= full_page)
         )
+    
+    def save_results(self):
+        """保存结果"""
+        # 流式模式：数据已逐页写入，只需关闭文件
+        if self.writer:
+            self.writer.close()
+            if not self.writer.count:
+                logger.warning("没有抓取到任何数据")
+                return
+            logger.info(
+                f"\n✅ 数据保存完成！共 {self.writer.count} 条: {', '.join(self.writer.paths + self.writer.exported)}"
+            )
+            return
         
-        context = self.browser.new_context(
-            viewport=self.config.viewport,
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            locale='zh-CN',
-            timezone_id='Asia/Shanghai',
-            permissions=[]
+        if not self.jobs:
+            logger.warning("没有抓取到任何数据")
+            return
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        with Metrics.timer("write", mode="batch"):
+            # 保存 CSV
+            if self.config.save_csv:
+                csv_file = f"{self.config.output_dir}/boss_jobs_{timestamp}.csv"
+                Utils.save_to_csv(self.jobs, csv_file)
+            
+            # 保存 JSON
+            if self.config.save_json:
+                json_file = f"{self.config.output_dir}/boss_jobs_{timestamp}.json"
+                Utils.save_to_json(self.jobs, json_file)
+        
+        if self.seen_index:
+            for keyword, jobs in self.unmarked.items():
+                self.seen_index.mark(jobs, keyword)
+            self.unmarked.clear()
+        logger.info(f"\n✅ 数据保存完成！共 {len(self.jobs)} 条")
+    
+    def print_stats(self):
+        """打印统计信息"""
+        duration = (self.stats["end_time"] - self.stats["start_time"]).total_seconds()
+        if SelectorCache.active:
+            SelectorCache.active.save()
+            self.stats["selectors"] = SelectorCache.active.summary()
+        
+        logger.info("\n" + "=" * 60)
+        logger.info("📊 爬取统计")
+        logger.info("=" * 60)
+        logger.info(f"总共抓取: {self.stats['total_crawled']} 条")
+        logger.info(f"有效数据: {self.stats['total_valid']} 条")
+        logger.info(f"失败数据: {self.stats['total_failed']} 条")
+        logger.info(f"成功率: {self.stats['total_valid']/max(self.stats['total_crawled'],1)*100:.1f}%")
+        if self.config.incremental:
+            logger.info(f"新职位: {self.stats['total_new']} 条 / 已抓取过: {self.stats['total_known']} 条")
+        logger.info(f"耗时: {duration:.1f} 秒")
+        if "first_page_seconds" in self.stats:
+            logger.info(f"首页结果耗时: {self.stats['first_page_seconds']:.1f} 秒")
+        resources = self.stats.get("resources")
+        if resources:
+            pages = max(self.stats.get("total_pages", 0), 1)
+            logger.info(
+                f"请求: 放行 {resources['allowed_requests']} (平均每页 {resources['allowed_requests'] / pages:.0f}) / "
+                f"拦截 {resources['blocked_requests']} {resources['blocked_by_type']}"
+            )
+            logger.info(
+                f"放行流量: {resources['allowed_bytes'] / 1024:.0f} KB (平均每页 {resources['allowed_bytes'] / pages / 1024:.0f} KB，"
+                f"另有 {resources['unsized_responses']} 个响应没有 content-length)"
+            )
+        selectors = self.stats.get("selectors")
+        if selectors:
+            logger.info(f"选择器: 命中 {selectors['hits']} / 未命中 {selectors['misses']}")
+            for field, selector in selectors["drift"].items():
+                logger.warning(f"  {field} 最近由备用选择器 '{selector}' 命中，页面可能已改版")
+        details = self.stats.get("details")
+        if details:
+            logger.info(
+                f"职位详情: 缓存命中 {details['cache_hits']} / 新抓取 {details['fetched']} / 失败 {details['failed']}, "
+                f"抓取耗时 {details['fetch_seconds']:.1f} 秒"
+            )
+        snapshots = self.stats.get("snapshots")
+        if snapshots and snapshots["pages"]:
+            logger.info(
+                f"页面快照: {snapshots['pages']} 页 (重复 {snapshots['deduplicated']}), "
+                f"原始 {snapshots['raw_bytes'] / 1024:.0f} KB -> 存储 {snapshots['stored_bytes'] / 1024:.0f} KB"
+            )
+        near_dups = self.stats.get("near_dups")
+        if near_dups:
+            logger.info(
+                f"近似重复: 检查 {near_dups['checked']} 条, 归入已有重复组 {near_dups['matched']} 条, "
+                f"丢弃 {near_dups['dropped']} 条, 平均候选 {near_dups['candidates'] / max(near_dups['checked'], 1):.1f} 个"
+            )
+        planner = self.stats.get("planner")
+        if planner:
+            logger.info(
+                f"查询拆分: 切片 {planner['slices']} / 拆分 {planner['splits']} / 无法再拆 {planner['capped']} / "
+                f"覆盖缺口 {planner['gaps']}, "
+                f"翻页 {planner['pages']} 次, 重复职位 {planner['duplicates']} 条"
+            )
+        resilience = self.stats.get("resilience")
+        if resilience and resilience["failures"]:
+            logger.info(
+                f"重试: 失败 {resilience['failures']} 次 (拦截 {resilience['blocks']}) / 重试 {resilience['retries']} / "
+                f"放弃 {resilience['gave_up']} / 熔断 {resilience['trips']} (换上下文 {resilience['rotations']}), "
+                f"损失 {resilience['lost_seconds']:.1f} 秒 ({resilience['lost_seconds'] / max(duration, 1e-9) * 100:.1f}%)"
+            )
+        pacing = self.stats.get("pacing")
+        if pacing:
+            logger.info(
+                f"节奏: 就绪等待 {pacing['ready_seconds']:.1f} 秒 / 页间延迟 {pacing['sleep_seconds']:.1f} 秒, "
+                f"超时 {pacing['timeouts']} / 慢响应 {pacing['slow_responses']} / 拦截页 {pacing['block_pages']}, "
+                f"当前延迟倍数 {pacing['factor']}"
+            )
+        if Metrics.active:
+            # 墙钟时间去向：人为等待与实际工作分开统计
+            spent = {
+                label: sum(Metrics.active.totals(name).values())
+                for name, label in (("navigation", "导航"), ("wait", "等待加载"), ("parse", "解析"),
+                                    ("write", "写入"), ("detail_fetch", "详情"), ("sleep", "主动休眠"))
+            }
+            logger.info("耗时分布: " + ", ".join(f"{label} {seconds:.1f}s" for label, seconds in spent.items() if seconds))
+            for kind, seconds in Metrics.active.totals("sleep").items():
+                logger.info(f"  休眠 {kind}: {seconds:.1f}s")
+            fallbacks = {labels[0][1]: count for (name, labels), count in Metrics.active.counters.items()
+                         if name == "selector_fallbacks"}
+            if fallbacks:
+                logger.info(f"备用选择器命中: {fallbacks}")
+        for worker_id, worker_stats in self.stats.get("workers", {}).items():
+            logger.info(
+                f"  worker-{worker_id}: 抓取 {worker_stats['total_crawled']} / "
+                f"有效 {worker_stats['total_valid']} / 失败 {worker_stats['total_failed']}"
+            )
+        logger.info("=" * 60)
+
+
+# pool.py - 多上下文并行爬取
+import asyncio
+
+
+class PolitenessScheduler:
+    """全局请求节流：所有 worker 共享每分钟请求预算（线程安全）"""
+    
+    def __init__(self, requests_per_minute: float, jitter: float = 0.3):
+        self.interval = 60.0 / max(requests_per_minute, 0.1)
+        self.jitter = jitter
+        self.waited = 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """预订下一个请求时间点，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            interval = self.interval * Utils.sleep_scale
+            self._next_slot = slot + interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            wait = slot - now
+            self.waited += wait
+        Metrics.observe("sleep", wait, kind="scheduler")
+        return wait
+    
+    def acquire(self) -> float:
+        """阻塞到下一个可用请求时间点，返回等待秒数"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    async def acquire_async(self) -> float:
+        """acquire 的异步版本，等待期间不阻塞事件循环"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class SpiderPool(BossSpider):
+    """
+    并行爬取：一个浏览器、N 个隔离上下文，每个 worker 处理自己的关键词队列
+    worker 各自通过 CDP 连接同一个浏览器（sync API 不能跨线程共享对象）
+    """
+    
+    def __init__(self, config: SpiderConfig = None):
+        super().__init__(config)
+        self.scheduler = PolitenessScheduler(self.config.requests_per_minute)
+        self.workers: Dict[int, BossSpider] = {}
+    
+    def run_worker(self, worker_id: int, keywords: List[str], endpoint: str):
+        """worker 线程：独立 playwright 实例 + 独立上下文"""
+        spider = BossSpider(self.config, pool=self)
+        spider.scheduler = self.scheduler
+        spider.writer = self.writer
+        spider.checkpoint = self.checkpoint
+        spider.detail_fetcher = self.detail_fetcher
+        spider.snapshots = self.snapshots
+        # 一个 worker 被拦截时其余 worker 也一起暂停
+        spider.resilience.breaker = self.resilience.breaker
+        spider.resilience.stats = spider.stats["resilience"] = self.resilience.stats
+        self.workers[worker_id] = spider
+        
+        with sync_playwright() as playwright:
+            try:
+                spider.browser = playwright.chromium.connect_over_cdp(endpoint)
+                spider.open_page(spider.browser, f"worker-{worker_id}")
+                spider.warm_up()
+                if spider.detail_fetcher:
+                    spider.detail_fetcher.set_cookies(spider.context.cookies())
+                for idx, keyword in enumerate(keywords):
+                    try:
+                        spider.crawl_keyword(keyword, first_search=(idx == 0))
+                    except Exception as e:
+                        logger.error(f"worker-{worker_id} 关键词 {keyword} 出错: {e}")
+            except Exception as e:
+                logger.error(f"worker-{worker_id} 运行出错: {e}", exc_info=True)
+            finally:
+                if spider.context:
+                    SessionState.save(spider.context, spider.config)
+                    spider.context.close()
+    
+    def run(self, resume: bool = False):
+        """运行上下文池"""
+        self.stats["start_time"] = datetime.now()
+        keywords = self.prepare_run(resume)
+        num_workers = max(min(self.config.workers, len(keywords)), 1)
+        logger.info("=" * 60)
+        logger.info(f"Boss 直聘爬虫启动（并行模式: {num_workers} 个上下文）")
+        logger.info(f"搜索关键词: {', '.join(self.config.keywords)}")
+        logger.info(f"全局请求预算: {self.config.requests_per_minute} 次/分钟")
+        logger.info("=" * 60)
+        
+        with sync_playwright() as playwright:
+            try:
+                if self.config.cdp_endpoint:
+                    # worker 直接连接已运行的浏览器，这里的连接只用于保持浏览器可用
+                    self.browser = playwright.chromium.connect_over_cdp(self.config.cdp_endpoint)
+                    endpoint = self.config.cdp_endpoint
+                else:
+                    self.browser = self.launch_browser(
+                        playwright, [f'--remote-debugging-port={self.config.debug_port}']
+                    )
+                    endpoint = f"http://127.0.0.1:{self.config.debug_port}"
+                
+                # 关键词轮流分配给各 worker
+                threads = [
+                    threading.Thread(
+                        target=self.run_worker,
+                        args=(worker_id, keywords[worker_id::num_workers], endpoint),
+                        name=f"worker-{worker_id}",
+                    )
+                    for worker_id in range(num_workers)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                
+                # 合并结果
+                for worker_id, spider in sorted(self.workers.items()):
+                    self.jobs.extend(spider.jobs)
+                    for keyword, jobs in spider.unmarked.items():
+                        self.unmarked.setdefault(keyword, []).extend(jobs)
+                    for key in ("total_pages", "total_crawled", "total_valid", "total_failed", "total_new", "total_known"):
+                        self.stats[key] += spider.stats[key]
+                self.stats["workers"] = {
+                    worker_id: spider.stats for worker_id, spider in sorted(self.workers.items())
+                }
+                if self.config.block_resources:
+                    self.stats["resources"] = ResourcePolicy.merge(
+                        [spider.stats["resources"] for spider in self.workers.values() if "resources" in spider.stats]
+                    )
+                
+                self.save_results()
+                self.finish_run()
+                
+            except Exception as e:
+                logger.error(f"爬虫运行出错: {e}", exc_info=True)
+            finally:
+                self.close_services()
+                self.stats["end_time"] = datetime.now()
+                self.print_stats()
+                logger.info(f"调度器节流等待: {self.scheduler.waited:.1f} 秒")
+                if self.browser:
+                    self.browser.close()
+
+
+# task_queue.py - 分布式任务队列
+import socket
+import multiprocessing
+
+
+class TaskQueue:
+    """
+    共享任务队列（SQLite，WAL 模式），每个任务是一个 (关键词, 城市, 页码)
+    worker 以租约方式领取任务：租约到期未完成的任务会被重新领取，失败的任务重试到 max_retries 次
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 自己管理事务，领取任务时用 BEGIN IMMEDIATE 保证多进程下不会重复领取
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                keyword TEXT NOT NULL,
+                city TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_until REAL,
+                emitted INTEGER,
+                error TEXT,
+                updated TEXT,
+                UNIQUE (keyword, city, page)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, id)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS outputs (
+                path TEXT PRIMARY KEY,
+                worker TEXT NOT NULL
+            )
+        """)
+    
+    @staticmethod
+    def now_text() -> str:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    @classmethod
+    def expand(cls, config: SpiderConfig) -> List[tuple]:
+        """协调者：把关键词 × 城市 × 页码展开成任务"""
+        return [
+            (keyword, city, page)
+            for keyword in config.keywords
+            for city in config.queue_cities
+            for page in range(1, config.max_pages + 1)
+        ]
+    
+    def enqueue(self, tasks: List[tuple]) -> int:
+        """加入任务（已存在的任务保持原状态），返回新增数量"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO tasks (keyword, city, page, updated) VALUES (?, ?, ?, ?)",
+            [(keyword, city, page, self.now_text()) for keyword, city, page in tasks],
+        )
+        self.conn.execute("COMMIT")
+        return self.conn.total_changes - before
+    
+    def lease(self, worker: str, lease_seconds: float, max_attempts: int = None) -> Optional[Dict]:
+        """
+        原子地领取一个待处理或租约已过期的任务，没有可领取的任务时返回 None
+        worker 崩溃时走不到 fail()：租约过期且已领取 max_attempts 次的任务直接标记为 failed，不再发出
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if max_attempts:
+                expired = self.conn.execute(
+                    "UPDATE tasks SET status = 'failed', error = ?, lease_until = NULL, updated = ? "
+                    "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                    (f"租约过期 {max_attempts} 次（worker 未完成任务就退出）", self.now_text(), now, max_attempts),
+                ).rowcount
+                if expired:
+                    logger.warning(f"{expired} 个任务的租约已过期 {max_attempts} 次，标记为失败")
+            row = self.conn.execute(
+                """
+                SELECT id, keyword, city, page, attempts FROM tasks
+                WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?)
+                ORDER BY page, id LIMIT 1
+                """,
+                (now,),
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "updated = ? WHERE id = ?",
+                (worker, now + lease_seconds, self.now_text(), row[0]),
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        task_id, keyword, city, page, attempts = row
+        return {"id": task_id, "keyword": keyword, "city": city, "page": page, "attempts": attempts + 1}
+    
+    def complete(self, task_id: int, worker: str, emitted: int) -> bool:
+        """标记任务完成；租约已被其他 worker 接手时返回 False（结果按职位 ID 在合并时去重）"""
+        cursor = self.conn.execute(
+            "UPDATE tasks SET status = 'done', emitted = ?, error = NULL, lease_until = NULL, updated = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (emitted, self.now_text(), task_id, worker),
+        )
+        return cursor.rowcount == 1
+    
+    def fail(self, task_id: int, worker: str, error: str, max_attempts: int) -> str:
+        """任务失败：已领取次数未达到 max_attempts（首次 + 重试次数）时放回队列，否则标记为 failed，返回新状态"""
+        row = self.conn.execute("SELECT attempts FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        status = "failed" if row and row[0] >= max_attempts else "pending"
+        self.conn.execute(
+            "UPDATE tasks SET status = ?, error = ?, lease_until = NULL, updated = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (status, error[:500], self.now_text(), task_id, worker),
+        )
+        return status
+    
+    def skip_rest(self, keyword: str, city: str, page: int) -> int:
+        """某页已是最后一页：把同一查询后面还没开始的页标记为 skipped"""
+        cursor = self.conn.execute(
+            "UPDATE tasks SET status = 'skipped', updated = ? "
+            "WHERE keyword = ? AND city = ? AND page > ? AND status = 'pending'",
+            (self.now_text(), keyword, city, page),
+        )
+        return cursor.rowcount
+    
+    def unfinished(self) -> int:
+        """还在排队或被领取中的任务数"""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status IN ('pending', 'leased')"
+        ).fetchone()[0]
+    
+    def counts(self) -> Dict[str, int]:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"))
+    
+    def add_outputs(self, paths: List[str], worker: str):
+        """登记 worker 的结果文件，合并时读取"""
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO outputs (path, worker) VALUES (?, ?)",
+            [(os.path.abspath(path), worker) for path in paths],
+        )
+    
+    def outputs(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT path FROM outputs ORDER BY path")]
+    
+    def close(self):
+        self.conn.close()
+
+
+class QueueWorker(BossSpider):
+    """
+    队列 worker：独立进程、独立浏览器，循环领取任务并按页码直接打开结果页
+    结果写入 output_dir/queue_<worker>.*，所有任务完成后由 merge_queue_results 合并
+    """
+    
+    def __init__(self, config: SpiderConfig = None, worker_id: str = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        config = config or SpiderConfig()
+        # 进度由队列记录，不使用单机断点；快照存储只允许单进程写入，每个 worker 一个目录
+        # 复制一份配置，不改动调用方传入的对象
+        super().__init__(dataclasses.replace(
+            config, checkpoint=False,
+            snapshot_dir=os.path.join(config.output_dir, f"snapshots_{self.safe_id}"),
+        ))
+        self.queue = TaskQueue(self.config.queue_db)
+        self.stats["tasks_done"] = 0
+        self.stats["tasks_failed"] = 0
+    
+    @property
+    def safe_id(self) -> str:
+        return re.sub(r"[^\w.-]", "_", self.worker_id)
+    
+    def open_writer(self, basename: str = None):
+        super().open_writer(basename or f"queue_{self.safe_id}")
+        if self.writer:
+            self.queue.add_outputs(self.writer.paths, self.worker_id)
+    
+    def run_task(self, task: Dict) -> int:
+        """抓取一个任务对应的结果页，返回输出条数；拦截页抛出异常交给重试"""
+        keyword, city, page_num = task["keyword"], task["city"], task["page"]
+        self.current_keyword = keyword
+        logger.info(f"[{self.worker_id}] 任务 #{task['id']}: {keyword} / {city} / 第 {page_num} 页 (第 {task['attempts']} 次)")
+        
+        if not self.open_results(keyword, page_num, city):
+            skipped = self.queue.skip_rest(keyword, city, page_num)
+            logger.info(f"第 {page_num} 页没有职位，跳过后续 {skipped} 页")
+            return 0
+        
+        emitted = self.crawl_current_page()
+        if (self.api_capture and self.api_capture.has_more is False) or self.should_stop_early(keyword):
+            skipped = self.queue.skip_rest(keyword, city, page_num)
+            if skipped:
+                logger.info(f"已到最后一页，跳过后续 {skipped} 页")
+        return emitted
+    
+    def run(self, resume: bool = False):
+        """领取任务直到队列中没有排队或被领取的任务"""
+        self.stats["start_time"] = datetime.now()
+        logger.info("=" * 60)
+        logger.info(f"队列 worker {self.worker_id} 启动: {self.config.queue_db}")
+        logger.info("=" * 60)
+        
+        with sync_playwright() as playwright:
+            try:
+                self.prepare_run(resume)
+                self.setup_browser(playwright)
+                self.warm_up()
+                if self.detail_fetcher:
+                    self.detail_fetcher.set_cookies(self.context.cookies())
+                
+                while True:
+                    task = self.queue.lease(
+                        self.worker_id, self.config.queue_lease_seconds, self.config.max_retries + 1
+                    )
+                    if task is None:
+                        # 其他 worker 领取的任务可能因租约过期回到队列
+                        if not self.queue.unfinished():
+                            break
+                        time.sleep(self.config.queue_poll_seconds)
+                        continue
+                    try:
+                        emitted = self.run_task(task)
+                        self.queue.complete(task["id"], self.worker_id, emitted)
+                        self.stats["tasks_done"] += 1
+                    except Exception as e:
+                        status = self.queue.fail(task["id"], self.worker_id, str(e), self.config.max_retries + 1)
+                        self.stats["tasks_failed"] += 1
+                        logger.error(f"任务 #{task['id']} 失败 ({status}): {e}")
+                    self.throttle()
+                
+                self.save_results()
+                
+            except Exception as e:
+                logger.error(f"队列 worker 运行出错: {e}", exc_info=True)
+            finally:
+                self.close_services()
+                self.stats["end_time"] = datetime.now()
+                self.print_stats()
+                logger.info(
+                    f"任务: 完成 {self.stats['tasks_done']} / 失败 {self.stats['tasks_failed']}, "
+                    f"队列状态 {self.queue.counts()}"
+                )
+                self.queue.close()
+                self.close_browser()
+
+
+def run_queue_worker(config: SpiderConfig, worker_id: str = None):
+    """子进程入口（需要可被 pickle 的顶层函数）"""
+    QueueWorker(config, worker_id).run()
+
+
+def init_queue(config: SpiderConfig) -> int:
+    """协调者：展开任务写入队列，返回新增任务数"""
+    queue = TaskQueue(config.queue_db)
+    added = queue.enqueue(TaskQueue.expand(config))
+    logger.info(f"任务队列 {config.queue_db}: 新增 {added} 个任务, 当前状态 {queue.counts()}")
+    queue.close()
+    return added
+
+
+def run_queue_workers(config: SpiderConfig, processes: int = 1):
+    """在本机启动多个 worker 进程，每个进程一个浏览器"""
+    if processes <= 1:
+        run_queue_worker(config)
+        return
+    host = socket.gethostname()
+    children = [
+        multiprocessing.Process(target=run_queue_worker, args=(config, f"{host}-{i}"), name=f"queue-worker-{i}")
+        for i in range(processes)
+    ]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+
+
+def merge_queue_results(config: SpiderConfig) -> Optional[str]:
+    """合并所有 worker 的结果文件，按职位 ID（无链接时按内容哈希）去重，返回合并后的文件名前缀"""
+    import pandas as pd
+    
+    queue = TaskQueue(config.queue_db)
+    paths, counts = queue.outputs(), queue.counts()
+    queue.close()
+    if counts.get("pending") or counts.get("leased"):
+        logger.warning(f"队列还有未完成的任务: {counts}")
+    
+    # 同一个 worker 的多种格式内容相同，每个 worker 只读一种
+    by_base = {}
+    for path in paths:
+        base, ext = os.path.splitext(path)
+        by_base.setdefault(base, {})[ext] = path
+    frames = []
+    for base, files in sorted(by_base.items()):
+        if ".jsonl" in files and os.path.exists(files[".jsonl"]):
+            frames.append(pd.read_json(files[".jsonl"], lines=True, dtype=False))
+        elif ".csv" in files and os.path.exists(files[".csv"]):
+            frames.append(pd.read_csv(files[".csv"], dtype=str, keep_default_na=False))
+        elif ".parquet" in files:
+            parts = sorted(glob.glob(f"{glob.escape(base)}.part-*.parquet"))
+            frames.extend(pd.read_parquet(part) for part in parts)
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        logger.warning("没有可合并的结果")
+        return None
+    
+    df = pd.concat(frames, ignore_index=True)
+    total = len(df)
+    df = df.loc[~df.apply(SeenJobsIndex.record_id, axis=1).duplicated()]
+    basename = f"{config.output_dir}/boss_jobs_merged_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    if config.save_csv:
+        df.to_csv(f"{basename}.csv", index=False, encoding="utf-8-sig")
+    if config.save_json:
+        df.to_json(f"{basename}.json", orient="records", force_ascii=False, indent=2)
+    logger.info(f"合并 {len(by_base)} 个 worker 的结果: {total} 条, 去重后 {len(df)} 条 -> {basename}")
+    return basename
+
+
+# daemon.py - 定时调度
+import signal
+import dataclasses
+
+
+@dataclass
+class ScheduledJob:
+    """定时爬取任务：一份爬虫配置（关键词等）和运行间隔"""
+    name: str
+    config: SpiderConfig
+    interval_minutes: float = 60.0
+    priority: int = 0  # 数值越大越先运行
+    max_runtime_minutes: float = None  # 默认等于间隔；超时后在页间停下，下次从断点继续
+    next_run: float = 0.0  # time.time() 时间点，0 表示启动后立即运行
+    runs: int = 0
+    overruns: int = 0
+    shed: int = 0  # 因积压被放弃的次数
+    last_duration: float = None
+    last_emitted: int = None
+    
+    def __post_init__(self):
+        if self.max_runtime_minutes is None:
+            self.max_runtime_minutes = self.interval_minutes
+    
+    @property
+    def interval(self) -> float:
+        return self.interval_minutes * 60
+
+
+class CrawlDaemon:
+    """
+    常驻调度器：保持一个已启动的浏览器，按间隔和优先级运行到期的爬取任务
+    - 每个任务在常驻浏览器中新建自己的上下文（省去的是浏览器启动，不是会话预热；会话靠 reuse_session 保存）
+    - 同一个任务不会重叠运行，同时运行的任务数不超过 max_concurrent
+    - 任务超过运行时间上限时在页间停下，下一次从断点继续
+    - 没有空闲槽位且已落后超过一个间隔的任务本轮放弃，避免积压越来越多
+    - 进程级状态由调度器统一设置：所有任务共用一个选择器缓存文件和一份指标（由调度器导出）；
+      回放任务会把等待比例改为 0，只在没有其他任务运行时单独运行
+    """
+    
+    def __init__(self, jobs: List[ScheduledJob], config: SpiderConfig = None, max_concurrent: int = 1,
+                 poll_seconds: float = 5.0):
+        self.config = config or SpiderConfig()  # 浏览器相关参数
+        self.jobs = jobs
+        self.max_concurrent = max(max_concurrent, 1)
+        self.poll_seconds = poll_seconds
+        self.running: Dict[str, tuple] = {}  # 任务名 -> (线程, 爬虫, 开始时间)
+        self.endpoint: Optional[str] = None
+        self.stats = {key: 0 for key in MetricsExporter.GAUGE_KEYS}  # 已完成运行的合计
+        self.metrics_exporter: Optional[MetricsExporter] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_file(cls, path: str) -> "CrawlDaemon":
+        """
+        从 JSON 读取调度表:
+        {"browser": {SpiderConfig 参数}, "max_concurrent": 1,
+         "jobs": [{"name": "python", "interval_minutes": 60, "priority": 1, "config": {"keywords": ["Python"]}}]}
+        browser 中的参数同时作为每个任务配置的默认值；每个任务默认输出到 <browser.output_dir>/<name>
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            schedule = json.load(f)
+        defaults = schedule.get("browser", {})
+        base = SpiderConfig(**defaults)
+        jobs = []
+        for item in schedule["jobs"]:
+            options = {**defaults, "output_dir": os.path.join(base.output_dir, item["name"]), **item.get("config", {})}
+            jobs.append(ScheduledJob(
+                name=item["name"],
+                config=SpiderConfig(**options),
+                interval_minutes=item.get("interval_minutes", 60.0),
+                priority=item.get("priority", 0),
+                max_runtime_minutes=item.get("max_runtime_minutes"),
+            ))
+        return cls(jobs, base, schedule.get("max_concurrent", 1), schedule.get("poll_seconds", 5.0))
+    
+    def due_jobs(self, now: float) -> List[ScheduledJob]:
+        """到期且没有在运行的任务，按优先级、再按到期先后排序"""
+        due = [job for job in self.jobs if job.next_run <= now and job.name not in self.running]
+        return sorted(due, key=lambda job: (-job.priority, job.next_run))
+    
+    def run_job(self, job: ScheduledJob, spider: BossSpider, started: float):
+        """任务线程：连接常驻浏览器，从上次断点继续爬取"""
+        try:
+            spider.run(resume=True)
+        except Exception as e:
+            logger.error(f"任务 {job.name} 出错: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self.finish_job(job, spider, started)
+    
+    @staticmethod
+    def exclusive(job: ScheduledJob) -> bool:
+        """回放任务修改进程级的等待比例，不能和其他任务同时运行"""
+        return bool(job.config.har_replay)
+    
+    def can_start(self, job: ScheduledJob) -> bool:
+        if not self.running:
+            return True
+        return not self.exclusive(job) and not any(
+            spider.config.har_replay for thread, spider, started in self.running.values()
+        )
+    
+    def start_job(self, job: ScheduledJob):
+        # 每个任务在常驻浏览器中使用自己的上下文，路由和响应监听互不叠加，结束时随 close_browser 关闭
+        # 选择器缓存和指标是进程级的：所有任务共用调度器的缓存文件，指标由调度器统一导出
+        config = dataclasses.replace(
+            job.config, cdp_endpoint=self.endpoint, own_context=True, interactive=False,
+            selector_stats=self.config.selector_stats, metrics=False,
+        )
+        spider = BossSpider(config)
+        spider.deadline = time.monotonic() + job.max_runtime_minutes * 60
+        started = time.time()
+        lateness = started - job.next_run if job.next_run else 0.0
+        logger.info(f"⏰ 开始任务 {job.name} (优先级 {job.priority}, 延后 {lateness:.0f} 秒)")
+        thread = threading.Thread(target=self.run_job, args=(job, spider, started), name=f"job-{job.name}")
+        self.running[job.name] = (thread, spider, started)
+        thread.start()
+    
+    def finish_job(self, job: ScheduledJob, spider: BossSpider, started: float):
+        """记录本次运行并安排下一次：正常时按固定间隔，超时时从结束时间起算，不追赶错过的轮次"""
+        finished = time.time()
+        job.runs += 1
+        job.last_duration = finished - started
+        job.last_emitted = spider.writer.count if spider.writer else len(spider.jobs)
+        for key in self.stats:
+            self.stats[key] += spider.stats.get(key, 0)
+        job.next_run = started + job.interval
+        if job.last_duration > job.max_runtime_minutes * 60 or job.next_run < finished:
+            job.overruns += 1
+            job.next_run = finished + job.interval
+            logger.warning(f"任务 {job.name} 超时 ({job.last_duration:.0f} 秒)，下次运行推迟到一个间隔之后")
+        self.running.pop(job.name, None)
+        logger.info(
+            f"✅ 任务 {job.name} 完成: {job.last_emitted} 条, 耗时 {job.last_duration:.0f} 秒, "
+            f"下次 {datetime.fromtimestamp(job.next_run).strftime('%H:%M:%S')}"
+        )
+    
+    def shed(self, job: ScheduledJob, now: float):
+        """没有空闲槽位时，落后超过一个间隔的任务放弃本轮"""
+        # next_run 为 0 的任务还没运行过，一直等到有空闲槽位
+        if job.next_run and now - job.next_run > job.interval:
+            job.shed += 1
+            job.next_run = now + job.interval
+            logger.warning(f"任务 {job.name} 积压超过一个间隔，放弃本轮")
+    
+    def tick(self):
+        """检查一次调度表：启动到期任务，处理积压"""
+        with self._lock:
+            now = time.time()
+            due = self.due_jobs(now)
+            free = self.max_concurrent - len(self.running)
+            for i, job in enumerate(due):
+                if free <= 0:
+                    for waiting in due[i:]:
+                        self.shed(waiting, now)
+                    break
+                if not self.can_start(job):
+                    # 等正在运行的任务结束；后面的任务也不抢先启动，避免该任务一直等不到
+                    break
+                self.start_job(job)
+                free -= 1
+            self.save_status()
+    
+    def save_status(self):
+        """把各任务状态写到 <output_dir>/daemon_status.json"""
+        status = {
+            "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "jobs": [
+                {
+                    "name": job.name,
+                    "running": job.name in self.running,
+                    "next_run": datetime.fromtimestamp(job.next_run).strftime("%Y-%m-%d %H:%M:%S") if job.next_run else None,
+                    **{key: getattr(job, key) for key in ("priority", "runs", "overruns", "shed", "last_duration", "last_emitted")},
+                }
+                for job in self.jobs
+            ],
+        }
+        path = os.path.join(self.config.output_dir, "daemon_status.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(status, f, ensure_ascii=False, indent=2)
+        os.replace(f"{path}.tmp", path)
+    
+    def stop(self, *args):
+        """停止调度；运行中的任务在当前页结束后停下"""
+        self._stop.set()
+        for thread, spider, started in list(self.running.values()):
+            spider.deadline = 0.0
+    
+    def run(self):
+        logger.info("=" * 60)
+        logger.info(f"调度器启动: {len(self.jobs)} 个任务, 最多同时运行 {self.max_concurrent} 个")
+        for job in sorted(self.jobs, key=lambda job: -job.priority):
+            logger.info(f"  {job.name}: 每 {job.interval_minutes:g} 分钟, 优先级 {job.priority}, 关键词 {job.config.keywords}")
+        logger.info("=" * 60)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+        if self.config.metrics:
+            self.metrics_exporter = MetricsExporter(self.config, Metrics.activate(), self.stats)
+            self.metrics_exporter.start()
+        
+        with sync_playwright() as playwright:
+            browser = None
+            try:
+                while not self._stop.is_set():
+                    # 常驻浏览器：任务线程通过 CDP 连接；浏览器意外退出时重新启动
+                    if self.config.cdp_endpoint:
+                        self.endpoint = self.config.cdp_endpoint
+                    elif browser is None or not browser.is_connected():
+                        if self.running:
+                            self._stop.wait(self.poll_seconds)
+                            continue
+                        logger.info("正在启动常驻浏览器...")
+                        browser = BossSpider(self.config).launch_browser(
+                            playwright, [f"--remote-debugging-port={self.config.debug_port}"]
+                        )
+                        self.endpoint = f"http://127.0.0.1:{self.config.debug_port}"
+                    self.tick()
+                    self._stop.wait(self.poll_seconds)
+            except KeyboardInterrupt:
+                logger.info("收到中断，等待运行中的任务停下...")
+                self.stop()
+            finally:
+                for thread, spider, started in list(self.running.values()):
+                    thread.join()
+                self.save_status()
+                if self.metrics_exporter:
+                    self.metrics_exporter.stop()
+                if browser:
+                    browser.close()
+
+
+# async_spider.py - 异步爬虫
+from pathlib import Path
+from playwright.async_api import async_playwright
+
+
+class AsyncUtils:
+    """Utils 中阻塞操作的异步版本"""
+    
+    @staticmethod
+    async def random_sleep(min_sec: float = 1, max_sec: float = 3):
+        """随机延迟（不阻塞事件循环）"""
+        delay = random.uniform(min_sec, max_sec) * Utils.sleep_scale
+        Metrics.observe("sleep", delay, kind="random")
+        await asyncio.sleep(delay)
+    
+    @staticmethod
+    async def human_mouse_move(page):
+        """模拟人类鼠标移动"""
+        for _ in range(random.randint(2, 4)):
+            x = random.randint(100, 1200)
+            y = random.randint(100, 800)
+            await page.mouse.move(x, y, steps=random.randint(5, 15))
+            await asyncio.sleep(random.uniform(0.1, 0.3) * Utils.sleep_scale)
+
+
+class AsyncBossSpider:
+    """
+    基于 playwright.async_api 的爬虫，配置和输出与 BossSpider 相同
+    每个关键词在独立上下文中运行，最多 config.workers 个同时进行
+    """
+    
+    # 以下方法只依赖 config / jobs / stats，直接复用同步版本
+    # launch_browser 在异步 API 下返回 awaitable
+    launch_browser = BossSpider.launch_browser
+    context_options = BossSpider.context_options
+    _write_results = BossSpider.save_results
+    print_stats = BossSpider.print_stats
+    emit = BossSpider.emit
+    should_stop_early = BossSpider.should_stop_early
+    next_position = BossSpider.next_position
+    open_writer = BossSpider.open_writer
+    prepare_run = BossSpider.prepare_run
+    finish_run = BossSpider.finish_run
+    start_metrics = BossSpider.start_metrics
+    close_services = BossSpider.close_services
+    save_snapshot = BossSpider.save_snapshot
+    
+    def __init__(self, config: SpiderConfig = None):
+        self.config = config or SpiderConfig()
+        self.jobs: List[Dict] = []
+        self.browser = None
+        self.scheduler = PolitenessScheduler(self.config.requests_per_minute) if self.config.workers > 1 else None
+        self.resource_policy = ResourcePolicy(self.config) if self.config.block_resources else None
+        self.pacer = Pacer(self.config) if self.config.adaptive_pacing else None
+        self.seen_index = SeenJobsIndex(self.config.seen_db) if self.config.incremental else None
+        self.unmarked: Dict[str, List[Dict]] = {}  # 批量模式下已输出、待保存后记为已抓取的新职位（按关键词）
+        self.known_ratio: Dict[str, float] = {}
+        self.writer: Optional[ResultWriter] = None
+        self.checkpoint: Optional[Checkpoint] = None
+        self.detail_fetcher: Optional[DetailFetcher] = None
+        self.metrics_exporter: Optional[MetricsExporter] = None
+        self.session_state: Optional[str] = None
+        self.planner = None  # 异步爬虫不做查询拆分
+        self.current_filters = None
+        self.run_ids: Optional[set] = None
+        self.dedup = (
+            NearDuplicateIndex(self.config.near_dup_db, self.config.near_dup_threshold) if self.config.near_dedup else None
+        )
+        self.snapshots: Optional[SnapshotStore] = None
+        self.saved_sleep_scale: Optional[float] = None  # 回放模式临时关闭等待，结束时恢复
+        self.resilience = Resilience(self.config)  # 各关键词的上下文共用一个熔断器，熔断时只暂停
+        self._emit_lock = threading.Lock()  # emit 在线程池中运行，各关键词的输出依次进行
+        if self.config.split_queries:
+            logger.warning("异步爬虫不支持查询拆分，按 max_pages 翻页")
+        self.stats = {
+            "total_pages": 0,
+            "total_crawled": 0,
+            "total_valid": 0,
+            "total_failed": 0,
+            "total_new": 0,
+            "total_known": 0,
+            "start_time": None,
+            "end_time": None
+        }
+        if self.planner:
+            self.stats["planner"] = self.planner.stats
+        if self.dedup:
+            self.stats["near_dups"] = self.dedup.stats
+        self.stats["resilience"] = self.resilience.stats
+        if self.pacer:
+            self.stats["pacing"] = self.pacer.stats
+        if self.config.selector_cache:
+            SelectorCache.activate(self.config.selector_stats)
+    
+    async def throttle(self):
+        """页间延迟；并发时由全局调度器在导航前统一节流"""
+        if self.scheduler is not None:
+            # 并发时平时由调度器节流，只有退避时才额外等待
+            if self.pacer and self.pacer.factor > 1:
+                await asyncio.sleep(self.pacer.next_delay())
+            return
+        if self.pacer:
+            await asyncio.sleep(self.pacer.next_delay())
+        else:
+            await AsyncUtils.random_sleep(self.config.min_delay, self.config.max_delay)
+    
+    async def wait_for_results(self, page, previous: str = None) -> bool:
+        """等待职位列表加载（previous 为翻页前的卡片签名），返回是否加载成功"""
+        if self.pacer:
+            if not await self.pacer.wait_ready_async(page, previous):
+                logger.warning("等待职位列表超时，尝试继续...")
+                return False
+            return True
+        
+        await AsyncUtils.random_sleep(5, 8)
+        try:
+            with Metrics.timer("wait", ready="fixed"):
+                await page.wait_for_selector(Selectors.JOB_LIST[0], timeout=15000)
+            return True
+        except:
+            logger.warning("等待职位列表超时，尝试继续...")
+            return False
+    
+    async def open_results(self, page, keyword: str, page_num: int, capture: ApiCapture = None) -> bool:
+        """直接打开某个关键词的第 page_num 页结果"""
+        url = SearchUrl.build(self.config, keyword, page_num)
+        return await self.resilience.run_async("navigation", self.load_results, page, url, capture)
+    
+    async def load_results(self, page, url: str, capture: ApiCapture = None) -> bool:
+        """load_results 的异步版本"""
+        if capture:
+            capture.reset()
+        previous = await self.pacer.card_signature_async(page) if self.pacer else None
+        await self.acquire_slot()
+        with Metrics.timer("navigation", kind="results"):
+            await page.goto(url, timeout=30000)
+        if Pacer.is_block_url(page.url):
+            if self.pacer:
+                self.pacer.observe(0, blocked=True)
+            raise BlockedError(f"被重定向到验证页: {page.url}")
+        if await self.wait_for_results(page, previous):
+            return True
+        if await Pacer.is_block_page_async(page):
+            raise BlockedError(f"加载结果页时遇到验证/拦截页: {page.url}")
+        return False
+    
+    async def open_next_results(self, page, keyword: str, page_num: int, capture: ApiCapture = None) -> bool:
+        """按页码直接打开下一页；接口已表明没有更多结果或页面没有职位时返回 False"""
+        if capture and capture.has_more is False:
+            logger.info(f"{keyword}: 已到最后一页")
+            return False
+        return await self.open_results(page, keyword, page_num, capture)
+    
+    async def acquire_slot(self):
+        if self.scheduler is not None:
+            await self.scheduler.acquire_async()
+    
+    async def open_page(self, name: str = "main"):
+        """新建独立上下文和页面（name 为录制文件名）"""
+        context = await self.browser.new_context(
+            **self.context_options(), **HarArchive.record_options(self.config, name),
+            **({"storage_state": self.session_state} if self.session_state else {}),
         )
-        
-        self.page = context.new_page()
-        
-        # 注入反检测脚本
-        self.page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {get: () => false});
-            Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
-            Object.defineProperty(navigator, 'languages', {get: () => ['zh-CN', 'zh', 'en']});
-            window.chrome = {
-                runtime: {},
-                app: {},
-                csi: function() {},
-                loadTimes: function() {}
-            };
-        """)
-        
-        logger.info("浏览器启动成功")
+        if self.config.har_replay:
+            await HarArchive.replay_async(context, self.config.har_replay)
+        elif self.resource_policy:
+            # 所有上下文共用一个策略，统计即为整次运行的合计
+            await self.resource_policy.attach_async(context)
+            self.stats["resources"] = self.resource_policy.stats
+        page = await context.new_page()
+        await page.add_init_script(BossSpider.STEALTH_SCRIPT)
+        capture = None
+        if self.config.capture_api:
+            capture = ApiCapture()
+            capture.attach(page)
+        return context, page, capture
     
-    def close_popups(self):
+    async def close_popups(self, page):
         """关闭可能出现的弹窗"""
-        for selector in Selectors.CLOSE_BUTTONS:
+        try:
+            visible = await page.evaluate(BossSpider.VISIBLE_POPUPS_JS, Selectors.CLOSE_BUTTONS)
+        except Exception as e:
+            logger.warning(f"检查弹窗失败: {e}")
+            return
+        for selector in visible:
             try:
-                self.page.click(selector, timeout=2000)
+                await page.click(selector, timeout=2000)
                 logger.info("已关闭弹窗")
-                Utils.random_sleep(0.5, 1)
+                await AsyncUtils.random_sleep(0.5, 1)
             except:
                 continue
     
-    def search_jobs(self, keyword: str, first_search: bool = True):
+    async def warm_up(self, page):
+        """打开首页、模拟人类行为并关闭弹窗；已有有效会话且直接打开结果页时跳过"""
+        if self.session_state and self.config.direct_url:
+            return
+        await self.acquire_slot()
+        with Metrics.timer("navigation", kind="home"):
+            await page.goto(self.config.base_url, timeout=30000)
+        await AsyncUtils.random_sleep(3, 5)
+        if self.config.mouse_move_enabled:
+            await AsyncUtils.human_mouse_move(page)
+        await self.close_popups(page)
+    
+    async def search_jobs(self, page, keyword: str, capture: ApiCapture = None):
         """搜索职位"""
         logger.info(f"正在搜索关键词: {keyword}")
         
-        # 如果不是第一次搜索，先回到首页
-        if not first_search:
-            logger.info("返回首页重新搜索...")
-            self.page.goto("https://www.zhipin.com", timeout=30000)
-            Utils.random_sleep(3, 5)
-            self.close_popups()
+        if self.config.direct_url:
+            await self.open_results(page, keyword, 1, capture)
+            return
         
-        # 尝试多个搜索框选择器
         search_box = None
-        for selector in Selectors.SEARCH_BOX:
+        for selector in SelectorCache.candidates("SEARCH_BOX"):
             try:
-                search_box = self.page.wait_for_selector(selector, timeout=10000)
+                search_box = await page.wait_for_selector(selector, timeout=10000)
                 if search_box:
-                    logger.info(f"使用选择器 '{selector}' 找到搜索框")
+                    SelectorCache.report("SEARCH_BOX", selector, True)
                     break
             except:
-                continue
+                pass
+            SelectorCache.report("SEARCH_BOX", selector, False)
         
         if not search_box:
-            # 保存页面用于调试
-            with open(f"{self.config.output_dir}/debug_search_page.html", "w", encoding="utf-8") as f:
-                f.write(self.page.content())
-            raise Exception("未找到搜索框，已保存页面到 debug_search_page.html")
-        
-        # 清空并输入关键词
-        search_box.click()
-        Utils.random_sleep(0.5, 1)
+            raise Exception(f"未找到搜索框: {keyword}")
         
-        # 清空输入框 - 使用多种方法
-        search_box.fill("")
-        self.page.keyboard.press("Control+A")
-        self.page.keyboard.press("Backspace")
-        Utils.random_sleep(0.3, 0.6)
+        await search_box.click()
+        await AsyncUtils.random_sleep(0.5, 1)
+        await search_box.fill("")
+        await page.keyboard.press("Control+A")
+        await page.keyboard.press("Backspace")
+        await AsyncUtils.random_sleep(0.3, 0.6)
         
-        # 模拟逐字输入
         for char in keyword:
-            search_box.type(char, delay=random.randint(50, 150))
+            await search_box.type(char, delay=random.randint(50, 150))
+        await AsyncUtils.random_sleep(1, 2)
         
-        Utils.random_sleep(1, 2)
-        
-        # 点击搜索按钮
-        for selector in Selectors.SEARCH_BUTTON:
+        if capture:
+            capture.reset()
+        await self.acquire_slot()
+        for selector in SelectorCache.candidates("SEARCH_BUTTON"):
             try:
-                self.page.click(selector, timeout=5000)
-                logger.info("已点击搜索按钮")
+                await page.click(selector, timeout=5000)
+                SelectorCache.report("SEARCH_BUTTON", selector, True)
                 break
             except:
-                continue
-        
-        # 等待结果加载
-        Utils.random_sleep(5, 8)
+                SelectorCache.report("SEARCH_BUTTON", selector, False)
         
-        try:
-            self.page.wait_for_selector(Selectors.JOB_LIST[0], timeout=15000)
-            logger.info("职位列表加载完成")
-        except:
-            logger.warning("等待职位列表超时，尝试继续...")
+        await self.wait_for_results(page)
     
-    def crawl_current_page(self, debug=False) -> int:
-        """抓取当前页面的职位"""
-        # 保存页面源码（用于调试）
+    async def crawl_current_page(self, page, keyword: str, capture: ApiCapture = None, debug=False,
+                                 page_num: int = 0) -> int:
+        """抓取当前页面的职位（优先接口数据，否则批量提取）"""
         if self.config.save_html or debug:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            html_file = f"{self.config.output_dir}/page_{timestamp}.html"
-            with open(html_file, "w", encoding="utf-8") as f:
-                f.write(self.page.content())
-            logger.info(f"已保存页面源码: {html_file}")
+            html = await page.content()
+            await asyncio.to_thread(self.save_snapshot, html, keyword, page_num)
         
-        # 查找职位卡片
-        job_cards = []
-        for selector in Selectors.JOB_CARD:
+        self.stats["total_pages"] += 1
+        crawl_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        parse_start = time.perf_counter()
+        rows = (await capture.drain_async())[:self.config.items_per_page] if capture else []
+        source = "api" if rows else "batch"
+        if rows:
+            extracted = {"total": len(rows), "cards": rows}
+        else:
             try:
-                job_cards = self.page.query_selector_all(selector)
-                if job_cards:
-                    logger.info(f"使用选择器 '{selector}' 找到 {len(job_cards)} 个职位")
-                    break
-            except:
-                continue
-        
-        if not job_cards:
-            logger.warning("未找到任何职位卡片")
-            # 如果第一次失败，开启调试模式保存前几个元素
-            if debug:
-                with open(f"{self.config.output_dir}/debug_elements.txt", "w", encoding="utf-8") as f:
-                    f.write("Page title: " + self.page.title() + "\n\n")
-                    f.write("Page URL: " + self.page.url + "\n\n")
-            return 0
-        
-        count = 0
-        for i, card in enumerate(job_cards[:self.config.items_per_page], 1):
+                extracted = await BatchExtractor.extract_async(page, self.config.items_per_page)
+            except Exception as e:
+                # 与同步版逐卡解析的回退对应：取一次页面源码，在线程里离线解析，不中断当前关键词
+                logger.warning(f"批量提取失败，回退到解析页面源码: {e}")
+                html = await page.content()
+                extracted = await asyncio.to_thread(OfflineParser.extract_cards, html, self.config.items_per_page)
+                source = "html"
+        valid = []
+        for i, raw in enumerate(extracted["cards"], 1):
             self.stats["total_crawled"] += 1
-            
-            # 前3个卡片开启调试
-            job_data = JobParser.parse_job_card(card, debug=(i <= 3 and debug))
+            job_data = JobParser.build_job_data(
+                raw, debug=(i <= 3 and debug), crawl_time=crawl_time, base_url=self.config.base_url
+            )
             if job_data:
-                self.jobs.append(job_data)
+                valid.append(job_data)
                 self.stats["total_valid"] += 1
-                count += 1
-                logger.info(f"[{i}/{len(job_cards)}] ✓ {job_data['职位名称']} @ {job_data['公司名称']} - {job_data['薪资']}")
             else:
                 self.stats["total_failed"] += 1
-                logger.warning(f"[{i}/{len(job_cards)}] ✗ 解析失败")
+        Metrics.observe("parse", time.perf_counter() - parse_start, source=source)
+        if not extracted["total"]:
+            logger.warning("未找到任何职位卡片")
+        # 输出涉及文件 fsync、SQLite 提交和详情抓取等阻塞操作，放到线程里，与其他页面的爬取重叠
+        return await asyncio.to_thread(self.emit_serialized, valid, keyword)
+    
+    def emit_serialized(self, jobs: List[Dict], keyword: str) -> int:
+        """emit 会更新统计、已知占比和去重集合，多个关键词的线程同时输出时依次执行"""
+        with self._emit_lock:
+            return self.emit(jobs, keyword)
+    
+    async def go_to_next_page(self, page, capture: ApiCapture = None) -> bool:
+        """翻到下一页；确实没有更多结果时返回 False，导航失败时抛出异常"""
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        if not self.pacer:
+            await AsyncUtils.random_sleep(1, 2)
+        
+        for selector in SelectorCache.candidates("NEXT_PAGE"):
+            try:
+                next_btn = await page.query_selector(selector)
+                found = bool(next_btn and await next_btn.is_visible())
+                SelectorCache.report("NEXT_PAGE", selector, found)
+                if found:
+                    if "disabled" in (await next_btn.get_attribute("class") or ""):
+                        logger.info("已到最后一页")
+                        return False
+                    
+                    previous = await self.pacer.card_signature_async(page) if self.pacer else None
+                    if capture:
+                        capture.reset()
+                    await self.acquire_slot()
+                    with Metrics.timer("navigation", kind="next"):
+                        await next_btn.click()
+                    await self.wait_for_results(page, previous)
+                    return True
+            except:
+                continue
         
-        return count
+        raise RuntimeError("未找到下一页按钮")
     
-    def go_to_next_page(self) -> bool:
-        """翻到下一页"""
+    async def crawl_keyword(self, keyword: str, semaphore: asyncio.Semaphore, debug: bool = False):
+        """在独立上下文中搜索一个关键词并抓取多页"""
+        async with semaphore:
+            context, page, capture = await self.open_page(f"keyword-{keyword}")
+            try:
+                await self.warm_up(page)
+                if self.detail_fetcher:
+                    self.detail_fetcher.set_cookies(await context.cookies())
+                resume = self.checkpoint.resume_point(keyword) if self.checkpoint else None
+                if resume:
+                    start_page = resume["page"]
+                    if self.config.direct_url:
+                        if not await self.open_results(page, keyword, start_page, capture):
+                            logger.info(f"第 {start_page} 页没有职位，关键词 {keyword} 已完成")
+                            self.checkpoint.keyword_done(keyword)
+                            return
+                    else:
+                        if capture:
+                            capture.reset()
+                        await self.acquire_slot()
+                        with Metrics.timer("navigation", kind="resume"):
+                            await page.goto(resume["url"], timeout=30000)
+                        await self.wait_for_results(page)
+                else:
+                    await self.search_jobs(page, keyword, capture)
+                    start_page = 1
+                
+                for page_num in range(start_page, self.config.max_pages + 1):
+                    count = await self.crawl_current_page(
+                        page, keyword, capture, debug=(debug and page_num == 1), page_num=page_num
+                    )
+                    logger.info(f"关键词: {keyword} - 第 {page_num} 页, 本页抓取: {count} 条有效数据")
+                    if self.checkpoint:
+                        self.checkpoint.page_done(keyword, count, *self.next_position(keyword, page_num, page.url))
+                    
+                    if self.should_stop_early(keyword):
+                        break
+                    
+                    # 导航失败时抛出异常，关键词留在断点中，续爬从下一页继续
+                    if page_num < self.config.max_pages:
+                        if self.config.direct_url:
+                            moved = await self.open_next_results(page, keyword, page_num + 1, capture)
+                        else:
+                            moved = await self.go_to_next_page(page, capture)
+                        if not moved:
+                            logger.info(f"{keyword}: 已没有更多结果，停止抓取")
+                            break
+                    
+                    await self.throttle()
+                
+                if self.checkpoint:
+                    self.checkpoint.keyword_done(keyword)
+            except Exception as e:
+                logger.error(f"关键词 {keyword} 出错: {e}", exc_info=True)
+            finally:
+                await SessionState.save_async(context, self.config)
+                await context.close()
+    
+    async def save_results(self):
+        """保存结果（写文件放到线程里，不阻塞其他爬取）"""
+        await asyncio.to_thread(self._write_results)
+    
+    async def run_async(self, browser=None, resume: bool = False):
+        """
+        运行爬虫；传入 browser 时复用它（多个爬虫共享一个浏览器），否则自行启动
+        resume=True 时从上次的断点继续
+        """
+        self.stats["start_time"] = datetime.now()
+        logger.info(f"异步爬虫启动, 关键词: {', '.join(self.config.keywords)}, 并发: {self.config.workers}")
+        
+        semaphore = asyncio.Semaphore(max(self.config.workers, 1))
+        playwright = None
         try:
-            # 滚动到底部
-            self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            Utils.random_sleep(1, 2)
-            
-            # 查找下一页按钮
-            for selector in Selectors.NEXT_PAGE:
-                try:
-                    next_btn = self.page.query_selector(selector)
-                    if next_btn and next_btn.is_visible():
-                        # 检查是否可点击
-                        if "disabled" in (next_btn.get_attribute("class") or ""):
-                            logger.info("已到最后一页")
-                            return False
-                        
-                        next_btn.click()
-                        logger.info("已点击下一页")
-                        Utils.random_sleep(5, 8)
-                        return True
-                except:
-                    continue
-            
-            logger.warning("未找到下一页按钮")
-            return False
+            keywords = self.prepare_run(resume)
+            self.session_state = SessionState.load(self.config)
+            if self.session_state:
+                logger.info("会话有效，跳过首页预热")
+            if browser is None:
+                playwright = await async_playwright().start()
+                if self.config.cdp_endpoint:
+                    self.browser = await playwright.chromium.connect_over_cdp(self.config.cdp_endpoint)
+                else:
+                    self.browser = await self.launch_browser(playwright)
+            else:
+                self.browser = browser
             
+            await asyncio.gather(*(
+                self.crawl_keyword(keyword, semaphore, debug=(idx == 0))
+                for idx, keyword in enumerate(keywords)
+            ))
+            await self.save_results()
+            self.finish_run()
         except Exception as e:
-            logger.error(f"翻页失败: {e}")
-            return False
+            logger.error(f"爬虫运行出错: {e}", exc_info=True)
+        finally:
+            self.close_services()
+            self.stats["end_time"] = datetime.now()
+            self.print_stats()
+            if playwright:
+                await self.browser.close()
+                await playwright.stop()
     
-    def run(self):
-        """运行爬虫"""
-        self.stats["start_time"] = datetime.now()
-        logger.info("=" * 60)
-        logger.info("Boss 直聘爬虫启动")
-        logger.info(f"搜索关键词: {', '.join(self.config.keywords)}")
-        logger.info(f"最大页数: {self.config.max_pages}")
-        logger.info("=" * 60)
+    def run(self, resume: bool = False):
+        """同步入口"""
+        asyncio.run(self.run_async(resume=resume))
+    
+    @classmethod
+    async def run_many(cls, configs: List[SpiderConfig]) -> List["AsyncBossSpider"]:
+        """在同一个事件循环、同一个浏览器里并发运行多个爬取任务（浏览器参数取第一个配置）"""
+        spiders = [cls(config) for config in configs]
+        async with async_playwright() as playwright:
+            browser = await spiders[0].launch_browser(playwright)
+            try:
+                await asyncio.gather(*(spider.run_async(browser) for spider in spiders))
+            finally:
+                await browser.close()
+        return spiders
+
+
+# mock_server.py - 本地模拟站点
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+class MockFixtures:
+    """
+    生成确定性的 joblist.json 载荷（同一 seed / 关键词 / 页码结果固定）
+    variant: primary 使用各字段的首选选择器，fallback 只能由备用选择器命中，mixed 按页交替
+    popups: 每个页面弹出一个需要关闭的对话框
+    """
+    
+    JOB_NAMES = ["Python 开发工程师", "后端开发", "数据分析师", "爬虫工程师", "算法工程师", "测试开发"]
+    BRANDS = ["字节跳动", "美团", "某某科技", "小红书", "蚂蚁集团", "星辰数据"]
+    SALARIES = ["15-25K·14薪", "20-35K", "10-15K", "200-300元/天", "3-5千", "1.5-2万", "面议"]
+    EXPERIENCES = ["经验不限", "1-3年", "3-5年", "5-10年", "在校/应届"]
+    DEGREES = ["大专", "本科", "硕士", "学历不限"]
+    CITIES = [("北京", "朝阳区", "望京"), ("上海", "浦东新区", "张江"), ("深圳", "南山区", "科技园")]
+    INDUSTRIES = ["互联网", "计算机软件", "电子商务"]
+    STAGES = ["A轮", "B轮", "已上市", "不需要融资"]
+    SCALES = ["20-99人", "100-499人", "1000-9999人", "10000人以上"]
+    WELFARE = ["五险一金", "带薪年假", "定期体检", "餐补", "弹性工作"]
+    
+    VARIANTS = ("primary", "fallback", "mixed")
+    
+    def __init__(self, seed: int = 42, pages: int = 10, per_page: int = 30,
+                 variant: str = "primary", popups: bool = False):
+        if variant not in self.VARIANTS:
+            raise ValueError(f"未知的页面变体: {variant}")
+        self.seed = seed
+        self.pages = pages
+        self.per_page = per_page
+        self.variant = variant
+        self.popups = popups
+    
+    def job_list(self, query: str, page: int) -> List[Dict]:
+        rng = random.Random(f"{self.seed}:{query}:{page}")
+        jobs = []
+        for i in range(self.per_page):
+            city, area, district = rng.choice(self.CITIES)
+            jobs.append({
+                "encryptJobId": f"{rng.getrandbits(48):012x}~{page}{i:02d}",
+                "jobName": f"{query} {rng.choice(self.JOB_NAMES)}",
+                "salaryDesc": rng.choice(self.SALARIES),
+                "brandName": rng.choice(self.BRANDS),
+                "jobExperience": rng.choice(self.EXPERIENCES),
+                "jobDegree": rng.choice(self.DEGREES),
+                "cityName": city,
+                "areaDistrict": area,
+                "businessDistrict": district,
+                "welfareList": rng.sample(self.WELFARE, rng.randint(0, 3)),
+                "brandIndustry": rng.choice(self.INDUSTRIES),
+                "brandStageName": rng.choice(self.STAGES),
+                "brandScaleName": rng.choice(self.SCALES),
+            })
+        return jobs
+    
+    def payload(self, query: str, page: int) -> Dict:
+        in_range = 1 <= page <= self.pages
+        return {
+            "code": 0,
+            "message": "Success",
+            "zpData": {
+                "hasMore": page < self.pages,
+                "totalCount": self.pages * self.per_page,
+                "jobList": self.job_list(query, page) if in_range else [],
+            },
+        }
+    
+    def detail_html(self, job_id: str) -> str:
+        rng = random.Random(f"{self.seed}:detail:{job_id}")
+        city, area, district = rng.choice(self.CITIES)
+        return f"""<!DOCTYPE html><html><head><meta charset="utf-8"><title>职位详情</title></head><body>
+<div class="job-boss-info"><h2 class="name">{rng.choice('张王李赵')}先生</h2><div class="boss-info-attr">技术经理</div></div>
+<div class="job-detail-section"><div class="job-sec-text">岗位职责：<br>1. 负责{rng.choice(self.JOB_NAMES)}相关工作<br>2. 编号 {job_id}</div></div>
+<div class="job-location"><div class="location-address">{city}{area}{district}{rng.randint(1, 99)}号</div></div>
+</body></html>"""
+
+
+class MockBossHandler(BaseHTTPRequestHandler):
+    """模拟站点：首页搜索框、由 joblist.json 渲染的结果页、分页按钮、职位详情页"""
+    
+    POPUP_HTML = """<div class="dialog-wrap" style="position:fixed;top:0;right:0;width:300px;z-index:9">
+<div class="dialog-container">登录后查看更多职位<span class="dialog-close" onclick="this.closest('.dialog-wrap').remove()">×</span></div>
+</div><a class="close-btn" style="display:none">×</a>"""
+    
+    HOME_HTML = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>模拟站点</title></head><body>
+__POPUP__
+<input class="ipt-search" name="query"><button class="btn-search" type="submit">搜索</button>
+<script>
+document.querySelector('.btn-search').onclick = () => {
+    const q = encodeURIComponent(document.querySelector('.ipt-search').value);
+    location.href = '/web/geek/job?query=' + q + '&page=1';
+};
+</script></body></html>"""
+    
+    RESULTS_HTML = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>职位列表</title></head><body>
+__POPUP__
+<input class="ipt-search" name="query"><button class="btn-search" type="submit">搜索</button>
+<div class="job-list"><ul class="job-list-box"></ul></div>
+<div class="options-pages"><a class="next">下一页</a></div>
+<script>
+const esc = s => String(s || '').replace(/[&<>"]/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]));
+const VARIANT = '__VARIANT__';
+const params = new URLSearchParams(location.search);
+let query = params.get('query') || '', page = parseInt(params.get('page') || '1');
+const area = j => esc([j.cityName, j.areaDistrict, j.businessDistrict].filter(Boolean).join('·'));
+const fallbackCard = j => `
+<li class="job-card">
+  <a href="/job_detail/${esc(j.encryptJobId)}.html"><span class="job-title">${esc(j.jobName)}</span></a>
+  <span class="red">${esc(j.salaryDesc)}</span>
+  <span class="job-experience">${esc(j.jobExperience)}</span><span class="job-education">${esc(j.jobDegree)}</span>
+  <span class="area">${area(j)}</span>
+  <h3 class="name">${esc(j.brandName)}</h3>
+  <div class="company-info">${esc([j.brandIndustry, j.brandStageName, j.brandScaleName].join(' '))}</div>
+  <div class="welfare-list">${esc(j.welfareList.join('，'))}</div>
+</li>`;
+async function load(p) {
+    const resp = await fetch('/wapi/zpgeek/search/joblist.json?query=' + encodeURIComponent(query) + '&page=' + p);
+    const data = (await resp.json()).zpData;
+    const fallback = VARIANT === 'fallback' || (VARIANT === 'mixed' && p % 2 === 0);
+    document.querySelector('.job-list-box').innerHTML = data.jobList.map(j => fallback ? fallbackCard(j) : `
+<li class="job-card-wrapper"><div class="job-card-body">
+  <a class="job-card-left" href="/job_detail/${esc(j.encryptJobId)}.html"><span class="job-name">${esc(j.jobName)}</span>
+    <span class="job-area">${area(j)}</span></a>
+  <div class="job-info"><span class="salary">${esc(j.salaryDesc)}</span>
+    <ul class="tag-list"><li>${esc(j.jobExperience)}</li><li>${esc(j.jobDegree)}</li></ul></div>
+  <div class="job-card-right"><h3 class="company-name"><a>${esc(j.brandName)}</a></h3>
+    <ul class="company-tag-list"><li>${esc(j.brandIndustry)}</li><li>${esc(j.brandStageName)}</li><li>${esc(j.brandScaleName)}</li></ul></div>
+</div><div class="job-card-footer"><div class="info-desc">${esc(j.welfareList.join('，'))}</div></div></li>`).join('');
+    document.querySelector('.next').className = data.hasMore ? 'next' : 'next disabled';
+    page = p;
+    history.replaceState(null, '', '/web/geek/job?query=' + encodeURIComponent(query) + '&page=' + p);
+}
+document.querySelector('.next').onclick = () => { if (!document.querySelector('.next.disabled')) load(page + 1); };
+document.querySelector('.btn-search').onclick = () => { query = document.querySelector('.ipt-search').value; load(1); };
+load(page);
+</script></body></html>"""
+    
+    fixtures: MockFixtures = None
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def render(self, template: str) -> str:
+        return (template
+                .replace("__POPUP__", self.POPUP_HTML if self.fixtures.popups else "")
+                .replace("__VARIANT__", self.fixtures.variant))
+    
+    def send_body(self, body: str, content_type: str, status: int = 200):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == "/":
+            self.send_body(self.render(self.HOME_HTML), "text/html")
+        elif url.path == "/web/geek/job":
+            self.send_body(self.render(self.RESULTS_HTML), "text/html")
+        elif url.path.startswith("/job_detail/"):
+            job_id = url.path[len("/job_detail/"):].rsplit(".", 1)[0]
+            self.send_body(self.fixtures.detail_html(job_id), "text/html")
+        elif url.path == "/wapi/zpgeek/search/joblist.json":
+            query = params.get("query", [""])[0]
+            page = int(params.get("page", ["1"])[0])
+            payload = self.fixtures.payload(query, page)
+            self.send_body(json.dumps(payload, ensure_ascii=False), "application/json")
+        else:
+            self.send_body("not found", "text/plain", 404)
+
+
+class MockBossServer:
+    """在后台线程运行的本地模拟站点，用于离线测试和基准"""
+    
+    def __init__(self, fixtures: MockFixtures = None, host: str = "127.0.0.1", port: int = 0):
+        handler = type("Handler", (MockBossHandler,), {"fixtures": fixtures or MockFixtures()})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> str:
+        self.thread.start()
+        logger.info(f"模拟站点已启动: {self.base_url}")
+        return self.base_url
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# bench.py - 性能基准
+import sys
+
+
+class RoundTripCounter:
+    """包装 Page / ElementHandle，统计 Playwright IPC 往返次数"""
+    
+    def __init__(self, target, counter: Dict = None):
+        self._target = target
+        self._counter = counter if counter is not None else {"calls": 0}
+    
+    @property
+    def calls(self) -> int:
+        return self._counter["calls"]
+    
+    def _wrap(self, value):
+        if isinstance(value, list):
+            return [self._wrap(v) for v in value]
+        if value is not None and hasattr(value, "query_selector"):
+            return RoundTripCounter(value, self._counter)
+        return value
+    
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
         
+        def call(*args, **kwargs):
+            self._counter["calls"] += 1
+            return self._wrap(attr(*args, **kwargs))
+        return call
+
+
+def benchmark_extraction(page, limit: int, rounds: int = 3) -> Dict:
+    """在同一页面上对比逐卡解析与批量提取的往返次数、耗时和结果"""
+    
+    def per_card():
+        counted = RoundTripCounter(page)
+        cards = []
+        for selector in Selectors.JOB_CARD:
+            cards = counted.query_selector_all(selector)
+            if cards:
+                break
+        jobs = [JobParser.parse_job_card(card) for card in cards[:limit]]
+        return jobs, counted.calls
+    
+    def batched():
+        counted = RoundTripCounter(page)
+        extracted = BatchExtractor.extract(counted, limit)
+        jobs = [JobParser.build_job_data(raw) for raw in extracted["cards"]]
+        return jobs, counted.calls
+    
+    report = {}
+    outputs = {}
+    for name, fn in (("per_card", per_card), ("batched", batched)):
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            jobs, calls = fn()
+            timings.append(time.perf_counter() - start)
+        outputs[name] = jobs
+        report[name] = {
+            "round_trips": calls,
+            "cards": len(jobs),
+            "best_seconds": round(min(timings), 4),
+            "mean_seconds": round(sum(timings) / len(timings), 4),
+        }
+    
+    # 逐字段对比（抓取时间除外）
+    mismatches = 0
+    for a, b in zip(outputs["per_card"], outputs["batched"]):
+        if a and b:
+            a = {k: v for k, v in a.items() if k != "抓取时间"}
+            b = {k: v for k, v in b.items() if k != "抓取时间"}
+        if a != b:
+            mismatches += 1
+    report["mismatches"] = mismatches + abs(len(outputs["per_card"]) - len(outputs["batched"]))
+    report["speedup"] = round(report["per_card"]["best_seconds"] / max(report["batched"]["best_seconds"], 1e-9), 1)
+    return report
+
+
+def run_extraction_benchmark(config: SpiderConfig, rounds: int = 3) -> Dict:
+    """打开搜索结果页并运行提取基准，结果写入 output_dir"""
+    spider = BossSpider(config)
+    with sync_playwright() as playwright:
+        spider.setup_browser(playwright)
+        try:
+            spider.page.goto(config.base_url, timeout=30000)
+            Utils.random_sleep(3, 5)
+            spider.close_popups()
+            spider.search_jobs(config.keywords[0])
+            report = benchmark_extraction(spider.page, config.items_per_page, rounds)
+        finally:
+            spider.browser.close()
+    
+    for name in ("per_card", "batched"):
+        r = report[name]
+        logger.info(f"{name}: {r['cards']} 张卡片, {r['round_trips']} 次往返, 最快 {r['best_seconds']}s")
+    logger.info(f"加速比: {report['speedup']}x, 不一致记录: {report['mismatches']}")
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    Utils.save_to_json([report], f"{config.output_dir}/bench_extract_{timestamp}.json")
+    return report
+
+
+def run_capture_benchmark(config: SpiderConfig = None, pages: int = 3, rounds: int = 3) -> Dict:
+    """在本地模拟站点上对比接口捕获与 DOM 批量提取（无需外网）"""
+    config = config or SpiderConfig(keywords=["Python"], save_html=False)
+    report = {"pages": pages, "capture": [], "dom": [], "mismatches": 0}
+    
+    with MockBossServer(MockFixtures(pages=pages, per_page=config.items_per_page)) as server:
+        spider = BossSpider(config)
         with sync_playwright() as playwright:
+            spider.setup_browser(playwright)
             try:
-                self.setup_browser(playwright)
-                
-                # 打开 Boss 直聘
-                logger.info("正在访问 Boss 直聘...")
-                self.page.goto("https://www.zhipin.com", timeout=30000)
-                Utils.random_sleep(3, 5)
-                
-                # 模拟人类行为
-                if self.config.mouse_move_enabled:
-                    Utils.human_mouse_move(self.page)
-                
-                # 关闭弹窗
-                self.close_popups()
-                
-                # 遍历关键词
-                for idx, keyword in enumerate(self.config.keywords):
-                    # 搜索
-                    self.search_jobs(keyword, first_search=(idx == 0))
-                    
-                    # 抓取多页
-                    for page_num in range(1, self.config.max_pages + 1):
-                        logger.info(f"\n{'='*50}")
-                        logger.info(f"关键词: {keyword} - 第 {page_num} 页")
-                        logger.info(f"{'='*50}")
+                for page_num in range(1, pages + 1):
+                    url = f"{server.base_url}/web/geek/job?query={config.keywords[0]}&page={page_num}"
+                    for _ in range(rounds):
+                        spider.page.goto(url)
+                        spider.page.wait_for_selector(Selectors.JOB_CARD[0])
                         
-                        # 第一页第一个关键词开启调试
-                        debug_mode = (idx == 0 and page_num == 1)
-                        count = self.crawl_current_page(debug=debug_mode)
-                        logger.info(f"本页抓取: {count} 条有效数据")
+                        start = time.perf_counter()
+                        from_api = [JobParser.build_job_data(raw) for raw in spider.api_capture.drain()]
+                        report["capture"].append(time.perf_counter() - start)
                         
-                        # 如果不是最后一页，翻页
-                        if page_num < self.config.max_pages:
-                            if not self.go_to_next_page():
-                                logger.info("无法继续翻页，停止抓取")
-                                break
-                        
-                        # 随机延迟
-                        Utils.random_sleep(self.config.min_delay, self.config.max_delay)
-                
-                # 保存数据
-                self.save_results()
-                
-            except Exception as e:
-                logger.error(f"爬虫运行出错: {e}", exc_info=True)
+                        start = time.perf_counter()
+                        extracted = BatchExtractor.extract(spider.page, config.items_per_page)
+                        from_dom = [JobParser.build_job_data(raw) for raw in extracted["cards"]]
+                        report["dom"].append(time.perf_counter() - start)
+                    
+                    for a, b in zip(from_api, from_dom):
+                        a = {k: v for k, v in (a or {}).items() if k != "抓取时间"}
+                        b = {k: v for k, v in (b or {}).items() if k != "抓取时间"}
+                        report["mismatches"] += a != b
+                    report["mismatches"] += abs(len(from_api) - len(from_dom))
             finally:
-                self.stats["end_time"] = datetime.now()
-                self.print_stats()
-                
-                input("\n按 Enter 关闭浏览器...")
-                if self.browser:
-                    self.browser.close()
+                spider.browser.close()
     
-    def save_results(self):
-        """保存结果"""
-        if not self.jobs:
-            logger.warning("没有抓取到任何数据")
-            return
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # 保存 CSV
-        if self.config.save_csv:
-            csv_file = f"{self.config.output_dir}/boss_jobs_{timestamp}.csv"
-            Utils.save_to_csv(self.jobs, csv_file)
+    for name in ("capture", "dom"):
+        timings = report[name]
+        report[name] = {"best_seconds": round(min(timings), 4), "mean_seconds": round(sum(timings) / len(timings), 4)}
+        logger.info(f"{name}: 最快 {report[name]['best_seconds']}s, 平均 {report[name]['mean_seconds']}s")
+    logger.info(f"不一致记录: {report['mismatches']}")
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    Utils.save_to_json([report], f"{config.output_dir}/bench_capture_{timestamp}.json")
+    return report
+
+
+class StageTimer:
+    """给方法套上计时包装，按阶段记录每次调用耗时"""
+    
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._patched = []
+    
+    def wrap(self, owner, name: str):
+        """owner 为实例时只包装该实例；为类时替换类属性（restore 时还原）"""
+        original = getattr(owner, name)
         
-        # 保存 JSON
-        if self.config.save_json:
-            json_file = f"{self.config.output_dir}/boss_jobs_{timestamp}.json"
-            Utils.save_to_json(self.jobs, json_file)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.samples.setdefault(name, []).append(time.perf_counter() - start)
         
-        logger.info(f"\n✅ 数据保存完成！共 {len(self.jobs)} 条")
+        if isinstance(owner, type):
+            self._patched.append((owner, name, owner.__dict__[name]))
+            setattr(owner, name, staticmethod(timed))
+        else:
+            self._patched.append((owner, name, None))
+            setattr(owner, name, timed)
     
-    def print_stats(self):
-        """打印统计信息"""
-        duration = (self.stats["end_time"] - self.stats["start_time"]).total_seconds()
-        
-        logger.info("\n" + "=" * 60)
-        logger.info("📊 爬取统计")
-        logger.info("=" * 60)
-        logger.info(f"总共抓取: {self.stats['total_crawled']} 条")
-        logger.info(f"有效数据: {self.stats['total_valid']} 条")
-        logger.info(f"失败数据: {self.stats['total_failed']} 条")
-        logger.info(f"成功率: {self.stats['total_valid']/max(self.stats['total_crawled'],1)*100:.1f}%")
-        logger.info(f"耗时: {duration:.1f} 秒")
-        logger.info("=" * 60)
+    def restore(self):
+        for owner, name, original in reversed(self._patched):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._patched = []
+    
+    @staticmethod
+    def percentile(values: List[float], pct: float) -> float:
+        """最近秩百分位"""
+        ordered = sorted(values)
+        index = max(int(-(-pct * len(ordered) // 100)) - 1, 0)
+        return ordered[index]
+    
+    def summary(self) -> Dict:
+        return {
+            name: {
+                "calls": len(values),
+                "total_seconds": round(sum(values), 4),
+                "p50_ms": round(self.percentile(values, 50) * 1000, 2),
+                "p95_ms": round(self.percentile(values, 95) * 1000, 2),
+                "max_ms": round(max(values) * 1000, 2),
+            }
+            for name, values in self.samples.items()
+        }
+
+
+def peak_rss_mb() -> Optional[float]:
+    """当前 Python 进程的峰值常驻内存（MB，不含浏览器进程）；平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_benchmark_suite(config: SpiderConfig = None, pages: int = 5, cards: int = 30,
+                        variant: str = "mixed", popups: bool = True) -> Dict:
+    """
+    在本地模拟站点上完整跑一遍爬取流程，统计各阶段耗时分位数、每秒卡片数和峰值内存
+    default 场景使用当前配置的提取方式，per_card 场景关闭接口捕获和批量提取以覆盖逐卡解析
+    """
+    config = config or SpiderConfig(keywords=["Python"])
+    scenarios = {
+        "default": {"capture_api": config.capture_api, "batch_extract": config.batch_extract},
+        "per_card": {"capture_api": False, "batch_extract": False},
+    }
+    stages = ("search_jobs", "crawl_current_page", "go_to_next_page", "save_results", "close_popups")
+    report = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "params": {"pages": pages, "cards": cards, "variant": variant, "popups": popups, "keywords": config.keywords},
+        "scenarios": {},
+    }
+    
+    sleep_scale = Utils.sleep_scale
+    Utils.sleep_scale = 0.0  # 只测爬虫本身，不计人为等待
+    fixtures = MockFixtures(pages=pages, per_page=cards, variant=variant, popups=popups)
+    try:
+        with MockBossServer(fixtures) as server:
+            for name, overrides in scenarios.items():
+                bench_config = SpiderConfig(
+                    chrome_path=config.chrome_path, headless=True, base_url=server.base_url,
+                    keywords=config.keywords, max_pages=pages, items_per_page=cards,
+                    output_dir=os.path.join(config.output_dir, "bench_suite", name),
+                    save_html=False, checkpoint=False, block_resources=False, reuse_session=False, **overrides,
+                )
+                spider = BossSpider(bench_config)
+                timer = StageTimer()
+                for stage in stages:
+                    timer.wrap(spider, stage)
+                timer.wrap(JobParser, "parse_job_card")
+                
+                with sync_playwright() as playwright:
+                    try:
+                        spider.prepare_run()
+                        spider.setup_browser(playwright)
+                        spider.warm_up()
+                        start = time.perf_counter()
+                        for idx, keyword in enumerate(bench_config.keywords):
+                            spider.crawl_keyword(keyword, first_search=(idx == 0))
+                        spider.save_results()
+                        elapsed = time.perf_counter() - start
+                    finally:
+                        timer.restore()
+                        spider.close_services()
+                        # 启动失败时没有浏览器，不要用 AttributeError 掩盖真正的错误
+                        if spider.browser:
+                            spider.browser.close()
+                
+                crawled = spider.stats["total_valid"]
+                report["scenarios"][name] = {
+                    "cards": crawled,
+                    "wall_seconds": round(elapsed, 3),
+                    "cards_per_second": round(crawled / max(elapsed, 1e-9), 1),
+                    "stages": timer.summary(),
+                }
+    finally:
+        Utils.sleep_scale = sleep_scale
+    report["peak_rss_mb"] = peak_rss_mb()
+    
+    for name, result in report["scenarios"].items():
+        logger.info(f"{name}: {result['cards']} 张卡片, {result['wall_seconds']}s, {result['cards_per_second']} 张/秒")
+        for stage, timing in result["stages"].items():
+            logger.info(f"  {stage}: {timing['calls']} 次, p50 {timing['p50_ms']}ms, p95 {timing['p95_ms']}ms")
+    logger.info(f"峰值内存: {report['peak_rss_mb']} MB")
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    Utils.save_to_json([report], f"{config.output_dir}/bench_suite_{timestamp}.json")
+    return report
 
 
 # main.py - 主程序入口
 if __name__ == "__main__":
     import sys
     
+    # 离线模式：重新解析保存的页面快照
+    # python spider.py reparse data [进程数]
+    if len(sys.argv) > 1 and sys.argv[1] == "reparse":
+        source = sys.argv[2] if len(sys.argv) > 2 else "data"
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        OfflineParser.reparse(source, workers=workers)
+        sys.exit(0)
+    
+    # 查看快照存储: python spider.py snapshots data/snapshots [关键词]
+    # 导出某一页: python spider.py snapshots data/snapshots --get 12 [page.html]
+    if len(sys.argv) > 2 and sys.argv[1] == "snapshots":
+        store = SnapshotStore(sys.argv[2], read_only=True)
+        if "--get" in sys.argv[3:-1]:
+            position = sys.argv.index("--get")
+            html = store.get(store.record(int(sys.argv[position + 1])))
+            if len(sys.argv) > position + 2:
+                with open(sys.argv[position + 2], "w", encoding="utf-8") as f:
+                    f.write(html)
+            else:
+                print(html)
+        else:
+            for record in store.find(keyword=sys.argv[3] if len(sys.argv) > 3 else None):
+                print(
+                    f"{record.index:>6}  {datetime.fromtimestamp(record.time):%Y-%m-%d %H:%M:%S}  "
+                    f"{record.keyword} 第 {record.page} 页  {record.raw_length / 1024:.0f}KB -> "
+                    f"{record.length / 1024:.0f}KB  {record.digest[:12]}"
+                )
+        store.close()
+        sys.exit(0)
+    
+    # 重新标准化已保存结果中的薪资列
+    # python spider.py normalize data/boss_jobs_xxx.csv
+    if len(sys.argv) > 2 and sys.argv[1] == "normalize":
+        for path in sys.argv[2:]:
+            SalaryNormalizer.normalize_file(path)
+        sys.exit(0)
+    
+    # 基准模式：对比逐卡解析与批量提取
+    if len(sys.argv) > 1 and sys.argv[1] == "bench-extract":
+        run_extraction_benchmark(SpiderConfig(keywords=["Python"], save_html=False))
+        sys.exit(0)
+    
+    # 基准模式：在本地模拟站点对比接口捕获与 DOM 提取
+    if len(sys.argv) > 1 and sys.argv[1] == "bench-capture":
+        run_capture_benchmark()
+        sys.exit(0)
+    
+    # 基准模式：在本地模拟站点跑完整流程，统计各阶段耗时
+    # python spider.py bench-suite [页数] [每页卡片数] [primary|fallback|mixed]
+    if len(sys.argv) > 1 and sys.argv[1] == "bench-suite":
+        run_benchmark_suite(
+            pages=int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+            cards=int(sys.argv[3]) if len(sys.argv) > 3 else 30,
+            variant=sys.argv[4] if len(sys.argv) > 4 else "mixed",
+        )
+        sys.exit(0)
+    
     # 测试模式：快速调试选择器
     if len(sys.argv) > 1 and sys.argv[1] == "test":
         print("🔍 测试模式：只抓取第一页，开启详细日志")
@@ -690,7 +5680,8 @@ if __name__ == "__main__":
             save_csv=True,
             save_json=False,
             min_delay=2.0,
-            max_delay=3.0
+            max_delay=3.0,
+            interactive=True   # 结束后保留浏览器窗口，方便检查页面
         )
     else:
         # 正常模式
@@ -703,11 +5694,55 @@ if __name__ == "__main__":
             max_delay=6.0,
             save_csv=True,
             save_json=True,
-            save_html=False       # 不保存页面源码（文件太大）
+            save_html=True        # 页面源码压缩去重后写入 data/snapshots，可随时离线重新解析
         )
     
-    # 创建爬虫实例
-    spider = BossSpider(config)
+    # 录制/回放: --record data/har 录制网络流量, --replay data/har 离线回放
+    for flag in ("--record", "--replay"):
+        if flag in sys.argv[1:-1]:
+            path = sys.argv[sys.argv.index(flag) + 1]
+            if flag == "--record":
+                config.har_record = path
+            else:
+                config.har_replay = path
+                config.headless = True
+    
+    # 连接已运行的浏览器（chrome --remote-debugging-port=9222）: --attach http://127.0.0.1:9222
+    # --new-session 丢弃保存的 cookie/localStorage，重新预热
+    if "--attach" in sys.argv[1:-1]:
+        config.cdp_endpoint = sys.argv[sys.argv.index("--attach") + 1]
+    if "--new-session" in sys.argv[1:]:
+        SessionState.discard(config)
+    
+    # 常驻调度: python spider.py daemon schedule.json
+    if len(sys.argv) > 2 and sys.argv[1] == "daemon":
+        CrawlDaemon.from_file(sys.argv[2]).run()
+        sys.exit(0)
+    
+    # 分布式队列: --queue 指定共享队列文件, --cities 指定展开任务的城市（逗号分隔）
+    # python spider.py queue-init --queue /mnt/share/tasks.db --cities 北京,上海
+    # python spider.py queue-worker [进程数] --queue /mnt/share/tasks.db   （每台机器各自运行）
+    # python spider.py queue-merge --queue /mnt/share/tasks.db
+    if "--queue" in sys.argv[1:-1]:
+        config.queue_db = sys.argv[sys.argv.index("--queue") + 1]
+    if "--cities" in sys.argv[1:-1]:
+        config.queue_cities = sys.argv[sys.argv.index("--cities") + 1].split(",")
+    if len(sys.argv) > 1 and sys.argv[1] == "queue-init":
+        init_queue(config)
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "queue-worker":
+        processes = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2].isdigit() else 1
+        run_queue_workers(config, processes)
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "queue-merge":
+        merge_queue_results(config)
+        sys.exit(0)
+    
+    # 创建爬虫实例（多个 worker 时使用上下文池，async 参数使用异步爬虫）
+    if "async" in sys.argv[1:]:
+        spider = AsyncBossSpider(config)
+    else:
+        spider = SpiderPool(config) if config.workers > 1 else BossSpider(config)
     
-    # 运行
-    spider.run()
\ No newline at end of file
+    # 运行（--resume 从上次中断的位置继续）
+    spider.run(resume="--resume" in sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,18 @@
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# spider 导入时用 basicConfig 在当前目录创建 spider.log；先配置好根日志，测试不写日志文件
+logging.basicConfig(level=logging.INFO, handlers=[logging.StreamHandler()])
+
+import spider  # noqa: E402
+
+
+@pytest.fixture
+def config(tmp_path):
+    """输出目录指向临时目录的默认配置"""
+    return spider.SpiderConfig(output_dir=str(tmp_path))
@@ -0,0 +1,136 @@
+import pytest
+
+from spider import BlockedError, BossSpider, Checkpoint, SearchUrl, SpiderConfig
+
+
+@pytest.fixture
+def config(tmp_path):
+    return SpiderConfig(output_dir=str(tmp_path), keywords=["Python", "Java"], max_pages=3)
+
+
+def test_new_checkpoint_state(config):
+    checkpoint = Checkpoint.open(config, resume=False)
+    assert checkpoint.pending(config.keywords) == ["Python", "Java"]
+    assert checkpoint.output.startswith("boss_jobs_")
+    assert checkpoint.resume_point("Python") is None
+
+
+def test_page_done_saves_next_position_atomically(config):
+    checkpoint = Checkpoint.open(config, resume=False)
+    checkpoint.page_done("Python", 15, 2, "https://example/page=2")
+    saved = Checkpoint.load(checkpoint.path)
+    assert saved.state["emitted"] == 15
+    assert saved.resume_point("Python") == {"page": 2, "url": "https://example/page=2"}
+    
+    checkpoint.page_done("Python", 5)  # 最后一页：不改动位置
+    assert Checkpoint.load(checkpoint.path).state["emitted"] == 20
+
+
+def test_keyword_done_clears_progress(config):
+    checkpoint = Checkpoint.open(config, resume=False)
+    checkpoint.page_done("Python", 1, 2, "u")
+    checkpoint.keyword_done("Python")
+    resumed = Checkpoint.open(config, resume=True)
+    assert resumed.pending(config.keywords) == ["Java"]
+    assert resumed.resume_point("Python") is None
+    assert resumed.output == checkpoint.output
+
+
+def test_resume_rejects_changed_keywords(config, tmp_path):
+    Checkpoint.open(config, resume=False).save()
+    changed = SpiderConfig(output_dir=str(tmp_path), keywords=["Go"])
+    assert Checkpoint.open(changed, resume=True).pending(changed.keywords) == ["Go"]
+
+
+def test_corrupt_checkpoint_starts_over(config):
+    checkpoint = Checkpoint.open(config, resume=False)
+    with open(checkpoint.path, "w") as f:
+        f.write("{not json")
+    assert Checkpoint.load(checkpoint.path) is None
+
+
+def test_finish_removes_file(config):
+    checkpoint = Checkpoint.open(config, resume=False)
+    checkpoint.save()
+    checkpoint.finish()
+    assert Checkpoint.load(checkpoint.path) is None
+
+
+class PagingSpider(BossSpider):
+    """不启动浏览器：结果页和翻页由脚本决定，用于检查断点的写入时机"""
+    
+    def __init__(self, config, next_results):
+        super().__init__(config)
+        self.next_results = list(next_results)  # 每次翻页的结果：True / False / 异常
+        self.crawled = []
+    
+    def open_results(self, keyword, page_num, city=None, filters=None):
+        self.current_page = page_num
+        return True
+    
+    def crawl_current_page(self, debug=False):
+        self.crawled.append(self.current_page)
+        return 10
+    
+    def go_to_next_page(self):
+        outcome = self.next_results.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if outcome:
+            self.current_page += 1
+        return outcome
+    
+    def throttle(self):
+        pass
+
+
+def paging_spider(config, next_results):
+    spider = PagingSpider(config, next_results)
+    spider.checkpoint = Checkpoint.open(config, resume=True)
+    return spider
+
+
+def test_navigation_error_keeps_keyword_pending(config):
+    spider = paging_spider(config, [BlockedError("验证页")])
+    with pytest.raises(BlockedError):
+        spider.crawl_keyword("Python")
+    checkpoint = Checkpoint.load(spider.checkpoint.path)
+    assert checkpoint.pending(config.keywords) == ["Python", "Java"]
+    assert checkpoint.resume_point("Python") == {
+        "page": 2, "url": SearchUrl.build(config, "Python", 2, filters=None),
+    }
+    
+    # 续爬从第 2 页开始，不重抓第 1 页
+    resumed = paging_spider(config, [True])
+    resumed.crawl_keyword("Python")
+    assert resumed.crawled == [2, 3]
+    assert resumed.checkpoint.pending(config.keywords) == ["Java"]
+    assert resumed.checkpoint.state["emitted"] == 30
+
+
+def test_real_end_of_results_marks_keyword_done(config):
+    spider = paging_spider(config, [False])
+    spider.crawl_keyword("Python")
+    assert spider.crawled == [1]
+    assert spider.checkpoint.pending(config.keywords) == ["Java"]
+
+
+def test_max_pages_marks_keyword_done(config):
+    spider = paging_spider(config, [True, True])
+    spider.crawl_keyword("Python")
+    assert spider.crawled == [1, 2, 3]
+    assert spider.checkpoint.resume_point("Python") is None
+    assert spider.checkpoint.pending(config.keywords) == ["Java"]
+
+
+def test_click_mode_resume_url_follows_loaded_page(tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path), keywords=["Python"], max_pages=3, direct_url=False)
+    spider = BossSpider(config)
+    loaded = "https://www.zhipin.com/web/geek/job?query=Python&city=101280600&salary=405&page=1"
+    page, url = spider.next_position("Python", 1, loaded)
+    assert page == 2
+    assert url == "https://www.zhipin.com/web/geek/job?query=Python&city=101280600&salary=405&page=2"
+    assert spider.next_position("Python", 3, loaded) == (None, None)
+    # 直接打开模式仍按配置拼接
+    config.direct_url = True
+    assert spider.next_position("Python", 1, loaded)[1] == SearchUrl.build(config, "Python", 2)
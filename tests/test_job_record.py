@@ -0,0 +1,74 @@
+import pickle
+import sys
+
+import pytest
+
+from spider import JobParser, JobRecord, SeenJobsIndex
+
+
+@pytest.fixture
+def record():
+    return JobParser.build_job_data({
+        "title": "Python 开发", "company": "字节跳动", "salary": "20-30K", "tags": ["3-5年", "本科"],
+        "location": "北京·海淀区", "link": "/job_detail/abc.html",
+    }, crawl_time="2024-01-01 00:00:00")
+
+
+def test_item_access_and_get(record):
+    assert isinstance(record, JobRecord)
+    assert record["职位名称"] == "Python 开发"
+    assert record["职位链接"] == "https://www.zhipin.com/job_detail/abc.html"
+    with pytest.raises(KeyError):
+        record["不存在"]
+    assert record.get("不存在") is None
+    assert record.get("职位描述", "") == ""
+    record["薪资"] = "25-35K"
+    assert record.salary == "25-35K"
+    with pytest.raises(KeyError):
+        record["不存在"] = 1
+
+
+def test_keys_items_follow_column_order(record):
+    assert record.keys() == list(JobRecord.COLUMNS)
+    assert list(record) == record.keys()
+    assert len(record) == len(JobRecord.COLUMNS)
+    assert dict(record.items())["公司名称"] == "字节跳动"
+    assert record.values() == record.row()
+    assert "职位描述" not in record
+
+
+def test_optional_columns_appear_once_set(record):
+    record.update({"职位描述": "负责后端开发", "招聘者": "张女士"})
+    record["重复组"] = "abc"
+    keys = record.keys()
+    assert keys[-5:] == list(JobRecord.DETAIL_COLUMNS) + list(JobRecord.DEDUP_COLUMNS)
+    assert "职位描述" in record
+    assert record.to_dict()["招聘者"] == "张女士"
+
+
+def test_equals_dict_with_same_items(record):
+    as_dict = record.to_dict()
+    assert record == as_dict
+    assert as_dict == record
+    assert JobRecord.as_dict(record) == as_dict
+    assert JobRecord.as_dict(as_dict) is as_dict
+    as_dict["薪资"] = "其他"
+    assert record != as_dict
+    assert record != "Python 开发"
+
+
+def test_records_are_unhashable_like_dicts(record):
+    with pytest.raises(TypeError):
+        hash(record)
+    # 做集合键时使用职位 ID
+    assert {SeenJobsIndex.record_id(record)} == {"abc"}
+
+
+def test_pickle_round_trip_reinterns(record):
+    restored = pickle.loads(pickle.dumps(record))
+    assert restored == record
+    assert restored.company is sys.intern("字节跳动")
+
+
+def test_row_for_unknown_columns(record):
+    assert record.row(["职位名称", "旧列"]) == ("Python 开发", None)
@@ -0,0 +1,98 @@
+import re
+
+import pytest
+
+from spider import Metrics, MetricsExporter, SpiderConfig
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})? (\S+)$')
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = Metrics()
+    monkeypatch.setattr(Metrics, "active", metrics)
+    return metrics
+
+
+def parse(text):
+    """按 OpenMetrics 文本格式拆成 {族名: (类型, [(样本名, 标签文本, 值)])}，同时检查基本结构"""
+    assert text.endswith("# EOF\n")
+    lines = text[:-1].split("\n")
+    assert lines.count("# EOF") == 1
+    families, current = {}, None
+    for line in lines[:-1]:
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert name not in families, f"{name} 重复声明"
+            families[name] = (kind, [])
+            current = name
+            continue
+        if line.startswith("# UNIT "):
+            assert line.split(" ")[2] == current
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        sample, _, labels, value = match.groups()
+        # 样本必须紧跟在所属族的 TYPE 之后（同一族的样本连续）
+        assert current and sample.startswith(current), line
+        float(value)
+        families[current][1].append((sample[len(current):], labels or "", float(value)))
+    return families
+
+
+def test_counters_have_type_and_total_suffix(metrics):
+    Metrics.inc("retries", operation="navigation")
+    Metrics.inc("retries", 2, operation="navigation")
+    Metrics.inc("retries", operation="search")
+    Metrics.inc("records_written", 30)
+    families = parse(metrics.render())
+    kind, samples = families["boss_retries"]
+    assert kind == "counter"
+    assert samples == [("_total", 'operation="navigation"', 3.0), ("_total", 'operation="search"', 1.0)]
+    assert families["boss_records_written"] == ("counter", [("_total", "", 30.0)])
+
+
+def test_histogram_buckets_are_cumulative(metrics):
+    for seconds in (0.003, 0.2, 0.2, 7.0, 100.0):
+        Metrics.observe("navigation", seconds, kind="results")
+    families = parse(metrics.render())
+    kind, samples = families["boss_navigation_seconds"]
+    assert kind == "histogram"
+    buckets = [value for suffix, labels, value in samples if suffix == "_bucket"]
+    assert buckets == sorted(buckets)
+    assert len(buckets) == len(Metrics.BUCKETS) + 1
+    assert ("_bucket", 'kind="results",le="+Inf"', 5.0) in samples
+    assert ("_count", 'kind="results"', 5.0) in samples
+    assert ("_sum", 'kind="results"', pytest.approx(107.403)) in samples
+
+
+def test_label_values_are_escaped(metrics):
+    Metrics.inc("selector_lookups", field='a"b\\c', result="hit")
+    text = metrics.render()
+    assert 'field="a\\"b\\\\c"' in text
+    parse(text)
+
+
+def test_empty_registry_renders_eof_only(metrics):
+    assert metrics.render() == "# EOF\n"
+
+
+def test_exporter_writes_gauges(metrics, tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path))
+    Metrics.inc("retries", operation="navigation")
+    exporter = MetricsExporter(config, metrics, {"total_pages": 4, "total_valid": 90})
+    exporter.write()
+    with open(config.metrics_file, encoding="utf-8") as f:
+        families = parse(f.read())
+    assert families["boss_spider_total_pages"] == ("gauge", [("", "", 4.0)])
+    assert families["boss_spider_total_valid"] == ("gauge", [("", "", 90.0)])
+    assert families["boss_spider_total_known"] == ("gauge", [("", "", 0.0)])
+    assert "boss_retries" in families
+
+
+def test_inactive_metrics_are_noops(monkeypatch):
+    monkeypatch.setattr(Metrics, "active", None)
+    Metrics.inc("retries")
+    with Metrics.timer("parse"):
+        pass
+    assert Metrics.active is None
@@ -0,0 +1,84 @@
+import pytest
+
+from spider import NearDuplicateIndex
+
+
+def job(title, link="", company="字节跳动", location="北京·海淀区", salary="20-40K", welfare="五险一金，年终奖"):
+    return {"职位名称": title, "公司名称": company, "工作地点": location, "薪资": salary, "福利待遇": welfare, "职位链接": link}
+
+
+def link(job_id):
+    return f"https://www.zhipin.com/job_detail/{job_id}.html"
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "near_dups.db"))
+    yield index
+    index.close()
+
+
+def test_near_duplicate_titles_share_cluster(index):
+    jobs = index.tag([
+        job("Python后端开发工程师", link("a1")),
+        job("Python 后端开发工程师（急招）", link("a2")),
+        job("前端开发工程师", link("a3"), salary="15-25K"),
+    ])
+    assert jobs[0]["重复组"] == jobs[1]["重复组"] == "a1"
+    assert jobs[2]["重复组"] == "a3"
+    assert index.stats["matched"] == 1
+
+
+def test_same_title_other_company_is_not_duplicate(index):
+    jobs = index.tag([
+        job("Python后端开发工程师", link("a1")),
+        job("Python后端开发工程师", link("b1"), company="美团"),
+        job("Python后端开发工程师", link("c1"), location="上海·浦东新区"),
+    ])
+    assert [j["重复组"] for j in jobs] == ["a1", "b1", "c1"]
+
+
+def test_linkless_jobs_get_distinct_clusters(index):
+    jobs = index.tag([
+        job("Python后端开发工程师"),
+        job("数据分析师", company="美团"),
+        job("产品经理", company="腾讯", location="深圳·南山区"),
+    ])
+    clusters = [j["重复组"] for j in jobs]
+    assert "" not in clusters
+    assert len(set(clusters)) == 3
+    assert all(cluster.startswith("h:") for cluster in clusters)
+
+
+def test_drop_removes_clusters_already_emitted(index):
+    first = index.tag([job("Python后端开发工程师", link("a1"))], drop=True)
+    second = index.tag([
+        job("Python后端开发工程师(急聘)", link("a2")),
+        job("算法工程师", link("a3")),
+    ], drop=True)
+    assert len(first) == 1
+    assert [j["职位链接"] for j in second] == [link("a3")]
+    assert index.stats["dropped"] == 1
+
+
+def test_clusters_persist_across_opens(tmp_path):
+    path = str(tmp_path / "near_dups.db")
+    index = NearDuplicateIndex(path)
+    index.tag([job("Python后端开发工程师", link("a1")), job("数据分析师")])
+    index.close()
+
+    index = NearDuplicateIndex(path)
+    jobs = index.tag([
+        job("Python后端开发工程师 (急招)", link("a9")),
+        job("数据分析师"),
+    ])
+    index.close()
+    assert jobs[0]["重复组"] == "a1"
+    assert jobs[1]["重复组"].startswith("h:")
+    assert index.stats["matched"] == 1
+
+
+def test_signatures_are_stable():
+    grams = NearDuplicateIndex.bigrams("Python后端开发")
+    assert NearDuplicateIndex.minhash(grams) == NearDuplicateIndex.minhash(frozenset(grams))
+    assert NearDuplicateIndex.normalize(" A-B（c）") == "abc"
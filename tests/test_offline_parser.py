@@ -0,0 +1,103 @@
+from html import escape
+
+import pytest
+
+from spider import ApiCapture, MockFixtures, OfflineParser, SnapshotStore, SpiderConfig
+
+
+def area(job):
+    return "·".join(filter(None, [job["cityName"], job["areaDistrict"], job["businessDistrict"]]))
+
+
+def primary_card(job):
+    """与 MockBossHandler.RESULTS_HTML 中首选选择器的卡片结构相同"""
+    return f"""
+<li class="job-card-wrapper"><div class="job-card-body">
+  <a class="job-card-left" href="/job_detail/{escape(job['encryptJobId'])}.html"><span class="job-name">{escape(job['jobName'])}</span>
+    <span class="job-area">{escape(area(job))}</span></a>
+  <div class="job-info"><span class="salary">{escape(job['salaryDesc'])}</span>
+    <ul class="tag-list"><li>{escape(job['jobExperience'])}</li><li>{escape(job['jobDegree'])}</li></ul></div>
+  <div class="job-card-right"><h3 class="company-name"><a>{escape(job['brandName'])}</a></h3>
+    <ul class="company-tag-list"><li>{job['brandIndustry']}</li><li>{job['brandStageName']}</li><li>{job['brandScaleName']}</li></ul></div>
+</div><div class="job-card-footer"><div class="info-desc">{escape('，'.join(job['welfareList']))}</div></div></li>"""
+
+
+def fallback_card(job):
+    """只能由备用选择器命中的卡片结构"""
+    return f"""
+<li class="job-card">
+  <a href="/job_detail/{escape(job['encryptJobId'])}.html"><span class="job-title">{escape(job['jobName'])}</span></a>
+  <span class="red">{escape(job['salaryDesc'])}</span>
+  <span class="job-experience">{escape(job['jobExperience'])}</span><span class="job-education">{escape(job['jobDegree'])}</span>
+  <span class="area">{escape(area(job))}</span>
+  <h3 class="name">{escape(job['brandName'])}</h3>
+  <div class="welfare-list">{escape('，'.join(job['welfareList']))}</div>
+</li>"""
+
+
+def results_page(jobs, card=primary_card):
+    cards = "".join(card(job) for job in jobs)
+    return f"""<!DOCTYPE html><html><head><meta charset="utf-8"><title>职位列表</title></head><body>
+<div class="job-list"><ul class="job-list-box">{cards}</ul></div></body></html>"""
+
+
+@pytest.fixture
+def jobs():
+    return MockFixtures(seed=7, per_page=12).job_list("Python", 1)
+
+
+@pytest.mark.parametrize("card", [primary_card, fallback_card])
+def test_extract_cards_matches_api_fields(jobs, card):
+    extracted = OfflineParser.extract_cards(results_page(jobs, card))
+    assert extracted["total"] == len(jobs)
+    for row, job in zip(extracted["cards"], jobs):
+        expected = ApiCapture.to_raw(job)
+        for field in ("title", "link", "company", "salary", "experience", "education", "location"):
+            assert row[field] == expected[field], field
+
+
+def test_extract_cards_respects_limit(jobs):
+    extracted = OfflineParser.extract_cards(results_page(jobs), limit=5)
+    assert extracted["total"] == len(jobs)
+    assert len(extracted["cards"]) == 5
+
+
+def test_parse_html_builds_normalized_jobs(jobs):
+    parsed = OfflineParser.parse_html(results_page(jobs), "2024-01-01 00:00:00")
+    assert len(parsed) == len(jobs)
+    first = parsed[0]
+    assert first["职位链接"].endswith(f"/job_detail/{jobs[0]['encryptJobId']}.html")
+    assert first["抓取时间"] == "2024-01-01 00:00:00"
+    assert "薪资最低" in first and "薪资单位" in first
+
+
+def test_inner_text_breaks_blocks_and_skips_scripts():
+    import lxml.html
+    root = lxml.html.fragment_fromstring("<div><p>a</p>b<br>c<script>x()</script><span>d</span></div>")
+    # 与浏览器 innerText 一致：块级元素和 <br> 断行，行内元素相连，脚本不计入
+    assert OfflineParser.inner_text(root).split() == ["a", "b", "cd"]
+
+
+def test_empty_page_has_no_cards():
+    assert OfflineParser.extract_cards("<html><body><p>没有职位</p></body></html>")["total"] == 0
+
+
+def test_reparse_snapshot_store_parses_each_digest_once(tmp_path, jobs):
+    store = SnapshotStore(str(tmp_path / "snapshots"))
+    page = results_page(jobs)
+    store.put(page, "Python", 1)
+    store.put(page, "Python", 1)  # 内容相同，只存一份
+    store.put(results_page(jobs[:3]), "Python", 2)
+    store.close()
+    config = SpiderConfig(output_dir=str(tmp_path), save_csv=False, save_json=False)
+    parsed = OfflineParser.reparse(str(tmp_path / "snapshots"), config, workers=1)
+    assert len(parsed) == len(jobs) + 3
+
+
+def test_reparse_html_files(tmp_path, jobs):
+    (tmp_path / "page_20240101_120000.html").write_text(results_page(jobs), encoding="utf-8")
+    (tmp_path / "other.html").write_text(results_page(jobs), encoding="utf-8")
+    config = SpiderConfig(output_dir=str(tmp_path), save_csv=False, save_json=False)
+    parsed = OfflineParser.reparse(str(tmp_path), config, workers=1)
+    assert len(parsed) == len(jobs)
+    assert parsed[0]["抓取时间"] == "2024-01-01 12:00:00"
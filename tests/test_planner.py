@@ -0,0 +1,193 @@
+import json
+import logging
+
+import pytest
+
+from spider import BossSpider, QueryPlanner, SearchUrl, SpiderConfig
+
+
+@pytest.fixture
+def planner(config):
+    return QueryPlanner(config)
+
+
+def test_values_exclude_unfiltered_codes():
+    assert QueryPlanner.values("salary") == ["402", "403", "404", "405", "406", "407"]
+    assert SearchUrl.CITY_CODES["全国"] not in QueryPlanner.values("city")
+    assert SearchUrl.EXPERIENCE_CODES["不限"] not in QueryPlanner.values("experience")
+    with pytest.raises(ValueError):
+        QueryPlanner.values("industry")
+
+
+def test_default_splits_by_salary_bands(planner):
+    root = planner.root()
+    children = planner.split(root)
+    assert [child["salary"] for child in children] == QueryPlanner.values("salary")
+    # 薪资档位是叶子，不再继续拆分
+    assert planner.open_facet(children[0]) is None
+    assert planner.split(children[0]) == []
+
+
+def test_multi_band_salary_splits_into_its_bands(planner):
+    children = planner.split({"city": "101010100", "salary": "404,405"})
+    assert children == [{"city": "101010100", "salary": "404"}, {"city": "101010100", "salary": "405"}]
+
+
+def test_facets_split_in_configured_order(tmp_path):
+    planner = QueryPlanner(SpiderConfig(output_dir=str(tmp_path), split_facets=["salary", "city"]))
+    assert planner.open_facet({}) == "salary"
+    assert planner.open_facet({"salary": "405"}) == "city"
+    assert planner.open_facet({"salary": "405", "city": SearchUrl.CITY_CODES["全国"]}) == "city"
+    assert planner.open_facet({"salary": "405", "city": "101010100"}) is None
+
+
+def test_partial_facets_warn(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING):
+        QueryPlanner(SpiderConfig(output_dir=str(tmp_path), split_facets=["experience"]))
+    assert "experience" in caplog.text
+
+
+def test_coverage_gaps(planner):
+    root = planner.root()
+    children = planner.split(root)
+    planner.record_total(root, 500)
+    for child in children[:-1]:
+        planner.record_total(child, 80)
+    # 有子切片总数未知时不判断
+    assert planner.coverage_gaps() == []
+    planner.record_total(children[-1], 10)
+    assert planner.coverage_gaps() == [(QueryPlanner.label(root), 500, 410)]
+    planner.record_total(children[-1], 100)
+    assert planner.coverage_gaps() == []
+    planner.root()
+    assert planner.totals == {} and planner.children == {}
+
+
+def test_cap_and_pages_needed(planner):
+    cap = planner.config.page_cap * planner.config.page_size
+    assert not planner.over_cap(cap)
+    assert planner.over_cap(cap + 1)
+    assert planner.pages_needed(0) == 1
+    assert planner.pages_needed(31) == 2
+    assert planner.pages_needed(cap * 5) == planner.config.page_cap
+
+
+def test_card_limit_does_not_shrink_site_pages(tmp_path):
+    # items_per_page 只截断每页抓取的条数，站点仍按 page_size 分页
+    planner = QueryPlanner(SpiderConfig(output_dir=str(tmp_path), items_per_page=5))
+    assert not planner.over_cap(200)
+    assert planner.pages_needed(200) == 7
+
+
+def test_label():
+    assert QueryPlanner.label({}) == "全部"
+    assert QueryPlanner.label({"city": "101010100", "salary": "405"}) == "city=101010100 salary=405"
+
+
+class SliceSpider(BossSpider):
+    def __init__(self, config, cards):
+        super().__init__(config)
+        self.cards = cards
+
+    def open_results(self, keyword, page_num, city=None, filters=None):
+        return True
+
+    def crawl_current_page(self, debug=False):
+        self.stats["total_crawled"] += self.cards
+        return self.cards
+
+    def open_next_results(self):
+        return True
+
+    def throttle(self):
+        pass
+
+
+def test_crawl_slice_reports_capped_slice(tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path), split_queries=True, page_cap=2, checkpoint=False)
+    spider = SliceSpider(config, cards=config.items_per_page)
+    assert spider.crawl_slice("python", {"salary": "405"}) is True
+    assert spider.planner.stats["pages"] == 2
+    spider.cards = 5
+    assert spider.crawl_slice("python", {"salary": "404"}) is False
+
+
+def test_crawl_slice_with_zero_page_cap(tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path), split_queries=True, page_cap=0, checkpoint=False)
+    spider = SliceSpider(config, cards=config.items_per_page)
+    assert spider.crawl_slice("python", {}) is False
+    assert spider.planner.stats["pages"] == 0
+
+
+class ScriptedSliceSpider(BossSpider):
+    """切片结果由脚本给出：{切片标签: [每页的职位 ID 列表]}，fail_at=(标签, 页码) 时翻到该页抛出异常"""
+
+    def __init__(self, config, pages, fail_at=None):
+        super().__init__(config)
+        self.pages = pages
+        self.fail_at = fail_at
+        self.crawled = []
+        self.position = None
+
+    def open_results(self, keyword, page_num, city=None, filters=None):
+        label = QueryPlanner.label(filters or {})
+        return self.open_label(label, page_num)
+
+    def open_label(self, label, page_num):
+        if page_num > len(self.pages.get(label, [])):
+            return False
+        self.position = (label, page_num)
+        return True
+
+    def crawl_current_page(self, debug=False):
+        self.crawled.append(self.position)
+        label, page_num = self.position
+        jobs = [
+            {"职位名称": job_id, "公司名称": "A", "职位链接": f"https://www.zhipin.com/job_detail/{job_id}.html"}
+            for job_id in self.pages[label][page_num - 1]
+        ]
+        self.stats["total_crawled"] += len(jobs)
+        return self.emit(jobs, self.current_keyword)
+
+    def open_next_results(self):
+        label, page_num = self.position
+        if self.fail_at == (label, page_num + 1):
+            raise RuntimeError("导航失败")
+        return self.open_label(label, page_num + 1)
+
+    def throttle(self):
+        pass
+
+
+def test_split_resume_continues_slice_and_skips_emitted(tmp_path):
+    config = SpiderConfig(
+        output_dir=str(tmp_path), keywords=["python"], city="", split_queries=True, page_cap=2, items_per_page=2,
+        save_csv=False, metrics=False, save_html=False, selector_cache=False, stream_json_array=False,
+    )
+    pages = {
+        "全部": [["a", "b"], ["c", "d"]],
+        "salary=402": [["a", "x"]],
+        "salary=403": [["c", "y"], ["b", "z"]],
+        "salary=404": [["w"]],
+    }
+    spider = ScriptedSliceSpider(config, pages, fail_at=("salary=403", 2))
+    spider.prepare_run(resume=False)
+    with pytest.raises(RuntimeError):
+        spider.crawl_keyword("python")
+    spider.save_results()
+    progress = spider.checkpoint.resume_point("python")
+    assert progress["page"] == 2
+    assert progress["slices"][-1] == {"salary": "403"}
+
+    resumed = ScriptedSliceSpider(config, pages)
+    resumed.prepare_run(resume=True)
+    assert resumed.run_ids == spider.run_ids
+    resumed.crawl_keyword("python")
+    resumed.save_results()
+    assert resumed.crawled[0] == ("salary=403", 2)
+    assert ("全部", 1) not in resumed.crawled
+    assert resumed.checkpoint.pending(config.keywords) == []
+
+    with open(resumed.writer.paths[0], encoding="utf-8") as f:
+        titles = [json.loads(line)["职位名称"] for line in f]
+    assert sorted(titles) == ["a", "b", "c", "d", "w", "x", "y", "z"]
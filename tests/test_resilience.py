@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from spider import BlockedError, CircuitBreaker, Resilience, RetryPolicy, SpiderConfig, Utils
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(Utils, "sleep_scale", 0.0)
+
+
+def flaky(outcomes):
+    """依次抛出 outcomes 中的异常，None 表示成功"""
+    calls = []
+
+    def fn():
+        calls.append(len(calls) + 1)
+        outcome = outcomes[len(calls) - 1]
+        if outcome is not None:
+            raise outcome
+        return "ok"
+
+    fn.calls = calls
+    return fn
+
+
+def test_backoff_doubles_within_jitter_and_cap():
+    policy = RetryPolicy(attempts=6, base_delay=2.0, max_delay=10.0, jitter=0.3)
+    for attempt, expected in [(1, 2.0), (2, 4.0), (3, 8.0), (4, 10.0), (5, 10.0)]:
+        for _ in range(50):
+            assert expected * 0.7 <= policy.delay(attempt) <= expected * 1.3
+
+
+def test_backoff_scales_with_sleep_scale(no_sleep):
+    assert RetryPolicy(attempts=3, base_delay=2.0, max_delay=10.0).delay(2) == 0.0
+
+
+def test_breaker_opens_after_threshold_and_backs_off():
+    breaker = CircuitBreaker(threshold=2, cooldown=100.0, max_factor=4)
+    assert breaker.record(False) is False
+    assert breaker.remaining() == 0.0
+    assert breaker.record(False) is True
+    assert 99.0 < breaker.remaining() <= 100.0
+
+    # 冷却结束后放行一次试探：失败立即再次熔断，冷却时间翻倍
+    breaker.open_until = 0.0
+    assert breaker.record(False) is True
+    assert 199.0 < breaker.remaining() <= 200.0
+    breaker.open_until = 0.0
+    breaker.record(False)
+    breaker.open_until = 0.0
+    breaker.record(False)
+    assert 399.0 < breaker.remaining() <= 400.0  # 不超过 max_factor 倍
+
+    # 试探成功则恢复，重新累计失败次数
+    breaker.open_until = 0.0
+    assert breaker.record(True) is False
+    assert (breaker.failures, breaker.streak) == (0, 0)
+    assert breaker.record(False) is False
+
+
+def test_half_open_skips_cooldown():
+    breaker = CircuitBreaker(threshold=1, cooldown=100.0)
+    breaker.record(False)
+    assert breaker.remaining() > 0
+    breaker.half_open()
+    assert breaker.remaining() == 0.0
+    assert breaker.streak == 1
+
+
+def test_run_retries_any_error_then_succeeds(config, no_sleep):
+    resilience = Resilience(config)
+    fn = flaky([TimeoutError("超时"), BlockedError("验证页"), None])
+    assert resilience.run("navigation", fn) == "ok"
+    assert fn.calls == [1, 2, 3]
+    assert resilience.stats["failures"] == 2
+    assert resilience.stats["blocks"] == 1
+    assert resilience.stats["retries"] == 2
+    assert resilience.breaker.failures == 0
+
+
+def test_run_gives_up_with_last_error(tmp_path, no_sleep):
+    resilience = Resilience(SpiderConfig(output_dir=str(tmp_path), max_retries=2, breaker_threshold=10))
+    fn = flaky([RuntimeError("1"), RuntimeError("2"), RuntimeError("3"), None])
+    with pytest.raises(RuntimeError, match="3"):
+        resilience.run("search", fn)
+    assert fn.calls == [1, 2, 3]
+    assert resilience.stats["gave_up"] == 1
+
+
+def test_parse_failures_do_not_trip_breaker(tmp_path, no_sleep):
+    resilience = Resilience(SpiderConfig(output_dir=str(tmp_path), breaker_threshold=1))
+    with pytest.raises(ValueError):
+        resilience.run("parse", flaky([ValueError("解析"), ValueError("解析")]))
+    assert resilience.breaker.failures == 0
+    assert resilience.stats["trips"] == 0
+
+    with pytest.raises(BlockedError):
+        resilience.run("navigation", flaky([BlockedError("验证页")] * 10))
+    assert resilience.stats["trips"] > 0
+
+
+def test_rotate_mode_switches_context_and_half_opens(tmp_path):
+    rotations = []
+    config = SpiderConfig(
+        output_dir=str(tmp_path), breaker_threshold=1, breaker_action="rotate", breaker_cooldown=100.0,
+        retry_base_delay=0.0, retry_max_delay=0.0,
+    )
+    resilience = Resilience(config, rotate=lambda: rotations.append(1))
+    assert resilience.run("navigation", flaky([BlockedError("验证页"), None])) == "ok"
+    assert rotations == [1]
+    assert resilience.stats["rotations"] == 1
+    assert resilience.breaker.remaining() == 0.0
+
+
+def test_pause_mode_ignores_rotate(config, no_sleep):
+    resilience = Resilience(config, rotate=lambda: pytest.fail("pause 模式不应更换上下文"))
+    assert resilience.rotate is None
+
+
+def test_run_async_retries(config, no_sleep):
+    resilience = Resilience(config)
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) < 2:
+            raise BlockedError("验证页")
+        return "ok"
+
+    assert asyncio.run(resilience.run_async("navigation", fn)) == "ok"
+    assert len(calls) == 2
+    assert resilience.stats["blocks"] == 1
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import pytest
+
+from spider import ResourcePolicy, SpiderConfig
+
+
+@pytest.fixture
+def policy(tmp_path):
+    return ResourcePolicy(SpiderConfig(
+        output_dir=str(tmp_path), block_url_patterns=["hm.baidu.com", "/actionLog"],
+        allow_url_patterns=["static.zhipin.com/logo"],
+    ))
+
+
+@pytest.mark.parametrize("resource_type, url, blocked", [
+    ("image", "https://img.bosszhipin.com/a.png", True),
+    ("font", "https://static.zhipin.com/a.woff2", True),
+    ("media", "https://v.zhipin.com/a.mp4", True),
+    ("script", "https://hm.baidu.com/hm.js?x", True),
+    ("xhr", "https://www.zhipin.com/wapi/zpCommon/actionLog/common.json", True),
+    ("document", "https://www.zhipin.com/web/geek/job?query=python", False),
+    ("xhr", "https://www.zhipin.com/wapi/zpgeek/search/joblist.json", False),
+    ("image", "https://static.zhipin.com/logo.png", False),  # 允许规则优先于类型
+])
+def test_should_block(policy, resource_type, url, blocked):
+    assert policy.should_block(resource_type, url) is blocked
+
+
+def test_patterns_are_literal_substrings(tmp_path):
+    policy = ResourcePolicy(SpiderConfig(output_dir=str(tmp_path), block_url_patterns=["a.b"], block_resource_types=[]))
+    assert policy.should_block("script", "https://x/a.b/y")
+    assert not policy.should_block("script", "https://x/axb/y")
+
+
+def test_empty_rules_block_nothing(tmp_path):
+    policy = ResourcePolicy(SpiderConfig(output_dir=str(tmp_path), block_url_patterns=[], block_resource_types=[]))
+    assert not policy.should_block("image", "https://hm.baidu.com/x.png")
+
+
+def response(length=None):
+    return SimpleNamespace(headers={"content-length": length} if length is not None else {})
+
+
+def test_counts_requests_and_response_bytes(policy):
+    policy.record("image", True)
+    policy.record("image", True)
+    policy.record("font", True)
+    policy.record("document", False)
+    for length in ("1024", "2048", None, "abc"):
+        policy.on_response(response(length))
+    assert policy.stats == {
+        "allowed_requests": 1, "blocked_requests": 3, "blocked_by_type": {"image": 2, "font": 1},
+        "allowed_bytes": 3072, "unsized_responses": 2,
+    }
+
+
+def test_merge_sums_all_counters(policy, tmp_path):
+    other = ResourcePolicy(SpiderConfig(output_dir=str(tmp_path)))
+    policy.record("image", True)
+    policy.on_response(response("100"))
+    other.record("image", True)
+    other.record("media", True)
+    other.record("xhr", False)
+    other.on_response(response("50"))
+    merged = ResourcePolicy.merge([policy.stats, other.stats])
+    assert merged == {
+        "allowed_requests": 1, "blocked_requests": 3, "blocked_by_type": {"image": 2, "media": 1},
+        "allowed_bytes": 150, "unsized_responses": 0,
+    }
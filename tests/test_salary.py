@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from spider import MockFixtures, SalaryNormalizer, Utils
+
+
+@pytest.mark.parametrize("salary, low, high, unit, period, months", [
+    ("10-20K", 10, 20, "K", "月", 12),
+    ("15-25K·14薪", 15, 25, "K", "月", 14),
+    ("1.5-2万", 15, 20, "万", "月", 12),
+    ("1.5万-2万", 15, 20, "万", "月", 12),
+    ("8千-1.2万", 8, 12, "万", "月", 12),
+    ("3-5千", 3, 5, "千", "月", 12),
+    ("15K", 15, 15, "K", "月", 12),
+    ("200-300元/天", 4.35, 6.52, "元", "天", 12),
+    ("50-80元/时", 8.7, 13.92, "元", "时", 12),
+    ("20-30万/年", 16.67, 25, "万", "年", 12),
+])
+def test_parse_units_and_periods(salary, low, high, unit, period, months):
+    parsed = SalaryNormalizer.parse(salary)
+    assert parsed["min"] == pytest.approx(low, abs=0.01)
+    assert parsed["max"] == pytest.approx(high, abs=0.01)
+    assert parsed["min"] <= parsed["max"]
+    assert (parsed["unit"], parsed["period"], parsed["months"]) == (unit, period, months)
+
+
+def test_annual_uses_months_for_monthly_pay():
+    assert SalaryNormalizer.parse("10-20K·13薪")["annual"] == pytest.approx(15 * 13)
+    assert SalaryNormalizer.parse("200-300元/天")["annual"] == pytest.approx(5.44 * 12, abs=0.1)
+
+
+def test_parse_salary_keeps_legacy_shape():
+    assert Utils.parse_salary("面议") == {"min": 0, "max": 0, "unit": "面议"}
+    assert Utils.parse_salary("") == {"min": 0, "max": 0, "unit": "面议"}
+    assert Utils.parse_salary("薪资保密") == {"min": 0, "max": 0, "unit": "未知", "raw": "薪资保密"}
+    assert {"min", "max", "avg", "unit"} <= Utils.parse_salary("10-20K").keys()
+
+
+def test_vectorized_matches_scalar():
+    salaries = MockFixtures.SALARIES + ["8千-1.2万", "20-30万/年", "50-80元/时", "薪资保密", "", None]
+    frame = SalaryNormalizer.normalize(salaries)
+    for salary, row in zip(salaries, frame.to_dict("records")):
+        parsed = SalaryNormalizer.parse(salary)
+        assert row["薪资最低"] == pytest.approx(parsed["min"], abs=0.01), salary
+        assert row["薪资最高"] == pytest.approx(parsed["max"], abs=0.01), salary
+        assert row["薪资单位"] == parsed["unit"], salary
+        if "annual" in parsed:
+            assert row["年薪"] == pytest.approx(parsed["annual"], abs=0.01), salary
+
+
+def test_normalize_keeps_index_and_repeats():
+    series = pd.Series(["10-20K", "面议", "10-20K"], index=[5, 7, 9])
+    frame = SalaryNormalizer.normalize(series)
+    assert list(frame.index) == [5, 7, 9]
+    assert list(frame["薪资最低"]) == [10, 0, 10]
+    assert list(frame["薪资单位"]) == ["K", "面议", "K"]
+
+
+def test_apply_fills_columns_in_place():
+    jobs = [{"薪资": "8千-1.2万"}, {"薪资": "面议"}]
+    assert SalaryNormalizer.apply(jobs) is jobs
+    assert jobs[0]["薪资最低"] == 8 and jobs[0]["薪资最高"] == 12
+    assert set(SalaryNormalizer.COLUMNS) <= jobs[1].keys()
+
+
+def test_normalize_file_csv(tmp_path):
+    path = tmp_path / "jobs.csv"
+    pd.DataFrame({"职位名称": ["a", "b"], "薪资": ["8千-1.2万", "15K"]}).to_csv(path, index=False, encoding="utf-8-sig")
+    output = SalaryNormalizer.normalize_file(str(path))
+    df = pd.read_csv(output, encoding="utf-8-sig")
+    assert list(df["薪资最低"]) == [8, 15]
+    assert list(df["薪资最高"]) == [12, 15]
+
+
+def test_normalize_file_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        SalaryNormalizer.normalize_file(str(tmp_path / "jobs.txt"))
@@ -0,0 +1,72 @@
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from spider import QueryPlanner, SearchUrl, SpiderConfig
+
+
+def query(url):
+    return {name: values[0] for name, values in parse_qs(urlsplit(url).query).items()}
+
+
+@pytest.mark.parametrize("salary_range, code", [
+    ("", None),
+    ("405", "405"),
+    ("10-20", "405"),
+    ("20-50", "406"),
+    ("15-30K", "405,406"),
+    ("3-10", "403,404"),
+    ("60", "407"),
+    ("0-100", "402,403,404,405,406,407"),
+    ("很多", None),
+])
+def test_salary_code(salary_range, code):
+    assert SearchUrl.salary_code(salary_range) == code
+
+
+def test_city_and_experience_codes():
+    assert SearchUrl.city_code("深圳") == "101280600"
+    assert SearchUrl.city_code("深圳市") == "101280600"
+    assert SearchUrl.city_code("101010100") == "101010100"
+    assert SearchUrl.city_code("火星") is None
+    assert SearchUrl.experience_code("3-5年") == "105"
+    assert SearchUrl.experience_code("1 - 3年") == "104"
+    assert SearchUrl.experience_code("经验不限") == SearchUrl.experience_code("不限")
+
+
+def test_filters_skip_unset_conditions(tmp_path):
+    assert SearchUrl.filters(SpiderConfig(output_dir=str(tmp_path), city="")) == {}
+    config = SpiderConfig(output_dir=str(tmp_path), city="上海", salary_range="20-50", experience="应届生")
+    assert SearchUrl.filters(config) == {"city": "101020100", "experience": "102", "salary": "406"}
+    assert SearchUrl.filters(config, city="北京")["city"] == "101010100"
+
+
+def test_build_encodes_config_filters(tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path), city="深圳", salary_range="15-30", experience="3-5年")
+    url = SearchUrl.build(config, "C++ 开发", 3)
+    assert url.startswith("https://www.zhipin.com/web/geek/job?")
+    assert query(url) == {
+        "query": "C++ 开发", "city": "101280600", "experience": "105", "salary": "405,406", "page": "3",
+    }
+
+
+def test_build_with_explicit_filters_round_trips(tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path), city="深圳", salary_range="15-30")
+    planner = QueryPlanner(config)
+    for child in planner.split(planner.root()):
+        url = SearchUrl.build(config, "python", 2, filters=child)
+        assert query(url) == {"query": "python", **child, "page": "2"}
+    # 空 filters 表示不筛选，不回退到配置
+    assert query(SearchUrl.build(config, "python", filters={})) == {"query": "python", "page": "1"}
+
+
+def test_build_uses_base_url(tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path), base_url="http://127.0.0.1:8000/", city="")
+    assert SearchUrl.build(config, "go") == "http://127.0.0.1:8000/web/geek/job?query=go&page=1"
+
+
+def test_with_page_keeps_other_parameters():
+    url = "https://www.zhipin.com/web/geek/job?query=C%2B%2B&city=101280600&page=4&ka=page-4"
+    moved = SearchUrl.with_page(url, 5)
+    assert query(moved) == {"query": "C++", "city": "101280600", "ka": "page-4", "page": "5"}
+    assert query(SearchUrl.with_page("https://www.zhipin.com/web/geek/job?query=go", 2))["page"] == "2"
@@ -0,0 +1,99 @@
+import pytest
+
+from spider import BossSpider, SeenJobsIndex, SpiderConfig, SpiderPool
+
+
+def job(job_id, title="Python 开发", company="字节跳动"):
+    link = f"https://www.zhipin.com/job_detail/{job_id}.html" if job_id else ""
+    return {"职位链接": link, "职位名称": title, "公司名称": company, "工作地点": "北京·朝阳区", "薪资": "20-30K"}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SeenJobsIndex(str(tmp_path / "seen.db"))
+    yield index
+    index.close()
+
+
+def test_job_id_from_link():
+    assert SeenJobsIndex.job_id("https://www.zhipin.com/job_detail/abc~123.html?ka=x") == "abc~123"
+    assert SeenJobsIndex.job_id("/other/path") == "/other/path"
+    assert SeenJobsIndex.job_id("") == ""
+
+
+def test_record_id_falls_back_to_content_hash():
+    a, b = job(None, company="字节跳动"), job(None, company="腾讯")
+    assert SeenJobsIndex.record_id(a) != SeenJobsIndex.record_id(b)
+    assert SeenJobsIndex.record_id(a) == SeenJobsIndex.record_id(dict(a))
+    assert SeenJobsIndex.record_id(job("x1")) == "x1"
+
+
+def test_split_does_not_record(index):
+    page = [job("a"), job("b")]
+    assert index.split(page) == (page, [])
+    assert index.split(page) == (page, []), "split 只查询，写入成功前不能记为已抓取"
+
+
+def test_mark_then_split(index):
+    index.mark([job("a")], "Python")
+    new, known = index.split([job("a"), job("b")])
+    assert [j["职位链接"] for j in new] == [job("b")["职位链接"]]
+    assert len(known) == 1
+
+
+def test_duplicates_within_page_are_known(index):
+    new, known = index.split([job("a"), job("a"), job(None), job(None)])
+    assert len(new) == 2 and len(known) == 2
+
+
+def test_mark_counts_repeat_sightings(index):
+    index.mark([job("a")], "Python")
+    index.mark([job("a")], "Java")
+    times, keyword = index.conn.execute("SELECT times_seen, keyword FROM seen_jobs WHERE job_id = 'a'").fetchone()
+    assert times == 2 and keyword == "Python"
+
+
+def test_index_persists_across_opens(tmp_path):
+    path = str(tmp_path / "seen.db")
+    first = SeenJobsIndex(path)
+    first.mark([job("a")])
+    first.close()
+    second = SeenJobsIndex(path)
+    assert len(second.split([job("a")])[1]) == 1
+    second.close()
+
+
+class FailingWriter:
+    paths = []
+    count = 0
+    
+    def write(self, jobs):
+        raise OSError("disk full")
+
+
+def test_emit_marks_only_after_write_succeeds(tmp_path):
+    spider = BossSpider(SpiderConfig(output_dir=str(tmp_path), incremental=True, near_dedup=False))
+    spider.writer = FailingWriter()
+    with pytest.raises(OSError):
+        spider.emit([job("a")], "Python")
+    assert spider.seen_index.split([job("a")])[1] == []
+    
+    spider.writer = None
+    assert spider.emit([job("a")], "Python") == 1
+    # 批量模式：save_results 写出文件后才记录
+    assert spider.seen_index.split([job("a")])[1] == []
+    spider.config.save_csv = False
+    spider.save_results()
+    assert len(spider.seen_index.split([job("a")])[1]) == 1
+    spider.seen_index.close()
+
+
+def test_pool_workers_share_indexes(tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path), incremental=True, near_dedup=True, metrics=False)
+    pool = SpiderPool(config)
+    worker = BossSpider(config, pool=pool)
+    assert worker.seen_index is pool.seen_index
+    assert worker.dedup is pool.dedup
+    assert "near_dups" not in worker.stats
+    pool.seen_index.close()
+    pool.dedup.close()
@@ -0,0 +1,110 @@
+import csv
+import json
+import os
+
+import pytest
+
+from spider import CsvSink, JobParser, JsonlSink, ParquetSink, ResultWriter, SpiderConfig
+
+
+def job(n):
+    return {"职位名称": f"职位{n}", "公司名称": "A", "职位链接": f"https://www.zhipin.com/job_detail/j{n}.html"}
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_jsonl_appends_on_reopen(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    sink = JsonlSink(path)
+    sink.write([job(1), job(2)])
+    sink.close()
+    sink = JsonlSink(path)
+    sink.write([job(3)])
+    assert [row["职位名称"] for row in sink.read_rows()] == ["职位1", "职位2", "职位3"]
+    sink.close()
+    assert len(read_jsonl(path)) == 3
+
+
+def test_write_is_flushed_before_close(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    sink = JsonlSink(path, fsync_every=5)
+    sink.write([job(1)])
+    # 每页写完都 flush，进程崩溃时已写的页不会留在缓冲区
+    assert len(read_jsonl(path)) == 1
+    sink.write([])
+    assert sink.pages == 1
+    sink.close()
+    assert sink.file is None
+
+
+def test_csv_reuses_header_on_reopen(tmp_path):
+    path = str(tmp_path / "out.csv")
+    sink = CsvSink(path)
+    sink.write([job(1)])
+    sink.close()
+    sink = CsvSink(path)
+    # 续写时的列顺序不同，也按原表头写入
+    sink.write([{"职位链接": "https://www.zhipin.com/job_detail/j2.html", "职位名称": "职位2", "公司名称": "B"}])
+    sink.close()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["职位名称", "公司名称", "职位链接"]
+    assert rows[2] == ["职位2", "B", "https://www.zhipin.com/job_detail/j2.html"]
+    assert len(rows) == 3
+
+
+def test_csv_writes_job_records(tmp_path):
+    record = JobParser.build_job_data({"title": "Go", "company": "C", "link": "/job_detail/x.html"})
+    path = str(tmp_path / "out.csv")
+    sink = CsvSink(path)
+    sink.write([record])
+    sink.close()
+    assert sink.read_rows()[0]["职位链接"] == "https://www.zhipin.com/job_detail/x.html"
+
+
+def test_parquet_parts_continue_numbering(tmp_path):
+    pytest.importorskip("pyarrow")
+    base = str(tmp_path / "out")
+    sink = ParquetSink(f"{base}.parquet", fsync_every=2)
+    sink.write([job(1)])
+    # 当前分片还没写尾部，不可读
+    assert sink.read_rows() == []
+    sink.write([job(2)])
+    assert [row["职位名称"] for row in sink.read_rows()] == ["职位1", "职位2"]
+    sink.write([job(3)])
+    sink.close()
+    sink = ParquetSink(f"{base}.parquet")
+    sink.write([job(4)])
+    sink.close()
+    parts = sorted(os.listdir(tmp_path))
+    assert parts == ["out.part-0001.parquet", "out.part-0002.parquet", "out.part-0003.parquet"]
+    assert [row["职位名称"] for row in sink.read_rows()] == ["职位1", "职位2", "职位3", "职位4"]
+
+
+def test_result_writer_exports_json_array_on_close(tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path), stream_formats=["jsonl", "csv"])
+    writer = ResultWriter(config, "jobs")
+    writer.write([job(1), job(2)])
+    writer.write([job(1)])
+    assert writer.count == 3
+    assert writer.written_ids() == {"j1", "j2"}
+    writer.close()
+    assert writer.exported == [str(tmp_path / "jobs.json")]
+    with open(writer.exported[0], encoding="utf-8") as f:
+        assert [row["职位名称"] for row in json.load(f)] == ["职位1", "职位2", "职位1"]
+
+
+def test_result_writer_resumes_into_same_files(tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path), stream_formats=["jsonl"], stream_json_array=False)
+    writer = ResultWriter(config, "jobs")
+    writer.write([job(1)])
+    writer.close()
+    resumed = ResultWriter(config, "jobs")
+    assert resumed.written_ids() == {"j1"}
+    resumed.write([job(2)])
+    resumed.close()
+    assert resumed.exported == []
+    assert [row["职位名称"] for row in read_jsonl(resumed.paths[0])] == ["职位1", "职位2"]
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from spider import SnapshotStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots"))
+    yield store
+    store.close()
+
+
+def page(n):
+    return f"<html><body><ul class='job-list-box'><li>职位 {n}</li></ul></body></html>" * 20
+
+
+def test_put_and_get_round_trip(store):
+    digest = store.put(page(1), keyword="python", page=1, ts=100.0)
+    record = store.record(0)
+    assert len(store) == 1
+    assert record.digest == digest
+    assert (record.keyword, record.page, record.time) == ("python", 1, 100.0)
+    assert record.raw_length == len(page(1).encode("utf-8"))
+    assert store.get(record) == page(1)
+    assert store.stats["stored_bytes"] < store.stats["raw_bytes"]
+
+
+def test_identical_pages_are_stored_once(store):
+    store.put(page(1), keyword="python", page=1)
+    size = os.path.getsize(store.pack_path)
+    store.put(page(1), keyword="go", page=3)
+    assert len(store) == 2
+    assert os.path.getsize(store.pack_path) == size
+    assert store.stats["deduplicated"] == 1
+    first, second = store
+    assert second.offset == first.offset
+    assert store.get(second) == page(1)
+
+
+def test_find_by_keyword_page_and_time(store):
+    store.put(page(1), keyword="python", page=1, ts=100.0)
+    store.put(page(2), keyword="python", page=2, ts=200.0)
+    store.put(page(3), keyword="go", page=1, ts=300.0)
+    assert [r.page for r in store.find(keyword="python")] == [1, 2]
+    assert [r.keyword for r in store.find(page=1)] == ["python", "go"]
+    assert [r.index for r in store.find(since=150.0, until=300.0)] == [1]
+    assert store.find(keyword="java") == []
+    assert len(store.find()) == 3
+
+
+def test_reopen_keeps_index_and_dedup(tmp_path):
+    directory = str(tmp_path / "snapshots")
+    store = SnapshotStore(directory)
+    store.put(page(1), keyword="python", page=1)
+    store.close()
+
+    store = SnapshotStore(directory)
+    store.put(page(1), keyword="python", page=2)
+    store.put(page(2), keyword="rust", page=1)
+    assert store.stats["deduplicated"] == 1
+    assert [r.page for r in store.find(keyword="python")] == [1, 2]
+    assert store.get(store.find(keyword="rust")[0]) == page(2)
+    store.close()
+
+
+def test_read_only_store_sees_new_records(tmp_path):
+    directory = str(tmp_path / "snapshots")
+    writer = SnapshotStore(directory)
+    writer.put(page(1), keyword="python", page=1)
+    reader = SnapshotStore(directory, read_only=True)
+    assert len(reader.find()) == 1
+
+    writer.put(page(2), keyword="go", page=1)
+    records = reader.find(keyword="go")
+    assert [r.keyword for r in records] == ["go"]
+    assert reader.get(records[0]) == page(2)
+    reader.close()
+    writer.close()
+
+
+def test_torn_index_record_is_truncated(tmp_path):
+    directory = str(tmp_path / "snapshots")
+    store = SnapshotStore(directory)
+    store.put(page(1), keyword="python", page=1)
+    store.close()
+    with open(os.path.join(directory, "pages.idx"), "ab") as f:
+        f.write(b"\x00" * (SnapshotStore.RECORD.size // 2))
+
+    store = SnapshotStore(directory)
+    assert len(store) == 1
+    store.put(page(2), keyword="python", page=2)
+    assert [store.get(r) for r in store] == [page(1), page(2)]
+    store.close()
+
+
+def test_record_out_of_range(store):
+    with pytest.raises(IndexError):
+        store.record(0)
+    assert SnapshotStore.is_store(store.directory)
@@ -0,0 +1,136 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from spider import QueueWorker, SpiderConfig, TaskQueue, merge_queue_results
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = TaskQueue(str(tmp_path / "tasks.db"))
+    yield queue
+    queue.close()
+
+
+def test_expand_keywords_cities_pages(tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path), keywords=["python", "go"], queue_cities=["101010100", "101020100"], max_pages=2)
+    tasks = TaskQueue.expand(config)
+    assert len(tasks) == 8
+    assert tasks[0] == ("python", "101010100", 1)
+    assert ("go", "101020100", 2) in tasks
+
+
+def test_enqueue_ignores_existing_tasks(queue):
+    assert queue.enqueue([("python", "c", 1), ("python", "c", 2)]) == 2
+    assert queue.enqueue([("python", "c", 2), ("python", "c", 3)]) == 1
+    assert queue.counts() == {"pending": 3}
+
+
+def test_lease_orders_by_page_and_is_exclusive(queue):
+    queue.enqueue([("python", "c", 2), ("go", "c", 1), ("python", "c", 1)])
+    first = queue.lease("w1", 60)
+    second = queue.lease("w2", 60)
+    assert (first["keyword"], first["page"]) == ("go", 1)
+    assert (second["keyword"], second["page"]) == ("python", 1)
+    assert first["attempts"] == 1
+    assert queue.lease("w3", 60)["page"] == 2
+    assert queue.lease("w4", 60) is None
+    assert queue.unfinished() == 3
+
+
+def test_expired_lease_is_taken_over(queue):
+    queue.enqueue([("python", "c", 1)])
+    task = queue.lease("w1", -1)
+    again = queue.lease("w2", 60)
+    assert again["id"] == task["id"]
+    assert again["attempts"] == 2
+    # 原 worker 的租约已被接手，不能再标记完成
+    assert queue.complete(task["id"], "w1", 10) is False
+    assert queue.complete(again["id"], "w2", 10) is True
+    assert queue.counts() == {"done": 1}
+    assert queue.unfinished() == 0
+
+
+def test_fail_retries_until_max_attempts(queue):
+    queue.enqueue([("python", "c", 1)])
+    max_attempts = 2  # 首次 + 1 次重试
+    task = queue.lease("w1", 60)
+    assert queue.fail(task["id"], "w1", "blocked", max_attempts) == "pending"
+    task = queue.lease("w1", 60)
+    assert task["attempts"] == 2
+    assert queue.fail(task["id"], "w1", "blocked", max_attempts) == "failed"
+    assert queue.lease("w1", 60) is None
+    assert queue.counts() == {"failed": 1}
+    assert queue.unfinished() == 0
+
+
+def test_skip_rest_only_touches_later_pending_pages(queue):
+    queue.enqueue([("python", "c", page) for page in range(1, 5)] + [("python", "d", 3)])
+    leased = [queue.lease("w1", 60) for _ in range(2)]
+    assert [task["page"] for task in leased] == [1, 2]
+    assert queue.skip_rest("python", "c", 1) == 2
+    assert queue.counts() == {"leased": 2, "skipped": 2, "pending": 1}
+
+
+def test_outputs_are_registered_once(queue, tmp_path):
+    path = str(tmp_path / "queue_w1.jsonl")
+    queue.add_outputs([path], "w1")
+    queue.add_outputs([path], "w1")
+    assert queue.outputs() == [os.path.abspath(path)]
+
+
+def test_worker_does_not_mutate_caller_config(tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path), checkpoint=True)
+    worker = QueueWorker(config, worker_id="host/1")
+    try:
+        assert config.checkpoint is True
+        assert config.snapshot_dir != worker.config.snapshot_dir
+        assert worker.config.checkpoint is False
+        assert worker.config.snapshot_dir == os.path.join(str(tmp_path), "snapshots_host_1")
+    finally:
+        worker.queue.close()
+
+
+def write_jsonl(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def test_merge_dedups_by_job_id_and_content(tmp_path):
+    config = SpiderConfig(output_dir=str(tmp_path), save_csv=True, save_json=False)
+    linked = {"职位名称": "Python", "公司名称": "A", "工作地点": "北京", "职位链接": "https://www.zhipin.com/job_detail/abc.html"}
+    unlinked = [
+        {"职位名称": "Go", "公司名称": "B", "工作地点": "上海", "职位链接": ""},
+        {"职位名称": "Java", "公司名称": "C", "工作地点": "深圳", "职位链接": ""},
+    ]
+    first, second = str(tmp_path / "queue_w1.jsonl"), str(tmp_path / "queue_w2.jsonl")
+    write_jsonl(first, [linked] + unlinked)
+    write_jsonl(second, [linked, unlinked[0]])
+    queue = TaskQueue(config.queue_db)
+    queue.add_outputs([first], "w1")
+    queue.add_outputs([second], "w2")
+    queue.close()
+
+    basename = merge_queue_results(config)
+    df = pd.read_csv(f"{basename}.csv", dtype=str, keep_default_na=False)
+    assert sorted(df["职位名称"]) == ["Go", "Java", "Python"]
+
+
+def test_merge_without_outputs(tmp_path):
+    assert merge_queue_results(SpiderConfig(output_dir=str(tmp_path))) is None
+
+
+def test_repeatedly_expired_lease_is_failed(queue):
+    queue.enqueue([("python", "c", 1), ("python", "c", 2)])
+    max_attempts = 3
+    # worker 每次领取后都崩溃（不调用 fail），租约一再过期
+    for attempt in range(1, max_attempts + 1):
+        task = queue.lease(f"w{attempt}", -1, max_attempts)
+        assert (task["page"], task["attempts"]) == (1, attempt)
+    task = queue.lease("w9", 60, max_attempts)
+    assert task["page"] == 2
+    assert queue.counts() == {"failed": 1, "leased": 1}
+    assert queue.lease("w10", 60, max_attempts) is None